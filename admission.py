@@ -0,0 +1,226 @@
+import math
+import os
+import threading
+import time
+
+# Admission control for the API.
+#
+# Every /api/ request takes one of max_in_flight slots before its view runs
+# and gives it back when the request is torn down. Requests are either
+# interactive (the estimator pages, single calculations) or bulk (batch
+# endpoints, large bodies, or callers that say so with X-Request-Priority).
+# The header can always lower a request to bulk; raising one to interactive
+# is only honoured with MACHINING_TRUST_PRIORITY_HEADER on, e.g. behind a
+# gateway that sets the header itself, so batch callers cannot skip the
+# bulk limit by asking for interactive.
+#   - bulk requests may hold at most bulk_in_flight slots, so the rest are
+#     always free for interactive ones;
+#   - when no slot is free, a request waits in its class's queue for at most
+#     its class's wait time; a freed slot goes to waiting interactive requests
+#     before bulk ones;
+#   - a full queue is answered at once with 429, a wait that runs out with
+#     503, both with a Retry-After estimated from the recent service time.
+# Limits are per process; with several worker processes each has its own.
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+PRIORITIES = (INTERACTIVE, BULK)
+PRIORITY_HEADER = 'X-Request-Priority'
+
+# Endpoints that price whole plans or batches
+BULK_PATHS = frozenset({
+    '/api/compare-materials',
+    '/api/select-machine',
+    '/api/schedule',
+    '/api/cost-curve',
+    '/api/estimate',
+    '/api/history/export',
+})
+# Paths never held back, so health checks answer while the API is saturated
+EXEMPT_PATHS = frozenset({'/api/ready'})
+# Bodies larger than this (e.g. an ERP posting a batch to /api/cost) count as bulk
+BULK_BODY_BYTES = 64 * 1024
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_BULK_IN_FLIGHT = 2
+DEFAULT_QUEUE = {INTERACTIVE: 32, BULK: 16}
+DEFAULT_WAIT = {INTERACTIVE: 2.0, BULK: 15.0}  # seconds
+
+MAX_RETRY_AFTER = 60  # seconds
+# Weight of the newest request in the moving average of service time
+SERVICE_TIME_ALPHA = 0.1
+
+
+def get_settings():
+    """Read admission settings from the environment."""
+    settings = {
+        'enabled': os.getenv('MACHINING_ADMISSION', 'on').lower() not in ('off', '0', 'false'),
+        'trust_priority_header': os.getenv('MACHINING_TRUST_PRIORITY_HEADER', 'off').lower() in ('on', '1', 'true'),
+        'max_in_flight': int(os.getenv('MACHINING_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT)),
+        'bulk_in_flight': int(os.getenv('MACHINING_BULK_IN_FLIGHT', DEFAULT_BULK_IN_FLIGHT)),
+        'queue': {
+            INTERACTIVE: int(os.getenv('MACHINING_INTERACTIVE_QUEUE', DEFAULT_QUEUE[INTERACTIVE])),
+            BULK: int(os.getenv('MACHINING_BULK_QUEUE', DEFAULT_QUEUE[BULK])),
+        },
+        'wait': {
+            INTERACTIVE: float(os.getenv('MACHINING_INTERACTIVE_WAIT', DEFAULT_WAIT[INTERACTIVE])),
+            BULK: float(os.getenv('MACHINING_BULK_WAIT', DEFAULT_WAIT[BULK])),
+        },
+    }
+    if settings['max_in_flight'] < 1:
+        raise ValueError('MACHINING_MAX_IN_FLIGHT must be at least 1')
+    if not 1 <= settings['bulk_in_flight'] <= settings['max_in_flight']:
+        raise ValueError('MACHINING_BULK_IN_FLIGHT must be between 1 and MACHINING_MAX_IN_FLIGHT')
+    return settings
+
+
+def classify(path, headers, content_length, trust_header=False):
+    """
+    Priority class of a request.
+
+    Args:
+        path (str): Request path
+        headers (Mapping): Request headers; PRIORITY_HEADER may ask for bulk
+        content_length (int): Body size in bytes, or None
+        trust_header (bool): Also let PRIORITY_HEADER ask for interactive
+    """
+    requested = (headers.get(PRIORITY_HEADER) or '').strip().lower()
+    if requested == BULK or (trust_header and requested == INTERACTIVE):
+        return requested
+    if path in BULK_PATHS or (content_length or 0) > BULK_BODY_BYTES:
+        return BULK
+    return INTERACTIVE
+
+
+class Rejected(Exception):
+    """A request was not admitted; status is 429 (queue full) or 503 (wait timed out)."""
+
+    def __init__(self, status, retry_after, message):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+        self.message = message
+
+
+class AdmissionController:
+    """Bounded in-flight slots shared by the interactive and bulk classes."""
+
+    def __init__(self, settings):
+        self.max_in_flight = settings['max_in_flight']
+        self.bulk_in_flight = settings['bulk_in_flight']
+        self.queue_limit = dict(settings['queue'])
+        self.wait_limit = dict(settings['wait'])
+        self._cond = threading.Condition()
+        self._running = {priority: 0 for priority in PRIORITIES}
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self._service_time = 0.1  # seconds, moving average
+        self.admitted = {priority: 0 for priority in PRIORITIES}
+        self.rejected = {priority: 0 for priority in PRIORITIES}
+        self.timed_out = {priority: 0 for priority in PRIORITIES}
+
+    def _can_run(self, priority):
+        if sum(self._running.values()) >= self.max_in_flight:
+            return False
+        if priority == BULK:
+            # Freed slots go to waiting interactive requests first
+            return self._running[BULK] < self.bulk_in_flight and not self._waiting[INTERACTIVE]
+        return True
+
+    def retry_after(self, priority):
+        """Seconds a rejected caller should wait, from the queue ahead of it and the service time."""
+        slots = self.bulk_in_flight if priority == BULK else self.max_in_flight
+        ahead = self._waiting[priority] + self._running[priority] + 1
+        return min(MAX_RETRY_AFTER, max(1, math.ceil(ahead * self._service_time / slots)))
+
+    def acquire(self, priority):
+        """
+        Take a slot, waiting up to the class's wait limit.
+
+        Returns:
+            float: time.monotonic() when the slot was taken, for release
+
+        Raises:
+            Rejected: If the class's queue is full or the wait runs out
+        """
+        with self._cond:
+            if not self._can_run(priority):
+                if self._waiting[priority] >= self.queue_limit[priority]:
+                    self.rejected[priority] += 1
+                    raise Rejected(429, self.retry_after(priority), f'Too many queued {priority} requests.')
+                deadline = time.monotonic() + self.wait_limit[priority]
+                self._waiting[priority] += 1
+                try:
+                    while not self._can_run(priority):
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self.timed_out[priority] += 1
+                            raise Rejected(503, self.retry_after(priority), 'Server is busy, please retry.')
+                        self._cond.wait(remaining)
+                finally:
+                    self._waiting[priority] -= 1
+                    if priority == INTERACTIVE:
+                        # Bulk waiters may have been held back for this request
+                        self._cond.notify_all()
+            self._running[priority] += 1
+            self.admitted[priority] += 1
+            return time.monotonic()
+
+    def release(self, priority, started):
+        """Give back a slot taken by acquire."""
+        elapsed = time.monotonic() - started
+        with self._cond:
+            self._running[priority] -= 1
+            self._service_time += SERVICE_TIME_ALPHA * (elapsed - self._service_time)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_in_flight': self.max_in_flight,
+                'bulk_in_flight': self.bulk_in_flight,
+                'running': dict(self._running),
+                'waiting': dict(self._waiting),
+                'admitted': dict(self.admitted),
+                'rejected': dict(self.rejected),
+                'timed_out': dict(self.timed_out),
+                'service_time_seconds': round(self._service_time, 4),
+            }
+
+
+def install(app, settings=None):
+    """
+    Put every /api/ request of the Flask app through an AdmissionController.
+
+    Returns:
+        AdmissionController: The controller, or None if admission is disabled
+    """
+    from flask import g, jsonify, request
+
+    settings = settings or get_settings()
+    if not settings['enabled']:
+        return None
+    controller = AdmissionController(settings)
+
+    @app.before_request
+    def admit():
+        if not request.path.startswith('/api/') or request.path in EXEMPT_PATHS:
+            return None
+        priority = classify(
+            request.path, request.headers, request.content_length, settings['trust_priority_header']
+        )
+        try:
+            g.admission = (priority, controller.acquire(priority))
+        except Rejected as e:
+            response = jsonify({'status': 'error', 'message': e.message, 'priority': priority})
+            response.status_code = e.status
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        return None
+
+    @app.teardown_request
+    def leave(exc=None):
+        admission = g.pop('admission', None)
+        if admission is not None:
+            controller.release(*admission)
+
+    return controller
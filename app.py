@@ -1,7 +1,30 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for
+from flask import Flask, render_template, request, jsonify, redirect, url_for, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.orm import configure_mappers
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 from machining_calculator import MachiningCalculator
+from models import batch
+from models.dimensions import normalize as normalize_dimensions
+from models.results import as_result
+import admission
+import cost_engine
+import encoders
+import export
+import history
+import machines
+import materials_search
+import query_stats
+import quote_renderer
+import reference_data
+import result_cache
+import schemas
+import lot_costing
+import scheduler
+import storage
+import tool_life
+import tracing
+import warmup
 import os
 from typing import Optional, Any, Tuple, Dict, Union
 import logging
@@ -9,6 +32,7 @@ import importlib
 from datetime import datetime
 from typing import Dict, Type, Any, Optional
 from dataclasses import dataclass
+import numpy as np
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -23,8 +47,34 @@ app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-key-please-change-in-pro
 app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///machining.db'
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+# Storage mode (default, wal or snapshot) comes from MACHINING_DB_MODE
+storage.configure_app(app)
+
+# Calculation history behind /api/history/export; MACHINING_HISTORY=off stops recording
+app.config['MACHINING_HISTORY'] = os.getenv('MACHINING_HISTORY', 'on').lower() not in ('off', '0', 'false')
+app.config['MACHINING_HISTORY_PATH'] = os.path.join(app.instance_path, history.HISTORY_FILENAME)
+
+
+# Recent /api/calculate results, keyed on the catalogue version: in memory
+# (MACHINING_RESULT_CACHE_SIZE=0 disables it) over instance/result_cache.db,
+# which survives restarts (MACHINING_RESULT_DISK_CACHE=off disables it)
+calculation_cache = result_cache.make_cache(result_cache.get_settings(app.instance_path))
+
+# Sampled request traces written to instance/traces.jsonl; installed before
+# admission control so a trace includes the time spent queueing
+# (MACHINING_TRACE_SAMPLE_RATE and MACHINING_TRACE_SLOW_MS enable it)
+tracer = tracing.install(app)
+
+# Bounded in-flight /api/ requests with interactive and bulk priorities
+# (MACHINING_ADMISSION=off disables it)
+admission_controller = admission.install(app)
+
 # Initialize SQLAlchemy
 db = SQLAlchemy(app)
+with app.app_context():
+    storage.install(db.engine, app)
+    # Statements per /api/ request, checked against query_stats.QUERY_BUDGETS
+    query_stats.install(app, db.engine)
 
 # Database Models
 class Material(db.Model):
@@ -59,6 +109,10 @@ class Operation(db.Model):
 
 class MachiningParameter(db.Model):
     __tablename__ = 'MachiningParameters'
+    __table_args__ = (
+        # One row per material, operation and cut type; catalogue imports upsert on it
+        db.Index('idx_machining_params', 'material_id', 'operation_id', 'notes', unique=True),
+    )
     param_id = db.Column(db.Integer, primary_key=True)
     material_id = db.Column(db.Integer, db.ForeignKey('Materials.material_id'))
     operation_id = db.Column(db.Integer, db.ForeignKey('Operations.operation_id'))
@@ -70,6 +124,324 @@ class MachiningParameter(db.Model):
     depth_of_cut_max = db.Column(db.Float)
     notes = db.Column(db.Text)
 
+class ToolLife(db.Model):
+    __tablename__ = 'tool_life'
+    material_id = db.Column(db.Integer, db.ForeignKey('Materials.material_id'), primary_key=True)
+    tool_material = db.Column(db.String(50), primary_key=True)
+    taylor_n = db.Column(db.Float, nullable=False)
+    taylor_c = db.Column(db.Float, nullable=False)
+    tool_change_minutes = db.Column(db.Float, nullable=False, default=2.0)
+    cost_per_edge = db.Column(db.Float, nullable=False, default=0.0)
+
+    def to_dict(self):
+        return {
+            'material_id': self.material_id,
+            'tool_material': self.tool_material,
+            'taylor_n': self.taylor_n,
+            'taylor_c': self.taylor_c,
+            'tool_change_minutes': self.tool_change_minutes,
+            'cost_per_edge': self.cost_per_edge
+        }
+
+class CostRate(db.Model):
+    __tablename__ = 'cost_rates'
+    id = db.Column(db.Integer, primary_key=True)
+    labor_rate_per_hr = db.Column(db.Float, nullable=False, default=0.0)
+    overhead_factor = db.Column(db.Float, nullable=False, default=1.4)
+
+
+# Operation names mapped to the (module, class) implementing them
+OPERATION_CLASSES = {
+    'facing': ('models.facing', 'FacingOperation'),
+    'turning': ('models.turning', 'TurningOperation'),
+    'drilling': ('models.drilling', 'DrillingOperation'),
+    'boring': ('models.boring', 'BoringOperation'),
+    'reaming': ('models.reaming', 'ReamingOperation'),
+    'grooving': ('models.grooving', 'GroovingOperation'),
+    'threading': ('models.threading', 'ThreadingOperation'),
+    'knurling': ('models.knurling', 'KnurlingOperation'),
+    'parting': ('models.parting', 'PartingOperation')
+}
+
+# Operations whose classes pick rough and finish rows out of the full parameter list;
+# the others are given the first row only
+ROW_LIST_OPERATIONS = {'turning', 'facing', 'grooving', 'knurling'}
+
+
+def get_operation_class(operation_name):
+    """
+    Import and return the class implementing an operation.
+
+    Raises:
+        KeyError: If there is no specialised class for the operation
+        ImportError, AttributeError: If the class cannot be loaded
+    """
+    module_path, class_name = OPERATION_CLASSES[operation_name]
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+
+def run_operation(operation_name, params, material_rating, dimensions):
+    """
+    Calculate one operation with its specialised class, or the generic calculator.
+
+    Args:
+        operation_name (str): Lowercase operation name, e.g. 'turning'
+        params (list): MachiningParameter rows for the material and operation
+        material_rating (float): Machinability rating of the material (0-1)
+        dimensions (Mapping): Dimensions entered by the user, raw or already normalized
+
+    Returns:
+        OperationResult: Raw calculation result; its error is set if the calculation failed
+    """
+    if operation_name not in OPERATION_CLASSES:
+        # Default to generic calculator for operations without a specialized class
+        calculator = MachiningCalculator(params, material_rating)
+        return as_result(calculator.calculate_machining_parameters(
+            operation_name=operation_name,
+            user_inputs=dict(dimensions)
+        ))
+
+    with tracing.span('operation.import', operation=operation_name):
+        operation_class = get_operation_class(operation_name)
+    db_params = params if operation_name in ROW_LIST_OPERATIONS else params[0]
+    with tracing.span('operation.construct', operation=operation_name):
+        operation = operation_class(db_params, material_rating, normalize_dimensions(operation_name, dimensions))
+    with tracing.span('operation.calculate', operation=operation_name) as span:
+        result = as_result(operation.calculate())
+        if result.error is not None:
+            span.set_attribute('operation.error', result.error)
+    return result
+
+
+def machine_dimensions(operation_name, dimensions, machine):
+    """Dimensions with the machine's rapid rate filled in where the operation uses one."""
+    if operation_name == 'drilling' and dimensions.get('rapid_rate') is None:
+        return normalize_dimensions(operation_name, dict(dimensions, rapid_rate=machine.rapid_rate))
+    return dimensions
+
+
+def run_on_machine(operation_name, params, material_rating, dimensions, machine):
+    """
+    Calculate one operation within a machine's limits.
+
+    Spindle speeds are clamped to the machine's max rpm before the operation
+    class runs; the total time is then stretched if the rough cut needs more
+    power than the machine has, and costed at the machine's hour rate.
+
+    Returns:
+        OperationResult: Calculation result with a machine block; its error is set if the calculation failed
+    """
+    clamped, rpm_limited = machines.clamp_rows(params, machine)
+    dimensions = machine_dimensions(operation_name, dimensions, machine)
+    result = run_operation(operation_name, clamped, material_rating, dimensions)
+    if result.error is not None:
+        return result
+
+    stretch, required = machines.power_stretch(
+        operation_name, clamped, material_rating, machine, machines.cut_diameters(operation_name, [dimensions])
+    )
+    minutes = float(result.total_time_minutes) * float(stretch[0])
+    result.total_time_minutes = minutes
+    result.cost = machines.machine_cost(minutes, machine)
+    result.machine_hour_rate = machine.hour_rate
+    result.machine = dict(
+        machine.to_dict(),
+        rpm_limited=rpm_limited,
+        power_limited=bool(stretch[0] > 1.0),
+        required_power_kw=round(float(required[0]), 3),
+        time_factor=round(float(stretch[0]), 3)
+    )
+    return result
+
+
+def machine_evaluator(material, rows):
+    """
+    The evaluate callable machines.select needs for one material.
+
+    Operations the batch kernels support are timed together in one kernel call
+    per (operation kind, machine); the rest go through their classes.
+
+    Args:
+        material (Material): Material of the plan
+        rows (dict): {(material_id, operation_name): [MachiningParameter]}
+    """
+    material_rating = material.machinability_rating or 0.5
+
+    def evaluate(operation_name, machine, records):
+        params = rows.get((material.material_id, operation_name))
+        if not params:
+            raise ValueError(f'No machining parameters found for {material.material_name} with {operation_name}.')
+        clamped, rpm_limited = machines.clamp_rows(params, machine)
+
+        minutes = np.full(len(records), np.nan)
+        errors = [None] * len(records)
+        kernel = [i for i, record in enumerate(records) if batch.supports(operation_name, record)]
+        if kernel:
+            values, messages = batch.operation_minutes(
+                operation_name, clamped, material_rating, [records[i] for i in kernel]
+            )
+            minutes[kernel] = values
+            for i, message in zip(kernel, messages):
+                errors[i] = message
+        for i in sorted(set(range(len(records))) - set(kernel)):
+            try:
+                result = run_operation(
+                    operation_name, clamped, material_rating,
+                    machine_dimensions(operation_name, records[i], machine)
+                )
+            except ValueError as e:
+                errors[i] = str(e)
+                continue
+            except Exception as e:
+                logger.error(f"Error calculating {operation_name} on {machine.machine_name}: {str(e)}", exc_info=True)
+                errors[i] = f'Failed to calculate {operation_name}: {str(e)}'
+                continue
+            if result.error is not None:
+                errors[i] = result.error.splitlines()[0]
+                continue
+            minutes[i] = result.total_time_minutes
+
+        stretch, _ = machines.power_stretch(
+            operation_name, clamped, material_rating, machine, machines.cut_diameters(operation_name, records)
+        )
+        return minutes * stretch, errors, rpm_limited, stretch
+
+    return evaluate
+
+
+def make_operation_pricer(material_ids=(), store=None):
+    """
+    Return a function that prices plan operations in minutes per piece.
+
+    The returned function takes the (job, operation) dictionaries used by
+    /api/schedule: the operation gives operation_name, dimensions and optionally
+    operation_id and material_id, falling back to the job's material_id.
+    Identical operations are only calculated once.
+
+    Args:
+        material_ids (iterable): Materials the plan uses; their parameters are
+            loaded up front in one query instead of one query per operation
+        store (tuple): A load_parameter_store result to use instead
+
+    Raises (from the returned function):
+        ValueError: If the material, operation or parameters are unknown, or the calculation fails
+    """
+    operation_ids = {op.operation_name.lower(): op.operation_id for op in Operation.query.all()}
+    materials = {}
+    parameters = {}
+    if store is None and material_ids:
+        store = load_parameter_store(set(material_ids), operation_ids)
+    if store is not None:
+        materials.update(store[0])
+        for (material_id, operation_name), rows in store[1].items():
+            parameters[(material_id, operation_ids.get(operation_name))] = rows
+    cache = {}
+
+    def price(job, op):
+        material_id = op.get('material_id', job.get('material_id'))
+        operation_name = str(op['operation_name']).lower()
+        operation_id = op.get('operation_id') or operation_ids.get(operation_name)
+        dimensions = normalize_dimensions(operation_name, op.get('dimensions', {}))
+        key = (material_id, operation_id, dimensions.key)
+        if key in cache:
+            return cache[key]
+
+        errors = schemas.validate_dimensions(operation_name, dimensions)
+        if errors:
+            raise ValueError(f"{operation_name}: " + '; '.join(error['message'] for error in errors))
+
+        if material_id not in materials:
+            materials[material_id] = Material.query.get(material_id) if material_id is not None else None
+        material = materials[material_id]
+        if material is None:
+            raise ValueError(f'Material with ID {material_id} not found in database.')
+        if (material_id, operation_id) not in parameters:
+            parameters[(material_id, operation_id)] = MachiningParameter.query.filter_by(
+                material_id=material_id,
+                operation_id=operation_id
+            ).order_by(MachiningParameter.param_id).all()
+        params = parameters[(material_id, operation_id)]
+        if not params:
+            raise ValueError(f'No machining parameters found for {material.material_name} with {operation_name}.')
+
+        result = run_operation(operation_name, params, material.machinability_rating or 0.5, dimensions)
+        if result.error is not None:
+            raise ValueError(result.error.splitlines()[0])
+        cache[key] = result.total_time_minutes
+        return cache[key]
+
+    return price
+
+
+def plan_operation_minutes(data):
+    """
+    Minutes per piece for each entry of data['operations'].
+
+    Operations may give time_minutes directly (e.g. a result from /api/calculate);
+    the rest are priced with make_operation_pricer using data['material_id'].
+    """
+    price = None
+    minutes = []
+    for op in data['operations']:
+        value = op.get('time_minutes')
+        if value is None:
+            price = price or make_operation_pricer(
+                [data.get('material_id')] + [o['material_id'] for o in data['operations'] if 'material_id' in o]
+            )
+            value = price(data, op)
+        minutes.append(float(value))
+    return minutes
+
+
+def load_parameter_store(material_ids, operation_names):
+    """
+    Materials and their MachiningParameter rows for a set of materials and operations, in one query.
+
+    Args:
+        material_ids (iterable): Material IDs; unknown IDs are left out
+        operation_names (iterable): Lowercase operation names
+
+    Returns:
+        tuple: ({material_id: Material}, {(material_id, operation_name): [MachiningParameter]});
+        a (material, operation) pair without rows is not available
+    """
+    material_ids = [m for m in material_ids if m is not None]
+    materials = {m.material_id: m for m in Material.query.filter(Material.material_id.in_(material_ids)).all()}
+    rows = {}
+    query = db.session.query(MachiningParameter, Operation.operation_name)\
+        .join(Operation, Operation.operation_id == MachiningParameter.operation_id)\
+        .filter(MachiningParameter.material_id.in_(list(materials)),
+                db.func.lower(Operation.operation_name).in_(list(operation_names)))\
+        .order_by(MachiningParameter.param_id)
+    for param, operation_name in query:
+        rows.setdefault((param.material_id, operation_name.lower()), []).append(param)
+    return materials, rows
+
+
+def cost_callbacks(materials, rows):
+    """
+    The load_parameters and price_operation callables cost_engine.price_parts
+    needs, served from a load_parameter_store result.
+    """
+    price = None
+
+    def load_parameters(material_id, operation_name):
+        material = materials.get(material_id)
+        if material is None:
+            raise ValueError(f'Material with ID {material_id} not found in database.')
+        params = rows.get((material_id, operation_name))
+        if not params:
+            raise ValueError(f'No machining parameters found for {material.material_name} with {operation_name}.')
+        return params, material.machinability_rating or 0.5
+
+    def price_operation(material_id, operation_name, dimensions):
+        nonlocal price
+        price = price or make_operation_pricer(store=(materials, rows))
+        return price({'material_id': material_id}, {'operation_name': operation_name, 'dimensions': dimensions})
+
+    return load_parameters, price_operation
+
 
 # Error Handlers
 @app.errorhandler(400)
@@ -85,6 +457,98 @@ def server_error(error):
     logger.error(f"Server error: {str(error)}")
     return jsonify({'error': 'Internal server error', 'message': 'An unexpected error occurred'}), 500
 
+# Set once the materials full-text index is known to exist
+_materials_index_ready = False
+# Set once catalogue_version and its triggers are known to exist
+_version_tracking_ready = False
+
+def ensure_version_tracking(conn):
+    """Install catalogue version tracking once per process (not on read-only snapshots)."""
+    global _version_tracking_ready
+    # Snapshot databases are read-only and never change
+    if not _version_tracking_ready and app.config['MACHINING_DB_SETTINGS']['mode'] != 'snapshot':
+        with query_stats.exempt():
+            reference_data.ensure_version_tracking(conn)
+        _version_tracking_ready = True
+
+def get_machine_catalogue(version=None):
+    """Machines for the current catalogue version (read unless given), from the machines cache."""
+    conn = db.engine.raw_connection()
+    try:
+        ensure_version_tracking(conn)
+        return machines.get_machines(conn, version)
+    finally:
+        conn.close()
+
+def get_cost_rates(data):
+    """Cost rates for the current catalogue version with the request's rate overrides applied."""
+    conn = db.engine.raw_connection()
+    try:
+        ensure_version_tracking(conn)
+        return cost_engine.get_rates(conn).with_overrides(data)
+    finally:
+        conn.close()
+
+def record_history(result, material_id, operation_id, operation_name, dimensions, machine_id=None):
+    """Queue a successful calculation for the history store; never fails the request."""
+    try:
+        history.get_store(app.config['MACHINING_HISTORY_PATH']).record(history.make_row(
+            result,
+            material_id,
+            result.get('material'),
+            operation_id,
+            operation_name,
+            dimensions,
+            machine_id=machine_id
+        ))
+    except Exception as e:
+        logger.warning(f"Could not record calculation history: {str(e)}")
+
+def get_availability():
+    """Material x operation availability index for the current catalogue version, from the bootstrap cache."""
+    conn = db.engine.raw_connection()
+    try:
+        ensure_version_tracking(conn)
+        return reference_data.get_bootstrap(conn)['availability']
+    finally:
+        conn.close()
+
+def no_parameters_error(index, material_id, operation_id):
+    """404 response for a material and operation without parameters, suggesting materials that have them."""
+    suggestion = ''
+    available_materials = index.suggestions(operation_id)
+    if available_materials:
+        suggestion = f' Available materials for this operation: {", ".join(available_materials)}.'
+    material_name = index.material_names.get(int(material_id), material_id)
+    operation_name = index.operation_names.get(int(operation_id), operation_id)
+    return jsonify({
+        'status': 'error',
+        'message': f'No machining parameters found for {material_name} with {operation_name}.{suggestion}'
+    }), 404
+
+def parse_id(value, field):
+    """
+    Integer ID from a JSON value.
+
+    Raises:
+        ValueError: If value is not an integer, an integral finite float or an integer string
+    """
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f'{field} must be an integer, got {value!r}.')
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f'{field} must be an integer, got {value!r}.') from None
+
+def catalogue_version():
+    """Current catalogue version, or None if the database does not track one."""
+    conn = db.engine.raw_connection()
+    try:
+        ensure_version_tracking(conn)
+        return reference_data.current_version(conn)
+    finally:
+        conn.close()
+
 # API Endpoints
 @app.route('/api/materials', methods=['GET'])
 def get_materials():
@@ -96,6 +560,73 @@ def get_materials():
         logger.error(f"Error fetching materials: {str(e)}")
         return jsonify({'status': 'error', 'message': 'Failed to fetch materials'}), 500
 
+@app.route('/api/bootstrap', methods=['GET'])
+def get_bootstrap():
+    """
+    Everything the UI needs on load in one cached response: materials,
+    operations, parameter ranges and the material x operation availability matrix
+
+    The payload is rebuilt only when the catalogue changes; clients revalidate
+    with If-None-Match and get 304 while it has not.
+    """
+    conn = db.engine.raw_connection()
+    try:
+        ensure_version_tracking(conn)
+        bootstrap = reference_data.get_bootstrap(conn)
+    except Exception as e:
+        logger.error(f"Error building bootstrap data: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Failed to load reference data'}), 500
+    finally:
+        conn.close()
+
+    headers = {
+        'ETag': '"' + bootstrap['etag'] + '"',
+        'Cache-Control': 'no-cache',
+        'Vary': 'Accept-Encoding'
+    }
+    if bootstrap['etag'] in request.if_none_match:
+        return Response(status=304, headers=headers)
+    if 'gzip' in request.accept_encodings:
+        headers['Content-Encoding'] = 'gzip'
+        return Response(bootstrap['gzip_body'], mimetype='application/json', headers=headers)
+    return Response(bootstrap['body'], mimetype='application/json', headers=headers)
+
+@app.route('/api/materials/search', methods=['GET'])
+def search_materials():
+    """
+    Type-ahead search over the materials catalogue
+
+    Query parameters:
+        q: text to search for in material name, recommended tool and notes
+        limit: page size (default 20, max 100)
+        cursor: next_cursor from the previous page
+
+    Queries with a word longer than two characters are ranked by relevance
+    ('ranked': true); their time grows with the number of matches (about 8 ms
+    for 7,000 matches in a 20,000-material catalogue), so the 1 ms target holds
+    only for narrow queries. Queries of one- and two-character words are
+    returned in material_id order and stay well under 1 ms at any catalogue size.
+    """
+    query = request.args.get('q', '')
+    limit = request.args.get('limit', materials_search.DEFAULT_PAGE_SIZE, type=int)
+    cursor = request.args.get('cursor')
+
+    global _materials_index_ready
+    conn = db.engine.raw_connection()
+    try:
+        if not _materials_index_ready:
+            materials_search.ensure_index(conn)
+            _materials_index_ready = True
+        page = materials_search.search(conn, query, limit=limit, cursor=cursor)
+        return jsonify({'status': 'success', **page})
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error searching materials: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Failed to search materials'}), 500
+    finally:
+        conn.close()
+
 @app.route('/api/operations', methods=['GET'])
 def get_operations():
     """Get all available operations"""
@@ -106,6 +637,55 @@ def get_operations():
         logger.error(f"Error fetching operations: {str(e)}")
         return jsonify({'status': 'error', 'message': 'Failed to fetch operations'}), 500
 
+@app.route('/api/machines', methods=['GET'])
+def get_machines():
+    """Get all machines with their limits, hour rates and capabilities"""
+    try:
+        return jsonify([machine.to_dict() for machine in get_machine_catalogue()])
+    except Exception as e:
+        logger.error(f"Error fetching machines: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Failed to fetch machines'}), 500
+
+@app.route('/api/availability', methods=['GET'])
+def get_availability_index():
+    """
+    Which materials have machining parameters for which operations
+
+    Query parameters (all optional):
+        material_id: only the operations available for this material
+        operation_id: only the materials available for this operation; with
+            material_id, whether the pair is available and, if not, the
+            materials that are
+    """
+    try:
+        index = get_availability()
+    except Exception as e:
+        logger.error(f"Error loading availability: {str(e)}")
+        return jsonify({'status': 'error', 'message': 'Failed to load availability'}), 500
+
+    material_id = request.args.get('material_id')
+    operation_id = request.args.get('operation_id')
+    if material_id is not None and not index.has_material(material_id):
+        return jsonify({'status': 'error', 'message': f'Material with ID {material_id} not found in database.'}), 404
+    if operation_id is not None and not index.has_operation(operation_id):
+        return jsonify({'status': 'error', 'message': f'Operation with ID {operation_id} not found in database.'}), 404
+
+    if material_id is not None and operation_id is not None:
+        available = index.available(material_id, operation_id)
+        data = {
+            'material_id': int(material_id),
+            'operation_id': int(operation_id),
+            'available': available,
+            'suggestions': [] if available else list(index.suggestions(operation_id))
+        }
+    elif material_id is not None:
+        data = {'material_id': int(material_id), 'operation_ids': list(index.operations_for(material_id))}
+    elif operation_id is not None:
+        data = {'operation_id': int(operation_id), 'material_ids': list(index.materials_for(operation_id))}
+    else:
+        data = index.to_dict()
+    return jsonify({'status': 'success', 'version': index.version, 'data': data})
+
 @app.route('/api/parameters/<int:material_id>/<int:operation_id>', methods=['GET'])
 def get_parameters(material_id, operation_id):
     """Get machining parameters for a specific material and operation"""
@@ -129,6 +709,121 @@ def get_parameters(material_id, operation_id):
         logger.error(f"Error fetching parameters: {str(e)}")
         return jsonify({'status': 'error', 'message': 'Failed to fetch parameters'}), 500
 
+def calculate_result(data, operation_name, dimensions):
+    """
+    Result of one /api/calculate request, from the result cache when possible.
+
+    Args:
+        data (dict): Request payload with material_id, operation_id and optionally an int machine_id
+        operation_name (str): Lowercase operation name
+        dimensions (Dimensions): Validated, normalized dimensions
+
+    Returns:
+        tuple: (OperationResult, None), or (None, error response) if the request cannot be
+        calculated; the result may be shared through the cache and must not be modified
+    """
+    # Unknown IDs and pairs without parameters are answered from the
+    # availability index, without touching the database
+    with tracing.span('availability'):
+        index = get_availability()
+    if not index.has_material(data['material_id']):
+        return None, (jsonify({
+            'status': 'error',
+            'message': f'Material with ID {data["material_id"]} not found in database. Please select a valid material.'
+        }), 404)
+    if not index.has_operation(data['operation_id']):
+        return None, (jsonify({
+            'status': 'error',
+            'message': f'Operation with ID {data["operation_id"]} not found in database.'
+        }), 404)
+    if not index.available(data['material_id'], data['operation_id']):
+        return None, no_parameters_error(index, data['material_id'], data['operation_id'])
+
+    cache_key = None
+    if calculation_cache is not None and index.version is not None:
+        cache_key = result_cache.make_key(
+            index.etag, data['material_id'], data['operation_id'], operation_name, dimensions, data.get('machine_id')
+        )
+        with tracing.span('cache.get') as span:
+            cached = calculation_cache.get(cache_key)
+            span.set_attribute('cache.hit', cached is not None)
+        if cached is not None:
+            return cached, None
+
+    # Material, operation and their parameter rows in one query
+    with tracing.span('db.parameters') as span:
+        rows = db.session.query(Material, MachiningParameter)\
+            .join(MachiningParameter, MachiningParameter.material_id == Material.material_id)\
+            .filter(Material.material_id == data['material_id'],
+                    MachiningParameter.operation_id == data['operation_id'])\
+            .order_by(MachiningParameter.param_id)\
+            .all()
+        span.set_attribute('db.rows', len(rows))
+
+    if not rows:
+        # The catalogue changed after the index was read
+        return None, no_parameters_error(index, data['material_id'], data['operation_id'])
+    material = rows[0][0]
+    params = [param for _, param in rows]
+    
+    machine = None
+    if data.get('machine_id') is not None:
+        with tracing.span('db.machines'):
+            machine = next(
+                (m for m in get_machine_catalogue(index.version) if m.machine_id == data['machine_id']), None
+            )
+        if machine is None:
+            return None, (jsonify({
+                'status': 'error',
+                'message': f'Machine with ID {data["machine_id"]} not found in database.'
+            }), 404)
+        if not machine.can_do(operation_name):
+            return None, (jsonify({
+                'status': 'error',
+                'message': f'{machine.machine_name} cannot perform {operation_name}.',
+                'field': 'machine_id'
+            }), 400)
+
+    try:
+        if machine is not None:
+            result = run_on_machine(
+                operation_name, params, material.machinability_rating or 0.5, dimensions, machine
+            )
+        else:
+            result = run_operation(
+                operation_name, params, material.machinability_rating or 0.5, dimensions
+            )
+    except ValueError as e:
+        # Rejected by the operation class, e.g. an invalid hole pattern
+        return None, (jsonify({
+            'status': 'error',
+            'message': str(e),
+            'field': 'dimensions'
+        }), 400)
+    except (ImportError, AttributeError) as e:
+        logger.error(f"Error initializing {operation_name} operation: {str(e)}")
+        return None, (jsonify({
+            'status': 'error',
+            'message': f'Failed to initialize {operation_name} operation',
+            'field': 'operation'
+        }), 500)
+
+    if result.error is not None:
+        return None, (jsonify({
+            'status': 'error',
+            'message': result.error,
+            'field': 'calculation'
+        }), 400)
+        
+    # Add metadata to result
+    result.material = material.material_name
+    result.operation = operation_name
+    if result.machine_hour_rate is None:
+        result.machine_hour_rate = 0
+    if cache_key is not None:
+        calculation_cache.put(cache_key, result)
+    return result, None
+
 @app.route('/api/calculate', methods=['POST'])
 def calculate():
     """
@@ -146,12 +841,15 @@ def calculate():
             'depth': float,     // for drilling, milling
             'depth_of_cut': float,  // optional, will use default if not provided
             'total_depth': float    // optional, for multiple passes
-        }
+        },
+        'machine_id': int,          // optional, calculate within this machine's limits and hour rate
+        'fields': [str, ...]        // optional, only these result fields (e.g. ['total_time_minutes', 'cost'])
     }
     """
     try:
         data = request.get_json()
-        logger.info(f"Calculation request: {data}")
+        with tracing.span('log.request'):
+            logger.info(f"Calculation request: {data}")
         
         # Validate required fields
         required_fields = ['material_id', 'operation_id', 'operation_name', 'dimensions']
@@ -161,113 +859,72 @@ def calculate():
                     'status': 'error',
                     'message': f'Missing required field: {field}'
                 }), 400
-        
-        # Get material and operation
-        material = Material.query.get(data['material_id'])
-        if not material:
+
+        # Reject bad dimensions before any database work
+        if not isinstance(data['operation_name'], str):
             return jsonify({
                 'status': 'error',
-                'message': f'Material with ID {data["material_id"]} not found in database. Please select a valid material.'
-            }), 404
-            
-        operation = Operation.query.get(data['operation_id'])
-        if not operation:
+                'message': 'operation_name must be a string.',
+                'field': 'operation_name'
+            }), 400
+        if not isinstance(data['dimensions'], dict):
             return jsonify({
                 'status': 'error',
-                'message': f'Operation with ID {data["operation_id"]} not found in database.'
-            }), 404
-        
-        # Get machining parameters
-        params = MachiningParameter.query.filter_by(
-            material_id=data['material_id'],
-            operation_id=data['operation_id']
-        ).all()
-        
-        if not params:
-            # Get available materials for this operation to suggest alternatives
-            available_materials = db.session.query(Material.material_name)\
-                .join(MachiningParameter, MachiningParameter.material_id == Material.material_id)\
-                .filter(MachiningParameter.operation_id == data['operation_id'])\
-                .all()
-                
-            available_materials = [m[0] for m in available_materials]
-            
-            suggestion = ''
-            if available_materials:
-                suggestion = f' Available materials for this operation: {", ".join(available_materials)}.'
-            
+                'message': 'Dimensions must be an object.',
+                'field': 'dimensions'
+            }), 400
+        with tracing.span('validate'):
+            dimensions = normalize_dimensions(data['operation_name'], data['dimensions'])
+            errors = schemas.validate_dimensions(data['operation_name'], dimensions)
+        if errors:
             return jsonify({
                 'status': 'error',
-                'message': f'No machining parameters found for {material.material_name} with {operation.operation_name}.{suggestion}'
-            }), 404
-        
-        # Initialize the appropriate operation class based on operation_name
-        operation_name = data['operation_name'].lower()
-        
-        # Dictionary mapping operation names to their respective operation classes
-        operation_classes = {
-            'facing': ('models.facing', 'FacingOperation'),
-            'turning': ('models.turning', 'TurningOperation'),
-            'drilling': ('models.drilling', 'DrillingOperation'),
-            'boring': ('models.boring', 'BoringOperation'),
-            'reaming': ('models.reaming', 'ReamingOperation'),
-            'grooving': ('models.grooving', 'GroovingOperation'),
-            'threading': ('models.threading', 'ThreadingOperation'),
-            'knurling': ('models.knurling', 'KnurlingOperation'),
-            'parting': ('models.parting', 'PartingOperation')
-        }
+                'message': '; '.join(error['message'] for error in errors),
+                'field': 'dimensions',
+                'errors': errors
+            }), 400
         
-        # Check if we have a specialized operation class
-        if operation_name in operation_classes:
-            module_path, class_name = operation_classes[operation_name]
-            try:
-                # Dynamically import the module and get the class
-                module = __import__(module_path, fromlist=[class_name])
-                operation_class = getattr(module, class_name)
-                # Initialize and calculate
-                # Ensure we're passing the first parameter if params is a list
-                db_params = params[0] if isinstance(params, list) and len(params) > 0 else params
-                operation = operation_class(db_params, material.machinability_rating or 0.5, data['dimensions'])
-                result = operation.calculate()
-            except (ImportError, AttributeError) as e:
-                logger.error(f"Error initializing {class_name}: {str(e)}")
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Failed to initialize {operation_name} operation',
-                    'field': 'operation'
-                }), 500
-        else:
-            # Default to generic calculator for operations without a specialized class
-            calculator = MachiningCalculator(params, material.machinability_rating or 0.5)
-            result = calculator.calculate_machining_parameters(
-                operation_name=operation_name,
-                user_inputs=data['dimensions']
-            )
-            
-        if 'error' in result:
+        fields = data.get('fields')
+        if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
             return jsonify({
                 'status': 'error',
-                'message': result['error'],
-                'field': 'calculation'
+                'message': 'fields must be a list of result field names.',
+                'field': 'fields'
             }), 400
-            
-        # Add metadata to result
-        result.update({
-            'material': material.material_name,
-            'operation': operation_name,
-            'timestamp': datetime.utcnow().isoformat(),
-            'machine_hour_rate': getattr(calculator, 'MACHINE_HOUR_RATE', 0) if 'calculator' in locals() else 0
-            })
-            
+
+        if data.get('machine_id') is not None:
+            try:
+                data['machine_id'] = parse_id(data['machine_id'], 'machine_id')
+            except ValueError as e:
+                return jsonify({'status': 'error', 'message': str(e), 'field': 'machine_id'}), 400
+
+        operation_name = data['operation_name'].lower()
+        tracing.current_span().set_attribute('operation', operation_name)
+        result, error = calculate_result(data, operation_name, dimensions)
+        if error is not None:
+            return error
+        with tracing.span('result.serialize'):
+            payload = result.to_dict(fields)
+            payload['timestamp'] = datetime.utcnow().isoformat()
+
+        if app.config['MACHINING_HISTORY']:
+            with tracing.span('history.record'):
+                record_history(
+                    payload if fields is None else result.to_dict(), data['material_id'], data['operation_id'],
+                    operation_name, dimensions, data.get('machine_id')
+                )
+
         # Return the time in the format expected by the frontend
-        time_value = result.get('total_time_minutes', 0)
-        logger.info(f"Calculation successful: {result}")
+        time_value = result.render_total_time_minutes()
+        with tracing.span('log.result'):
+            logger.info(f"Calculation successful: {payload}")
             
-        return jsonify({
-            'status': 'success',
-            'time': time_value,
-            'data': result
-            })
+        with tracing.span('response.encode'):
+            return encoders.respond({
+                'status': 'success',
+                'time': time_value,
+                'data': payload
+                }, compact=encoders.compact_result)
             
     except Exception as e:
         logger.error(f"Error in calculation: {str(e)}", exc_info=True)
@@ -286,6 +943,802 @@ def calculate():
         }), 500
     
 
+# Largest number of lot sizes evaluated in one request
+MAX_LOT_SIZES = 1_000_000
+
+def lot_sizes_from_request(data):
+    """
+    Lot sizes from a JSON payload: either 'lot_sizes' (a list) or
+    'lot_range' ({'start', 'stop', 'step'}, stop inclusive).
+
+    Returns:
+        numpy.ndarray: Lot sizes as floats
+
+    Raises:
+        ValueError: If neither is given, lot_range is not an object, or the
+            sizes are not finite, invalid or too many
+    """
+    if 'lot_sizes' in data:
+        lot_sizes = np.asarray(data['lot_sizes'], dtype=float)
+    elif 'lot_range' in data:
+        lot_range = data['lot_range']
+        if not isinstance(lot_range, dict):
+            raise ValueError("lot_range must be an object with 'start', 'stop' and 'step'.")
+        try:
+            start = int(lot_range.get('start', 1))
+            stop = int(lot_range['stop'])
+            step = int(lot_range.get('step', 1))
+        except OverflowError:
+            raise ValueError("lot_range start, stop and step must be finite numbers.") from None
+        if start < 0 or stop < start or step <= 0:
+            raise ValueError("lot_range needs 0 <= start <= stop and a positive step.")
+        if (stop - start) // step + 1 > MAX_LOT_SIZES:
+            raise ValueError(f"lot_range covers more than {MAX_LOT_SIZES} lot sizes.")
+        lot_sizes = np.arange(start, stop + 1, step, dtype=float)
+    else:
+        raise ValueError("Provide either lot_sizes or lot_range.")
+
+    if lot_sizes.ndim != 1 or lot_sizes.size == 0:
+        raise ValueError("lot_sizes must be a non-empty list of numbers.")
+    if not np.all(np.isfinite(lot_sizes)):
+        raise ValueError("lot_sizes must be finite numbers.")
+    if lot_sizes.size > MAX_LOT_SIZES:
+        raise ValueError(f"At most {MAX_LOT_SIZES} lot sizes can be evaluated at once.")
+    return lot_sizes
+
+@app.route('/api/tool-life', methods=['POST'])
+def tool_life_curve():
+    """
+    Tool changes, tool-change time and tool cost over a range of lot sizes
+
+    Expected JSON payload:
+    {
+        'material_id': int,
+        'tool_material': str,               // optional, defaults to the material's recommended_tool
+        'cutting_time_minutes': float,      // cutting time per piece with this tool
+        'cutting_speed': float,             // m/min, or give spindle_speed (rpm) and diameter (mm)
+        'lot_sizes': [int, ...]             // or 'lot_range': {'start': 1, 'stop': 100000, 'step': 1}
+    }
+    """
+    try:
+        data = request.get_json()
+        for field in ('material_id', 'cutting_time_minutes'):
+            if field not in data:
+                return jsonify({'status': 'error', 'message': f'Missing required field: {field}'}), 400
+
+        material = Material.query.get(data['material_id'])
+        if not material:
+            return jsonify({
+                'status': 'error',
+                'message': f'Material with ID {data["material_id"]} not found in database.'
+            }), 404
+        tool_material = data.get('tool_material') or material.recommended_tool
+        constants = ToolLife.query.get((material.material_id, tool_material))
+        if not constants:
+            return jsonify({
+                'status': 'error',
+                'message': f'No tool-life data for {tool_material} tools on {material.material_name}.'
+            }), 404
+
+        if 'cutting_speed' in data:
+            cutting_speed = float(data['cutting_speed'])
+        elif 'spindle_speed' in data and 'diameter' in data:
+            cutting_speed = tool_life.cutting_speed_m_min(float(data['spindle_speed']), float(data['diameter']))
+        else:
+            return jsonify({
+                'status': 'error',
+                'message': 'Provide cutting_speed, or spindle_speed and diameter.'
+            }), 400
+
+        lot_sizes = lot_sizes_from_request(data)
+        curve = tool_life.tool_change_curve(
+            lot_sizes,
+            float(data['cutting_time_minutes']),
+            cutting_speed,
+            constants.taylor_n,
+            constants.taylor_c,
+            constants.tool_change_minutes,
+            constants.cost_per_edge
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in tool-life calculation: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Tool-life calculation error: {str(e)}'}), 500
+
+    return encoders.respond({
+        'status': 'success',
+        'data': {
+            'tool': constants.to_dict(),
+            'cutting_speed_m_min': round(cutting_speed, 3),
+            'tool_life_minutes': curve['tool_life_minutes'],
+            'lot_sizes': lot_sizes.astype(int),
+            'edges_used': curve['edges_used'].astype(int),
+            'tool_changes': curve['tool_changes'].astype(int),
+            'tool_change_minutes': np.round(curve['tool_change_minutes'], 3),
+            'tool_cost': np.round(curve['tool_cost'], 2),
+            'tool_change_minutes_per_piece': np.round(curve['tool_change_minutes_per_piece'], 5),
+            'tool_cost_per_piece': np.round(curve['tool_cost_per_piece'], 4)
+        }
+    })
+
+@app.route('/api/cost-curve', methods=['POST'])
+def cost_curve():
+    """
+    Per-piece and per-lot time and cost over a range of lot sizes
+
+    The plan is priced once; setup is amortized over each lot size and costs
+    are built like /api/cost: labor, machine and overhead rates from cost_rates
+    unless overridden, material from the stock size unless material_cost is given.
+
+    Expected JSON payload:
+    {
+        'material_id': int,
+        'operations': [                      // priced like /api/schedule operations
+            {'operation_name': str, 'dimensions': {...}} or {'operation_name': str, 'time_minutes': float}
+        ],
+        'setup_minutes': float,              // once per lot
+        'tool_minutes': float,               // per piece, optional
+        'misc_minutes': float,               // per piece, optional
+        'stock': {'diameter': float, 'length': float},   // optional, mm; as for /api/cost
+        'material_cost': float,              // per piece, optional, replaces the stock-based cost
+        'material_rate_per_kg': float,       // optional, defaults to material_costs
+        'tool_cost': float,                  // per piece, optional
+        'misc_cost': float,                  // per piece, optional
+        'labor_rate_per_hr': float,          // optional, defaults to cost_rates
+        'machine_rate_per_hr': float,        // optional, defaults to cost_rates
+        'overhead_factor': float,            // optional, defaults to cost_rates
+        'tool_life': {                       // optional, adds Taylor tool changes
+            'tool_material': str, 'cutting_speed': float
+        },
+        'lot_sizes': [int, ...]              // or 'lot_range': {'start': 1, 'stop': 5000, 'step': 1}
+    }
+    """
+    try:
+        data = request.get_json()
+        if not data.get('operations'):
+            return jsonify({'status': 'error', 'message': 'Missing required field: operations'}), 400
+        lot_sizes = lot_sizes_from_request(data)
+
+        operation_minutes = [
+            (str(op['operation_name']).lower(), minutes)
+            for op, minutes in zip(data['operations'], plan_operation_minutes(data))
+        ]
+        times = lot_costing.piece_times(
+            operation_minutes,
+            float(data.get('tool_minutes', 0.0)),
+            float(data.get('misc_minutes', 0.0))
+        )
+
+        rates = get_cost_rates(data)
+
+        tool_curve = None
+        if data.get('tool_life'):
+            material = Material.query.get(data.get('material_id'))
+            if not material:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'Material with ID {data.get("material_id")} not found in database.'
+                }), 404
+            tool_material = data['tool_life'].get('tool_material') or material.recommended_tool
+            constants = ToolLife.query.get((material.material_id, tool_material))
+            if not constants:
+                return jsonify({
+                    'status': 'error',
+                    'message': f'No tool-life data for {tool_material} tools on {material.material_name}.'
+                }), 404
+            tool_curve = tool_life.tool_change_curve(
+                lot_sizes,
+                times['machining'],
+                float(data['tool_life']['cutting_speed']),
+                constants.taylor_n,
+                constants.taylor_c,
+                constants.tool_change_minutes,
+                constants.cost_per_edge
+            )
+
+        material_cost = cost_engine.material_cost(data, rates)
+        curve = lot_costing.cost_curve(
+            lot_sizes,
+            times,
+            float(data.get('setup_minutes', 0.0)),
+            rates,
+            material_cost=material_cost,
+            tool_cost=float(data.get('tool_cost', 0.0)),
+            misc_cost=float(data.get('misc_cost', 0.0)),
+            tool_curve=tool_curve
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in cost curve calculation: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Cost curve calculation error: {str(e)}'}), 500
+
+    return encoders.respond({
+        'status': 'success',
+        'data': {
+            'piece_times': {name: round(minutes, 4) for name, minutes in times.items()},
+            'cycle_minutes': round(curve['cycle_minutes'], 4),
+            'material_cost_per_piece': round(material_cost, 2),
+            **rates.to_dict(),
+            'lot_sizes': lot_sizes.astype(int),
+            'time_per_piece': np.round(curve['time_per_piece'], 4),
+            'time_total': np.round(curve['time_total'], 2),
+            'cost_per_piece': np.round(curve['cost_per_piece'], 2),
+            'cost_total': np.round(curve['cost_total'], 2),
+            'setup_cost_per_piece': np.round(curve['setup_cost_per_piece'], 2),
+            'overhead_total': np.round(curve['overhead_total'], 2),
+            'costs_per_piece': {
+                component: np.round(curve['costs'][component], 2) for component in cost_engine.COST_COMPONENTS
+            }
+        }
+    })
+
+@app.route('/api/cost', methods=['POST'])
+def part_cost():
+    """
+    Full cost breakdown for one part or a batch of parts
+
+    Material cost comes from the stock size and material_costs; labor, machine
+    and overhead rates from cost_rates unless overridden. Operation times for
+    the whole request are evaluated together with the vectorized kernels.
+
+    Expected JSON payload (one part):
+    {
+        'material_id': int,
+        'operations': [                      // or 'operation_name' and 'dimensions' for a single operation
+            {'operation_name': str, 'dimensions': {...}} or {'operation_name': str, 'time_minutes': float}
+        ],
+        'stock': {'diameter': float, 'length': float},   // optional, mm; derived from the operations otherwise
+        'quantity': int,                     // optional, setup is spread over it
+        'setup_minutes': float, 'tool_minutes': float, 'misc_minutes': float,
+        'tool_cost': float, 'misc_cost': float,
+        'material_rate_per_kg': float,       // optional, defaults to material_costs
+        'material_cost': float,              // optional, flat per piece instead of the stock-based cost
+        'labor_rate_per_hr': float,          // optional, defaults to cost_rates
+        'machine_rate_per_hr': float,        // optional, defaults to cost_rates
+        'overhead_factor': float             // optional, defaults to cost_rates
+    }
+    or a batch: {'parts': [<part>, ...], <rate overrides>}
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'Request body must be a JSON object.'}), 400
+        is_batch = 'parts' in data
+        if is_batch:
+            parts = data['parts']
+            if not isinstance(parts, list) or not parts:
+                return jsonify({'status': 'error', 'message': 'parts must be a non-empty list.'}), 400
+        elif data.get('operations'):
+            parts = [data]
+        elif data.get('operation_name'):
+            parts = [dict(data, operations=[{
+                'operation_name': data['operation_name'],
+                'dimensions': data.get('dimensions', {})
+            }])]
+        else:
+            return jsonify({'status': 'error', 'message': 'Missing required field: operations'}), 400
+
+        rates = get_cost_rates(data)
+
+        material_ids = {part.get('material_id') for part in parts}
+        operation_names = {
+            str(op['operation_name']).lower() for part in parts for op in part.get('operations') or []
+        }
+        load_parameters, price_operation = cost_callbacks(*load_parameter_store(material_ids, operation_names))
+        results = cost_engine.price_parts(parts, rates, load_parameters, price_operation)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in cost calculation: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Cost calculation error: {str(e)}'}), 500
+
+    if not is_batch:
+        if 'error' in results[0]:
+            return jsonify({'status': 'error', 'message': results[0]['error']}), 400
+        return encoders.respond({'status': 'success', 'data': dict(results[0], rates=rates.to_dict())})
+
+    return encoders.respond({
+        'status': 'success',
+        'data': {
+            'rates': rates.to_dict(),
+            'parts': results,
+            'failed': sum(1 for result in results if 'error' in result),
+            'total_cost': round(sum(result.get('lot_cost', 0.0) for result in results), 2)
+        }
+    })
+
+@app.route('/api/estimate', methods=['POST'])
+def estimate_times():
+    """
+    Time estimates for many operations of one kind on one material
+
+    All operations are calculated exactly in one vectorized pass of the batch
+    kernels, the same formulas /api/calculate uses.
+
+    Expected JSON payload:
+    {
+        'material_id': int,
+        'operation_name': 'turning' | 'facing' | 'drilling' | 'boring' | 'threading' | 'knurling' | 'grooving',
+        'dimensions': [{...}, ...]
+    }
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'Request body must be a JSON object.'}), 400
+        for field in ('material_id', 'operation_name', 'dimensions'):
+            if field not in data:
+                return jsonify({'status': 'error', 'message': f'Missing required field: {field}'}), 400
+        operation_name = str(data['operation_name']).lower()
+        if operation_name not in batch.KERNELS:
+            return jsonify({
+                'status': 'error',
+                'message': f"operation_name must be one of {', '.join(batch.KERNELS)}."
+            }), 400
+        if not isinstance(data['dimensions'], list) or not data['dimensions']:
+            return jsonify({'status': 'error', 'message': 'dimensions must be a non-empty list.'}), 400
+
+        errors = {}
+        records, positions = [], []
+        for index, raw in enumerate(data['dimensions']):
+            dimensions = normalize_dimensions(operation_name, raw if isinstance(raw, dict) else {})
+            problems = schemas.validate_dimensions(operation_name, raw if isinstance(raw, dict) else None)
+            if not problems and not batch.supports(operation_name, dimensions):
+                problems = [{'field': 'dimensions', 'message': 'Patterns and profiles are not estimated; use /api/calculate.'}]
+            if problems:
+                errors[index] = '; '.join(f"{p['field']}: {p['message']}" for p in problems)
+            else:
+                records.append(dimensions)
+                positions.append(index)
+
+        materials, rows = load_parameter_store([data['material_id']], {operation_name})
+        material = materials.get(data['material_id'])
+        if material is None:
+            return jsonify({'status': 'error', 'message': f"Material with ID {data['material_id']} not found in database."}), 404
+        params = rows.get((material.material_id, operation_name))
+        if not params:
+            return jsonify({
+                'status': 'error',
+                'message': f'No machining parameters found for {material.material_name} with {operation_name}.'
+            }), 400
+
+        count = len(data['dimensions'])
+        minutes = np.full(count, np.nan)
+        if records:
+            values, messages = batch.operation_minutes(
+                operation_name, params, material.machinability_rating or 0.5, records
+            )
+            minutes[positions] = values
+            for position, message in zip(positions, messages):
+                if message is not None:
+                    errors[position] = message
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in time estimate: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Estimate error: {str(e)}'}), 500
+
+    return encoders.respond({
+        'status': 'success',
+        'data': {
+            'material': material.material_name,
+            'operation': operation_name,
+            'minutes': [None if index in errors else round(float(value), 4) for index, value in enumerate(minutes)],
+            'calculated': count - len(errors),
+            'errors': [{'index': index, 'message': errors[index]} for index in sorted(errors)]
+        }
+    })
+
+@app.route('/api/compare-materials', methods=['POST'])
+def compare_materials():
+    """
+    Price one plan in every material (or a subset) and rank them by cost or time
+
+    Parameters for all materials and operations are read in one query and the
+    plan is evaluated for all materials in one vectorized pass. Operations a
+    material has no parameters for are listed in unavailable_operations.
+
+    Expected JSON payload:
+    {
+        'operations': [{'operation_name': str, 'dimensions': {...}} or {'operation_name': str, 'time_minutes': float}],
+        'material_ids': [int, ...],          // optional, defaults to all materials
+        'rank_by': 'cost' | 'time',          // default 'cost'
+        'stock', 'quantity', 'setup_minutes', 'tool_minutes', 'misc_minutes',
+        'tool_cost', 'misc_cost',            // optional, as for /api/cost
+        'labor_rate_per_hr', 'machine_rate_per_hr', 'overhead_factor'   // optional overrides
+    }
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict) or not data.get('operations'):
+            return jsonify({'status': 'error', 'message': 'Missing required field: operations'}), 400
+
+        if data.get('material_ids') is not None:
+            material_ids = [parse_id(m, 'material_ids') for m in data['material_ids']]
+        else:
+            material_ids = [m.material_id for m in Material.query.order_by(Material.material_id).all()]
+        operation_names = {str(op['operation_name']).lower() for op in data['operations']}
+        materials, rows = load_parameter_store(material_ids, operation_names)
+        unknown = [m for m in material_ids if m not in materials]
+        if unknown:
+            return jsonify({
+                'status': 'error',
+                'message': f"Materials not found in database: {', '.join(map(str, unknown))}."
+            }), 404
+
+        rates = get_cost_rates(data)
+
+        plan = {key: value for key, value in data.items() if key not in ('material_ids', 'rank_by', 'material_id')}
+        load_parameters, price_operation = cost_callbacks(materials, rows)
+        ranking = cost_engine.compare_materials(
+            plan,
+            [(m, materials[m].material_name) for m in dict.fromkeys(material_ids)],
+            rows.keys(),
+            rates,
+            load_parameters,
+            price_operation,
+            rank_by=data.get('rank_by', 'cost')
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error comparing materials: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Material comparison error: {str(e)}'}), 500
+
+    return encoders.respond({
+        'status': 'success',
+        'data': {
+            'rank_by': data.get('rank_by', 'cost'),
+            'rates': rates.to_dict(),
+            'materials': ranking
+        }
+    })
+
+@app.route('/api/select-machine', methods=['POST'])
+def select_machine():
+    """
+    Pick the cheapest or fastest eligible machine for every operation of a plan
+
+    Each operation is timed on every machine that can perform it, within that
+    machine's rpm and power limits, and costed at its hour rate. Operations of
+    the same kind are evaluated together in one vectorized pass per machine.
+
+    Expected JSON payload:
+    {
+        'material_id': int,
+        'operations': [{'operation_name': str, 'dimensions': {...}}],
+        'objective': 'cost' | 'time',        // default 'cost'
+        'machine_ids': [int, ...]            // optional, defaults to all machines
+    }
+    """
+    try:
+        data = request.get_json()
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'Request body must be a JSON object.'}), 400
+        for field in ('material_id', 'operations'):
+            if not data.get(field):
+                return jsonify({'status': 'error', 'message': f'Missing required field: {field}'}), 400
+        material_id = parse_id(data['material_id'], 'material_id')
+
+        operations = []
+        for index, op in enumerate(data['operations']):
+            operation_name = str(op['operation_name']).lower()
+            dimensions = normalize_dimensions(operation_name, op.get('dimensions') or {})
+            errors = schemas.validate_dimensions(operation_name, dimensions)
+            if errors:
+                return jsonify({
+                    'status': 'error',
+                    'message': f"Operation {index} ({operation_name}): " + '; '.join(e['message'] for e in errors),
+                    'field': 'dimensions',
+                    'errors': errors
+                }), 400
+            operations.append((operation_name, dimensions))
+
+        candidates = get_machine_catalogue()
+        if data.get('machine_ids') is not None:
+            machine_ids = [parse_id(m, 'machine_ids') for m in data['machine_ids']]
+            known = {m.machine_id for m in candidates}
+            unknown = [m for m in machine_ids if m not in known]
+            if unknown:
+                return jsonify({
+                    'status': 'error',
+                    'message': f"Machines not found in database: {', '.join(map(str, unknown))}."
+                }), 404
+            candidates = tuple(m for m in candidates if m.machine_id in machine_ids)
+
+        materials, rows = load_parameter_store([material_id], {name for name, _ in operations})
+        material = materials.get(material_id)
+        if material is None:
+            return jsonify({
+                'status': 'error',
+                'message': f'Material with ID {material_id} not found in database.'
+            }), 404
+
+        routing = machines.select(
+            operations, candidates, machine_evaluator(material, rows), objective=data.get('objective', 'cost')
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error selecting machines: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Machine selection error: {str(e)}'}), 500
+
+    return encoders.respond({
+        'status': 'success',
+        'data': dict(
+            routing,
+            material=material.material_name,
+            machines=[m.to_dict() for m in candidates]
+        )
+    })
+
+@app.route('/api/history/export', methods=['GET'])
+def export_history():
+    """
+    Stream the calculation history as Parquet or an Arrow IPC stream
+
+    Query parameters:
+        format: 'parquet' (default) or 'arrow'
+        since, until: ISO dates or datetimes (UTC unless given), since inclusive
+        material_id: int
+        operation: operation name
+    """
+    fmt = request.args.get('format', 'parquet').lower()
+    if fmt not in export.FORMATS:
+        return jsonify({
+            'status': 'error',
+            'message': f"format must be one of {', '.join(export.FORMATS)}."
+        }), 400
+    if export.pa is None:
+        return jsonify({'status': 'error', 'message': 'Columnar export needs pyarrow on the server.'}), 501
+    material_id = request.args.get('material_id') or None
+    try:
+        if material_id is not None:
+            try:
+                material_id = int(material_id)
+            except ValueError:
+                raise ValueError(f"material_id must be an integer, got '{material_id}'.")
+        sql, parameters = history.select_sql(
+            since=export.parse_time(request.args.get('since')),
+            until=export.parse_time(request.args.get('until')),
+            material_id=material_id,
+            operation=request.args.get('operation')
+        )
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    conn = history.get_store(app.config['MACHINING_HISTORY_PATH']).reader()
+
+    def generate():
+        try:
+            yield from export.stream(export.record_batches(conn.execute(sql, parameters)), fmt)
+        finally:
+            conn.close()
+
+    mimetype, extension = export.FORMATS[fmt]
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=calculations{extension}'}
+    )
+
+@app.route('/api/quote', methods=['POST'])
+def render_quote():
+    """
+    Render a quote document on the server, streamed page by page
+
+    Expected JSON payload:
+    {
+        'format': 'pdf' | 'html',            // default 'pdf'
+        'quote_type': 'customer' | 'shop',   // default 'customer'
+        'customer': str, 'project': str, 'order_id': str,
+        'material_id': int,                  // or 'material_name'
+        'operations': [                      // priced like /api/cost-curve operations
+            {'operation_name': str, 'dimensions': {...}, 'time_minutes': float, 'label': str}
+        ],
+        'quantity': int,                     // optional, setup is spread over it
+        'stock': {'diameter': float, 'length': float},   // optional, mm; as for /api/cost
+        'setup_minutes': float, 'tool_minutes': float, 'misc_minutes': float,
+        'material_cost': float,              // optional, per piece instead of the stock-based cost
+        'material_rate_per_kg': float,       // optional, defaults to material_costs
+        'tool_cost': float, 'misc_cost': float,
+        'labor_rate_per_hr': float,          // optional, defaults to cost_rates
+        'machine_rate_per_hr': float,        // optional, defaults to cost_rates
+        'overhead_factor': float             // optional, defaults to cost_rates
+    }
+
+    Costs are built like /api/cost, so the totals agree for the same plan.
+    """
+    try:
+        data = request.get_json()
+        if not data.get('operations'):
+            return jsonify({'status': 'error', 'message': 'Missing required field: operations'}), 400
+        output_format = data.get('format', 'pdf')
+        if output_format not in ('pdf', 'html'):
+            return jsonify({'status': 'error', 'message': "format must be 'pdf' or 'html'."}), 400
+
+        data = dict(data)
+        if not data.get('material_name') and data.get('material_id') is not None:
+            material = Material.query.get(data['material_id'])
+            if material:
+                data['material_name'] = material.material_name
+
+        quote = quote_renderer.build_quote(data, plan_operation_minutes(data), get_cost_rates(data))
+        # order_id is client text; keep only filename-safe characters for the header
+        filename = secure_filename(f"quote-{quote['order_id']}") or 'quote'
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error preparing quote: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Quote error: {str(e)}'}), 500
+
+    if output_format == 'html':
+        template = app.jinja_env.get_template('quote.html')
+        return Response(
+            stream_with_context(quote_renderer.render_html(template, quote)),
+            mimetype='text/html'
+        )
+    return Response(
+        quote_renderer.render_pdf(quote),
+        mimetype='application/pdf',
+        headers={'Content-Disposition': f'inline; filename="{filename}.pdf"'}
+    )
+
+# Upper bound on the local-search time a caller can request
+MAX_SCHEDULE_TIME_LIMIT = 30.0
+
+@app.route('/api/schedule', methods=['POST'])
+def schedule_jobs():
+    """
+    Schedule jobs across machines, minimising makespan or weighted tardiness
+
+    Expected JSON payload:
+    {
+        'machines': [{'machine_id': str, 'capabilities': [operation names], 'speed_factor': float}],
+        'jobs': [{
+            'job_id': str,
+            'material_id': int,
+            'quantity': int,        // optional, multiplies every operation time
+            'due_date': float,      // optional, minutes from schedule start
+            'operations': [{'operation_name': str, 'dimensions': {...}} or {'operation_name': str, 'time_minutes': float}]
+        }],
+        'objective': 'makespan' | 'tardiness',
+        'time_limit': float         // optional, seconds of local search
+    }
+    """
+    try:
+        data = request.get_json()
+        machines = scheduler.machines_from_dicts(data.get('machines', []))
+        plan_materials = [
+            op.get('material_id', job.get('material_id'))
+            for job in data.get('jobs', []) for op in job.get('operations', [])
+        ]
+        jobs = scheduler.jobs_from_dicts(data.get('jobs', []), make_operation_pricer(plan_materials))
+        job_shop = scheduler.JobShopScheduler(machines, jobs, objective=data.get('objective', 'makespan'))
+        time_limit = min(float(data.get('time_limit', scheduler.DEFAULT_TIME_LIMIT)), MAX_SCHEDULE_TIME_LIMIT)
+        schedule = job_shop.solve(time_limit=time_limit)
+    except KeyError as e:
+        return jsonify({'status': 'error', 'message': f'Missing required field: {e.args[0]}'}), 400
+    except (ValueError, TypeError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in scheduling: {str(e)}", exc_info=True)
+        return jsonify({'status': 'error', 'message': f'Scheduling error: {str(e)}'}), 500
+
+    return encoders.respond({'status': 'success', 'data': schedule.to_dict()})
+
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness check: 200 once the startup warm-up has finished, 503 until then"""
+    state = warmup_state.to_dict()
+    if warmup_state.ready:
+        return jsonify({'status': 'ready', 'warmup': state})
+    response = jsonify({'status': warmup_state.status, 'warmup': state})
+    response.status_code = 503
+    response.headers['Retry-After'] = '1'
+    return response
+
+
+def warmup_steps():
+    """
+    The steps warmup.run goes through before readiness, each in an app context.
+    """
+    settings = warmup.get_settings()
+    loaded = {}
+
+    def in_app_context(step):
+        def run(state):
+            with app.app_context():
+                return step(state)
+        return run
+
+    def connections(state):
+        configure_mappers()
+        size = db.engine.pool.size() if hasattr(db.engine.pool, 'size') else 1
+        opened = [db.engine.connect() for _ in range(max(1, size))]
+        for conn in opened:
+            conn.close()
+        return {'connections': len(opened)}
+
+    def reference(state):
+        conn = db.engine.raw_connection()
+        try:
+            ensure_version_tracking(conn)
+            reference_data.get_bootstrap(conn)
+            cost_engine.get_rates(conn)
+            machine_count = len(machines.get_machines(conn))
+        finally:
+            conn.close()
+        material_ids = [m.material_id for m in Material.query.all()]
+        operation_names = {op.operation_name.lower() for op in Operation.query.all()}
+        loaded['materials'], loaded['rows'] = load_parameter_store(material_ids, operation_names)
+        return {
+            'materials': len(loaded['materials']),
+            'parameter_sets': len(loaded['rows']),
+            'machines': machine_count
+        }
+
+    def operations(state):
+        materials, rows = loaded['materials'], loaded['rows']
+        samples = 0
+        for operation_name in OPERATION_CLASSES:
+            get_operation_class(operation_name)
+            material_id = next((m for m, name in rows if name == operation_name), None)
+            if material_id is None:
+                state.warnings.append(f'No machining parameters to warm up {operation_name}.')
+                continue
+            params = rows[(material_id, operation_name)]
+            rating = materials[material_id].machinability_rating or 0.5
+            for sample in warmup.SAMPLE_DIMENSIONS.get(operation_name, []):
+                dimensions = normalize_dimensions(operation_name, sample)
+                try:
+                    result = run_operation(operation_name, params, rating, dimensions)
+                    if result.error is not None:
+                        raise ValueError(result.error.splitlines()[0])
+                    result.to_dict()
+                    if batch.supports(operation_name, dimensions):
+                        batch.operation_minutes(operation_name, params, rating, [dimensions])
+                except Exception as e:
+                    state.warnings.append(f'{operation_name}: {str(e)}')
+                    continue
+                samples += 1
+        return {'operation_classes': len(OPERATION_CLASSES), 'samples': samples}
+
+    def frequent(state):
+        if calculation_cache is None:
+            return {'frequent_inputs': 0, 'cached': 0}
+        inputs = warmup.frequent_inputs(
+            app.config['MACHINING_HISTORY_PATH'], settings['window_days'], settings['top_inputs']
+        )
+        cached = 0
+        for data in inputs:
+            operation_name = data['operation_name']
+            dimensions = normalize_dimensions(operation_name, data['dimensions'])
+            if schemas.validate_dimensions(operation_name, dimensions):
+                continue
+            try:
+                _, error = calculate_result(data, operation_name, dimensions)
+            except Exception as e:
+                state.warnings.append(f'{operation_name}: {str(e)}')
+                continue
+            if error is None:
+                cached += 1
+        return {'frequent_inputs': len(inputs), 'cached': cached}
+
+    return [
+        (name, in_app_context(step))
+        for name, step in (
+            ('connections', connections),
+            ('reference', reference),
+            ('operations', operations),
+            ('frequent', frequent)
+        )
+    ]
+
+
 # Frontend Routes
 @app.route('/')
 def index():
@@ -299,8 +1752,12 @@ def lathe():
 def milling():
     return render_template('milling.html')
 
+# Warm-up before /api/ready reports ready (MACHINING_WARMUP=background, sync or off)
+warmup_state = warmup.start(warmup_steps())
+
 if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-        logger.info("Database tables created/verified")
+    if app.config['MACHINING_DB_SETTINGS']['mode'] != 'snapshot':
+        with app.app_context():
+            db.create_all()
+            logger.info("Database tables created/verified")
     app.run(debug=True)
@@ -0,0 +1,111 @@
+# Which materials can be calculated with which operations.
+#
+# A (material, operation) pair is available when MachiningParameters has rows
+# for it. The index is built from the bootstrap payload's availability matrix,
+# so it is rebuilt together with that payload whenever the catalogue version
+# moves and never queried per request. Each operation keeps a bitmap over the
+# materials (bit i for the i-th material by material_id) and each material one
+# over the operations; the lists and suggestion names derived from them are
+# computed once per build, so every lookup is a dict access and a bit test.
+
+
+def _bits(flags):
+    mask = 0
+    for position, flag in enumerate(flags):
+        if flag:
+            mask |= 1 << position
+    return mask
+
+
+def _positions(mask):
+    positions = []
+    while mask:
+        low = mask & -mask
+        positions.append(low.bit_length() - 1)
+        mask ^= low
+    return positions
+
+
+def _as_id(value):
+    """value as an integer ID, or None unless it is an integer, an integral finite float or an integer string."""
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class AvailabilityIndex:
+    """Material x operation availability for one catalogue version."""
+
+    __slots__ = ('version', 'etag', 'material_ids', 'operation_ids', 'material_names', 'operation_names',
+                 '_material_positions', '_operation_positions', '_by_material', '_by_operation',
+                 '_materials_for', '_operations_for', '_suggestions')
+
+    def __init__(self, payload, version=None, etag=None):
+        """
+        Args:
+            payload (dict): reference_data.build_payload result
+            version (int): Catalogue version the payload was built from
+            etag (str): Bootstrap ETag of the payload, identifying the catalogue
+                across databases that happen to share a version number
+        """
+        self.version = version
+        self.etag = etag
+        self.material_ids = tuple(m['material_id'] for m in payload['materials'])
+        self.operation_ids = tuple(op['operation_id'] for op in payload['operations'])
+        self.material_names = {m['material_id']: m['material_name'] for m in payload['materials']}
+        self.operation_names = {op['operation_id']: op['operation_name'] for op in payload['operations']}
+        self._material_positions = {material_id: i for i, material_id in enumerate(self.material_ids)}
+        self._operation_positions = {operation_id: j for j, operation_id in enumerate(self.operation_ids)}
+
+        matrix = payload['availability']['matrix']
+        self._by_material = [_bits(row) for row in matrix]
+        self._by_operation = [
+            _bits(row[j] for row in matrix) for j in range(len(self.operation_ids))
+        ]
+        self._materials_for = {
+            operation_id: tuple(self.material_ids[i] for i in _positions(self._by_operation[j]))
+            for j, operation_id in enumerate(self.operation_ids)
+        }
+        self._operations_for = {
+            material_id: tuple(self.operation_ids[j] for j in _positions(self._by_material[i]))
+            for i, material_id in enumerate(self.material_ids)
+        }
+        self._suggestions = {
+            operation_id: tuple(self.material_names[material_id] for material_id in material_ids)
+            for operation_id, material_ids in self._materials_for.items()
+        }
+
+    def has_material(self, material_id):
+        return _as_id(material_id) in self._material_positions
+
+    def has_operation(self, operation_id):
+        return _as_id(operation_id) in self._operation_positions
+
+    def available(self, material_id, operation_id):
+        """Whether the pair has machining parameters; False for unknown IDs."""
+        i = self._material_positions.get(_as_id(material_id))
+        j = self._operation_positions.get(_as_id(operation_id))
+        if i is None or j is None:
+            return False
+        return bool(self._by_operation[j] >> i & 1)
+
+    def materials_for(self, operation_id):
+        """IDs of the materials with parameters for the operation, by material_id."""
+        return self._materials_for.get(_as_id(operation_id), ())
+
+    def operations_for(self, material_id):
+        """IDs of the operations with parameters for the material, by operation_id."""
+        return self._operations_for.get(_as_id(material_id), ())
+
+    def suggestions(self, operation_id):
+        """Names of the materials with parameters for the operation, by material_id."""
+        return self._suggestions.get(_as_id(operation_id), ())
+
+    def to_dict(self):
+        return {
+            'operations': {str(operation_id): list(ids) for operation_id, ids in self._materials_for.items()},
+            'materials': {str(material_id): list(ids) for material_id, ids in self._operations_for.items()},
+        }
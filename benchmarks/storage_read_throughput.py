@@ -0,0 +1,117 @@
+"""
+Read throughput of the calculator's lookups under each storage mode.
+
+Reader processes repeat the queries /api/calculate issues (material,
+operation, machining parameters) while a writer process keeps updating
+MachiningParameters, as a catalogue import would. Each mode runs on its own
+copy of the database:
+
+    default   rollback journal; readers wait while the writer holds its lock
+    wal       write-ahead log with mmap/cache tuning; readers never wait
+    snapshot  readers use an immutable published copy; the writer updates the live file
+
+Usage:
+    python benchmarks/storage_read_throughput.py [--db instance/machining.db] [--seconds 5] [--readers 4]
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+
+READ_QUERIES = (
+    ('SELECT * FROM Materials WHERE material_id = ?', lambda i: (i % 5 + 1,)),
+    ('SELECT * FROM Operations WHERE operation_id = ?', lambda i: (i % 9 + 1,)),
+    ('SELECT * FROM MachiningParameters WHERE material_id = ? AND operation_id = ?', lambda i: (i % 5 + 1, i % 9 + 1)),
+)
+
+
+def open_reader(mode, path, settings):
+    if mode == 'snapshot':
+        return storage.connect_snapshot(storage.current_snapshot(path), settings)
+    conn = sqlite3.connect(path, timeout=30)
+    if mode == 'wal':
+        for pragma in storage.read_pragmas(settings):
+            conn.execute(pragma)
+    return conn
+
+
+def reader(mode, path, settings, seconds, results):
+    conn = open_reader(mode, path, settings)
+    reads = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for sql, args in READ_QUERIES:
+            conn.execute(sql, args(reads)).fetchall()
+        reads += 1
+    conn.close()
+    results.put(reads)
+
+
+def writer(path, seconds, stop_after):
+    conn = sqlite3.connect(path, timeout=30)
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline and not stop_after.is_set():
+        conn.execute('UPDATE MachiningParameters SET spindle_speed_max = spindle_speed_max + 0')
+        conn.commit()
+    conn.close()
+
+
+def run_mode(mode, source_db, workdir, seconds, readers):
+    settings = storage.get_settings()
+    live = os.path.join(workdir, f'{mode}.db')
+    shutil.copyfile(source_db, live)
+
+    conn = sqlite3.connect(live)
+    conn.execute(f"PRAGMA journal_mode = {'WAL' if mode == 'wal' else 'DELETE'}")
+    conn.close()
+
+    read_path = live
+    if mode == 'snapshot':
+        read_path = os.path.join(workdir, 'snapshots')
+        storage.publish_snapshot(live, read_path)
+
+    results = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    processes = [
+        multiprocessing.Process(target=reader, args=(mode, read_path, settings, seconds, results))
+        for _ in range(readers)
+    ]
+    processes.append(multiprocessing.Process(target=writer, args=(live, seconds, stop)))
+    for process in processes:
+        process.start()
+    total_reads = sum(results.get() for _ in range(readers))
+    stop.set()
+    for process in processes:
+        process.join()
+    return total_reads / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db', default=os.path.join('instance', storage.DB_FILENAME))
+    parser.add_argument('--seconds', type=float, default=5.0)
+    parser.add_argument('--readers', type=int, default=4)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='storage-bench-')
+    try:
+        print(f"{args.readers} readers, 1 writer, {args.seconds:.0f}s per mode")
+        baseline = None
+        for mode in storage.STORAGE_MODES:
+            rate = run_mode(mode, args.db, workdir, args.seconds, args.readers)
+            baseline = baseline or rate
+            print(f"  {mode:<9} {rate:>12,.0f} lookups/s  ({rate / baseline:.1f}x)")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
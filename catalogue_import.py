@@ -0,0 +1,387 @@
+import argparse
+import csv
+import math
+import os
+import sqlite3
+from dataclasses import dataclass, field
+
+# Columns of MachiningParameters that come from vendor catalogues, in table order
+PARAMETER_COLUMNS = (
+    'spindle_speed_min', 'spindle_speed_max',
+    'feed_rate_min', 'feed_rate_max',
+    'depth_of_cut_min', 'depth_of_cut_max',
+)
+
+# (min, max) column pairs that must satisfy min <= max
+RANGE_PAIRS = (
+    ('spindle_speed_min', 'spindle_speed_max'),
+    ('feed_rate_min', 'feed_rate_max'),
+    ('depth_of_cut_min', 'depth_of_cut_max'),
+)
+
+# Columns stored as INTEGER; values are truncated before they are checked
+INTEGER_COLUMNS = ('spindle_speed_min', 'spindle_speed_max')
+
+# Columns that must be strictly positive; depth_of_cut_min may be zero
+POSITIVE_COLUMNS = (
+    'spindle_speed_min', 'spindle_speed_max',
+    'feed_rate_min', 'feed_rate_max',
+    'depth_of_cut_max',
+)
+
+# A (material, operation, cut type) triple identifies one parameter row
+UNIQUE_KEY_INDEX = 'idx_machining_params'
+
+DEFAULT_BATCH_SIZE = 50000
+
+# Rejected rows kept in memory for the report; the rejects file gets all of them
+MAX_REPORTED_REJECTS = 1000
+
+STAGING_SCHEMA = '''
+    CREATE TEMP TABLE IF NOT EXISTS parameter_staging (
+        material_id INTEGER,
+        operation_id INTEGER,
+        spindle_speed_min INTEGER,
+        spindle_speed_max INTEGER,
+        feed_rate_min FLOAT,
+        feed_rate_max FLOAT,
+        depth_of_cut_min FLOAT,
+        depth_of_cut_max FLOAT,
+        notes TEXT
+    )
+'''
+
+_COLUMN_LIST = 'material_id, operation_id, ' + ', '.join(PARAMETER_COLUMNS) + ', notes'
+
+INITIAL_LOAD_SQL = f'''
+    INSERT INTO MachiningParameters ({_COLUMN_LIST})
+    SELECT {_COLUMN_LIST} FROM parameter_staging
+    WHERE rowid IN (
+        SELECT max(rowid) FROM parameter_staging
+        GROUP BY material_id, operation_id, notes
+    )
+'''
+
+UPSERT_SQL = f'''
+    INSERT INTO MachiningParameters ({_COLUMN_LIST})
+    SELECT {_COLUMN_LIST} FROM parameter_staging WHERE true
+    ORDER BY rowid
+    ON CONFLICT (material_id, operation_id, notes) DO UPDATE SET
+        {', '.join(f'{column} = excluded.{column}' for column in PARAMETER_COLUMNS)}
+'''
+
+
+@dataclass
+class ImportReport:
+    """Outcome of a catalogue import."""
+    rows_read: int = 0
+    rows_accepted: int = 0
+    rows_rejected: int = 0
+    initial_load: bool = False
+    rejects: list = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            'rows_read': self.rows_read,
+            'rows_accepted': self.rows_accepted,
+            'rows_rejected': self.rows_rejected,
+            'initial_load': self.initial_load,
+            'rejects': self.rejects
+        }
+
+
+def read_rows(path, sheet=None):
+    """
+    Stream catalogue rows from a CSV or Excel file.
+
+    Args:
+        path (str): Path to a .csv, .xlsx or .xlsm file with a header row
+        sheet (str, optional): Worksheet name for Excel files (default: first sheet)
+
+    Yields:
+        tuple: (line_number, row) where row maps lowercase header names to values
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        yield from _read_excel_rows(path, sheet)
+        return
+
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        header = [name.strip().lower() for name in next(reader, [])]
+        for line_number, values in enumerate(reader, start=2):
+            if values:
+                yield line_number, dict(zip(header, values))
+
+
+def _read_excel_rows(path, sheet=None):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:
+        raise ValueError("Reading Excel catalogues requires openpyxl (pip install openpyxl).") from e
+
+    # read_only mode streams rows instead of loading the whole sheet
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        worksheet = workbook[sheet] if sheet else workbook.worksheets[0]
+        rows = worksheet.iter_rows(values_only=True)
+        header = [str(name or '').strip().lower() for name in next(rows, ())]
+        for line_number, values in enumerate(rows, start=2):
+            if any(value is not None for value in values):
+                yield line_number, dict(zip(header, values))
+    finally:
+        workbook.close()
+
+
+def load_lookups(conn):
+    """
+    Load material and operation ids so rows can reference them by id or by name.
+
+    Returns:
+        tuple: (materials, operations) dicts mapping lowercase names and ids to ids
+    """
+    lookups = []
+    for table, id_column, name_column in (
+        ('Materials', 'material_id', 'material_name'),
+        ('Operations', 'operation_id', 'operation_name')
+    ):
+        mapping = {}
+        for row_id, name in conn.execute(f'SELECT {id_column}, {name_column} FROM {table}'):
+            mapping[str(row_id)] = row_id
+            mapping[name.strip().lower()] = row_id
+        lookups.append(mapping)
+    return tuple(lookups)
+
+
+def _resolve(row, keys, mapping, label):
+    for key in keys:
+        value = row.get(key)
+        if value is None:
+            continue
+        # Most rows carry an exact id or name; only normalise on a miss
+        if value in mapping:
+            return mapping[value]
+        normalised = str(value).strip().lower()
+        if normalised == '':
+            continue
+        # Excel hands back integer ids as floats
+        if normalised.endswith('.0'):
+            normalised = normalised[:-2]
+        if normalised not in mapping:
+            raise ValueError(f"Unknown {label} '{value}'")
+        return mapping[normalised]
+    raise ValueError(f"Missing {label} (expected one of: {', '.join(keys)})")
+
+
+def _describe_invalid_values(row):
+    """Explain why the parameter columns of a row failed the fast checks."""
+    values = {}
+    for column in PARAMETER_COLUMNS:
+        raw = row.get(column)
+        if raw is None or str(raw).strip() == '':
+            return f"Missing {column}"
+        try:
+            values[column] = float(raw)
+        except (TypeError, ValueError):
+            return f"{column} must be a number, got '{raw}'"
+        if not math.isfinite(values[column]):
+            return f"{column} must be a finite number, got '{raw}'"
+        if column in INTEGER_COLUMNS:
+            values[column] = int(values[column])
+
+    for column in POSITIVE_COLUMNS:
+        if values[column] <= 0:
+            return f"{column} must be positive, got {values[column]}"
+    if values['depth_of_cut_min'] < 0:
+        return f"depth_of_cut_min must not be negative, got {values['depth_of_cut_min']}"
+
+    for low, high in RANGE_PAIRS:
+        if values[low] > values[high]:
+            return f"{low} ({values[low]}) is greater than {high} ({values[high]})"
+    return "Invalid parameter values"
+
+
+def validate_row(row, materials, operations):
+    """
+    Validate one catalogue row and convert it to a staging tuple.
+
+    Args:
+        row (dict): Row keyed by lowercase column name
+        materials (dict): Material lookup from load_lookups
+        operations (dict): Operation lookup from load_lookups
+
+    Returns:
+        tuple: Values in staging column order
+
+    Raises:
+        ValueError: With the reason the row is rejected
+    """
+    material_id = _resolve(row, ('material_id', 'material', 'material_name'), materials, 'material')
+    operation_id = _resolve(row, ('operation_id', 'operation', 'operation_name'), operations, 'operation')
+
+    # Fast path: convert and range-check all columns at once; the slow path
+    # only runs for rejected rows to work out which check failed. Speeds are
+    # truncated to the stored integers first, so 0.4 rpm is rejected rather
+    # than stored as 0; inf and nan fail int() and every range check.
+    try:
+        speed_min = int(float(row['spindle_speed_min']))
+        speed_max = int(float(row['spindle_speed_max']))
+        feed_min = float(row['feed_rate_min'])
+        feed_max = float(row['feed_rate_max'])
+        doc_min = float(row['depth_of_cut_min'])
+        doc_max = float(row['depth_of_cut_max'])
+    except (KeyError, TypeError, ValueError, OverflowError):
+        raise ValueError(_describe_invalid_values(row))
+    if not (math.isfinite(feed_max) and math.isfinite(doc_max)):
+        raise ValueError(_describe_invalid_values(row))
+    if not (0 < speed_min <= speed_max and 0 < feed_min <= feed_max and 0 <= doc_min <= doc_max and doc_max > 0):
+        raise ValueError(_describe_invalid_values(row))
+
+    notes = str(row.get('notes') or row.get('cut_type') or '').strip()
+    if not notes:
+        raise ValueError("Missing notes/cut_type (e.g. 'Rough cut' or 'Finish cut')")
+
+    return (
+        material_id,
+        operation_id,
+        speed_min,
+        speed_max,
+        feed_min,
+        feed_max,
+        doc_min,
+        doc_max,
+        notes
+    )
+
+
+def ensure_unique_key(conn):
+    """
+    Make sure (material_id, operation_id, notes) is backed by a unique index.
+
+    Databases created before the importer existed have a plain index there;
+    duplicates are collapsed (keeping the newest row) before it is rebuilt.
+    """
+    for _, name, unique, *_ in conn.execute('PRAGMA index_list(MachiningParameters)'):
+        if name == UNIQUE_KEY_INDEX and unique:
+            return
+    conn.execute('''
+        DELETE FROM MachiningParameters WHERE param_id NOT IN (
+            SELECT max(param_id) FROM MachiningParameters
+            GROUP BY material_id, operation_id, notes
+        )
+    ''')
+    conn.execute(f'DROP INDEX IF EXISTS {UNIQUE_KEY_INDEX}')
+    conn.execute(f'''
+        CREATE UNIQUE INDEX {UNIQUE_KEY_INDEX}
+        ON MachiningParameters(material_id, operation_id, notes)
+    ''')
+
+
+def import_catalogue(conn, rows, batch_size=DEFAULT_BATCH_SIZE, rejects_file=None):
+    """
+    Stream validated catalogue rows into MachiningParameters.
+
+    Rows are validated one at a time and written to an unindexed temporary
+    staging table with executemany in batches, then merged into
+    MachiningParameters in a single statement. Into an empty table the merge is
+    a plain insert and the unique index is built once afterwards; otherwise
+    existing (material, operation, cut type) rows are upserted. The whole load
+    is one transaction, so a failed import leaves the catalogue untouched.
+
+    Args:
+        conn (sqlite3.Connection): Connection to the machining database
+        rows (iterable): (line_number, row dict) pairs, e.g. from read_rows
+        batch_size (int): Rows per executemany call
+        rejects_file (file, optional): Text file that receives every rejected row as CSV
+
+    Returns:
+        ImportReport: Counts and the first MAX_REPORTED_REJECTS rejected rows
+    """
+    report = ImportReport()
+    materials, operations = load_lookups(conn)
+    rejects_writer = csv.writer(rejects_file) if rejects_file else None
+    if rejects_writer:
+        rejects_writer.writerow(['line', 'reason', 'row'])
+
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute(STAGING_SCHEMA)
+    insert_staging = f'INSERT INTO parameter_staging VALUES ({", ".join("?" * 9)})'
+
+    try:
+        if not conn.in_transaction:
+            conn.execute('BEGIN')
+        conn.execute('DELETE FROM parameter_staging')
+        batch = []
+        for line_number, row in rows:
+            report.rows_read += 1
+            try:
+                batch.append(validate_row(row, materials, operations))
+            except ValueError as e:
+                report.rows_rejected += 1
+                if len(report.rejects) < MAX_REPORTED_REJECTS:
+                    report.rejects.append({'line': line_number, 'reason': str(e)})
+                if rejects_writer:
+                    rejects_writer.writerow([line_number, str(e), row])
+                continue
+            if len(batch) >= batch_size:
+                conn.executemany(insert_staging, batch)
+                batch.clear()
+        if batch:
+            conn.executemany(insert_staging, batch)
+
+        report.initial_load = conn.execute('SELECT 1 FROM MachiningParameters LIMIT 1').fetchone() is None
+        if report.initial_load:
+            # Build the index once over the loaded data instead of maintaining it per row
+            conn.execute(f'DROP INDEX IF EXISTS {UNIQUE_KEY_INDEX}')
+            conn.execute(INITIAL_LOAD_SQL)
+            conn.execute(f'''
+                CREATE UNIQUE INDEX {UNIQUE_KEY_INDEX}
+                ON MachiningParameters(material_id, operation_id, notes)
+            ''')
+        else:
+            ensure_unique_key(conn)
+            conn.execute(UPSERT_SQL)
+        report.rows_accepted = report.rows_read - report.rows_rejected
+
+        conn.execute('DELETE FROM parameter_staging')
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Import a machining-parameter catalogue (CSV or Excel).')
+    parser.add_argument('path', help='Catalogue file (.csv, .xlsx or .xlsm)')
+    parser.add_argument('--db', default=os.path.join('instance', 'machining.db'), help='SQLite database to update')
+    parser.add_argument('--sheet', help='Worksheet name for Excel files')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Rows per executemany batch')
+    parser.add_argument('--rejects', help='Write rejected rows to this CSV file')
+    args = parser.parse_args()
+
+    # isolation_level=None: transactions are managed explicitly by the importer
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    rejects_file = open(args.rejects, 'w', newline='', encoding='utf-8') if args.rejects else None
+    try:
+        report = import_catalogue(
+            conn,
+            read_rows(args.path, sheet=args.sheet),
+            batch_size=args.batch_size,
+            rejects_file=rejects_file
+        )
+    finally:
+        if rejects_file:
+            rejects_file.close()
+        conn.close()
+
+    print(f"Read {report.rows_read} rows: {report.rows_accepted} imported, {report.rows_rejected} rejected.")
+    for reject in report.rejects[:20]:
+        print(f"  line {reject['line']}: {reject['reason']}")
+    if report.rows_rejected > 20:
+        print(f"  ... {report.rows_rejected - 20} more" + (f" (see {args.rejects})" if args.rejects else ''))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,497 @@
+import math
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+
+import query_stats
+import reference_data
+import schemas
+from models import batch
+from models.dimensions import normalize
+
+# Server-side part costing.
+#
+# A part is a material, an operation plan and an optional stock size. Its cost
+# follows the static/cost.js breakdown with two additions the browser cannot
+# know: the material cost comes from the stock mass (volume x density from
+# material_costs) times the material's rate per kg, and machining time is
+# charged at the machine rate as well as the labor rate:
+#
+#   material  = stock mass * rate_per_kg
+#   setup/idle, machining and tool time at labor_rate_per_hr
+#   machine   = machining time * machine_rate_per_hr
+#   total     = (material + labor + machine + tool + misc cost) * overhead_factor
+#
+# Setup is paid once per lot and spread over quantity. A flat material_cost per
+# piece, when given, replaces the stock-based figure. cost_components is the one
+# place these formulas live; /api/cost-curve (lot_costing) and /api/quote
+# (quote_renderer) charge through it too, so the three agree for the same plan,
+# rates and lot size. Operation times for all
+# parts are evaluated together: operations are grouped by (material,
+# operation) and each group runs once through the numpy kernels in
+# models.batch, so pricing a batch of parts costs about the same as pricing
+# one. Rates come from cost_rates and material_costs, cached until the
+# catalogue version (see reference_data) moves.
+
+# Rate charged for machining time when cost_rates has no machine rate column
+# (databases created before it was added); the rate the operation classes use
+DEFAULT_MACHINE_RATE_PER_HR = 150.0
+DEFAULT_OVERHEAD_FACTOR = 1.4
+
+# Dimensions that bound the stock, per operation: (outer diameter, length)
+STOCK_DIMENSIONS = {
+    'turning': ('initial_diameter', 'length'),
+    'facing': ('diameter', None),
+    'knurling': ('diameter', 'length'),
+    'threading': ('diameter', 'length'),
+    'parting': ('diameter', None),
+    'drilling': (None, 'depth'),
+    'boring': (None, 'depth'),
+    'reaming': (None, 'depth'),
+}
+
+COST_COMPONENTS = ('material', 'setup_idle', 'machining', 'machine', 'tooling', 'misc')
+
+
+@dataclass(frozen=True)
+class Rates:
+    """
+    Cost rates for one catalogue version.
+
+    Attributes:
+        version: Catalogue version the rates were read at (None if untracked)
+        labor_rate_per_hr: Labor rate (INR/hour)
+        machine_rate_per_hr: Machine rate charged on machining time (INR/hour)
+        overhead_factor: Multiplier on the raw cost (1.4 = 40% overhead)
+        materials: material_id -> (rate_per_kg, density_kg_mm3)
+    """
+    version: object
+    labor_rate_per_hr: float
+    machine_rate_per_hr: float
+    overhead_factor: float
+    materials: Dict[int, Tuple[float, float]] = field(default_factory=dict)
+
+    def with_overrides(self, data):
+        """Copy with labor_rate_per_hr, machine_rate_per_hr or overhead_factor taken from data when given."""
+        return Rates(
+            self.version,
+            float(data.get('labor_rate_per_hr', self.labor_rate_per_hr)),
+            float(data.get('machine_rate_per_hr', self.machine_rate_per_hr)),
+            float(data.get('overhead_factor', self.overhead_factor)),
+            self.materials
+        )
+
+    def to_dict(self):
+        return {
+            'labor_rate_per_hr': self.labor_rate_per_hr,
+            'machine_rate_per_hr': self.machine_rate_per_hr,
+            'overhead_factor': self.overhead_factor
+        }
+
+
+_lock = threading.Lock()
+_cached = None
+
+
+def load_rates(conn, version=None):
+    """
+    Read cost_rates (row 1) and material_costs.
+
+    Args:
+        conn: DB-API connection to the SQLite database
+        version: Catalogue version to record on the result
+
+    Returns:
+        Rates
+    """
+    cursor = conn.cursor()
+    cursor.execute('SELECT * FROM cost_rates WHERE id = 1')
+    row = cursor.fetchone()
+    columns = [description[0] for description in cursor.description]
+    rates = dict(zip(columns, row)) if row else {}
+    cursor.execute('SELECT material_id, rate_per_kg, density_kg_mm3 FROM material_costs')
+    materials = {material_id: (float(rate), float(density)) for material_id, rate, density in cursor.fetchall()}
+    cursor.close()
+
+    machine_rate = rates.get('machine_rate_per_hr')
+    return Rates(
+        version,
+        float(rates.get('labor_rate_per_hr') or 0.0),
+        float(DEFAULT_MACHINE_RATE_PER_HR if machine_rate is None else machine_rate),
+        float(rates.get('overhead_factor') or DEFAULT_OVERHEAD_FACTOR),
+        materials
+    )
+
+
+def get_rates(conn):
+    """
+    Cached Rates for the current catalogue version; reloaded when it changes.
+    """
+    global _cached
+    version = reference_data.current_version(conn)
+    cached = _cached
+    if cached is not None and cached.version == version:
+        return cached
+
+    with _lock:
+        if _cached is None or _cached.version != version:
+            with query_stats.reloading():
+                _cached = load_rates(conn, version)
+        return _cached
+
+
+def stock_mass_kg(diameter, length, density_kg_mm3):
+    """Mass of round bar stock; works on scalars and numpy arrays (mm, kg/mm^3)."""
+    return math.pi / 4.0 * np.square(diameter) * length * density_kg_mm3
+
+
+def _profile_length(profile):
+    """Total length of a stepped-shaft profile, or None if it is malformed."""
+    try:
+        return float(sum(seg['length'] if isinstance(seg, dict) else seg[1] for seg in profile))
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def stock_size(operations, stock=None):
+    """
+    Stock diameter and length for a part.
+
+    An explicit stock {'diameter', 'length'} wins. Otherwise the largest outer
+    diameter and length the operations touch are used, plus the facing depth
+    of cut as length allowance.
+
+    Args:
+        operations (list): (operation_name, Dimensions) pairs
+        stock (dict, optional): Explicit stock size in mm
+
+    Returns:
+        tuple: (diameter, length) in mm; either may be None if unknown
+    """
+    stock = stock or {}
+    diameter = length = None
+    allowance = 0.0
+    for operation_name, dimensions in operations:
+        diameter_key, length_key = STOCK_DIMENSIONS.get(operation_name, (None, None))
+        value = dimensions.get(diameter_key) if diameter_key else None
+        if isinstance(value, (int, float)) and (diameter is None or value > diameter):
+            diameter = float(value)
+        value = dimensions.get(length_key) if length_key else None
+        if operation_name == 'turning' and dimensions.get('profile') is not None:
+            value = _profile_length(dimensions['profile'])
+        if isinstance(value, (int, float)) and (length is None or value > length):
+            length = float(value)
+        if operation_name == 'facing' and isinstance(dimensions.get('depth_of_cut'), (int, float)):
+            allowance += dimensions['depth_of_cut']
+
+    if length is not None:
+        length += allowance
+    if stock.get('diameter') is not None:
+        diameter = float(stock['diameter'])
+    if stock.get('length') is not None:
+        length = float(stock['length'])
+    return diameter, length
+
+
+def cost_components(rates, machining, idle=0.0, setup_per_piece=0.0, tool_minutes=0.0, misc_minutes=0.0,
+                    material=0.0, tool_cost=0.0, misc_cost=0.0):
+    """
+    Cost per piece for each of COST_COMPONENTS, before overhead.
+
+    Every argument after rates may be a scalar or a numpy array (one value
+    per part or per lot size); the results broadcast the same way.
+
+    Args:
+        rates (Rates): Rates to apply
+        machining (float): Machining minutes per piece
+        idle (float): Idle minutes per piece
+        setup_per_piece (float): Setup minutes spread over the lot
+        tool_minutes, misc_minutes (float): Tool handling and miscellaneous minutes per piece
+        material (float): Material cost per piece
+        tool_cost, misc_cost (float): Flat costs per piece
+
+    Returns:
+        dict: Cost keyed by component
+    """
+    labor_per_min = rates.labor_rate_per_hr / 60.0
+    return {
+        'material': material,
+        'setup_idle': (setup_per_piece + idle) * labor_per_min,
+        'machining': machining * labor_per_min,
+        'machine': machining * rates.machine_rate_per_hr / 60.0,
+        'tooling': tool_cost + tool_minutes * labor_per_min,
+        'misc': misc_cost + misc_minutes * labor_per_min,
+    }
+
+
+def material_cost(part, rates):
+    """
+    Material cost per piece of one part, as price_parts works it out.
+
+    Args:
+        part (dict): material_id and operations, optionally stock,
+            material_rate_per_kg or a flat material_cost
+        rates (Rates): Rates to apply
+
+    Returns:
+        float: Cost per piece; 0 when the stock size or cost data is unknown
+    """
+    if part.get('material_cost') is not None:
+        return float(part['material_cost'])
+    operations = [
+        (name, normalize(name, op.get('dimensions') or {}))
+        for name, op in ((str(op['operation_name']).lower(), op) for op in part.get('operations') or [])
+    ]
+    diameter, length = stock_size(operations, part.get('stock'))
+    rate_per_kg, density = rates.materials.get(part.get('material_id'), (0.0, 0.0))
+    if part.get('material_rate_per_kg') is not None:
+        rate_per_kg = float(part['material_rate_per_kg'])
+    if diameter is None or length is None:
+        return 0.0
+    return float(stock_mass_kg(diameter, length, density) * rate_per_kg)
+
+
+def price_parts(parts, rates, load_parameters, price_operation):
+    """
+    Time and cost breakdown for a list of parts.
+
+    Args:
+        parts (list): Part dicts with material_id, operations (each with
+            operation_name and dimensions, or time_minutes), and optionally
+            stock, quantity, setup_minutes, tool_minutes, misc_minutes,
+            tool_cost, misc_cost, material_rate_per_kg and material_cost
+        rates (Rates): Rates to apply
+        load_parameters (callable): (material_id, operation_name) ->
+            (MachiningParameter rows, material rating); raises ValueError if
+            the combination is unknown
+        price_operation (callable): (material_id, operation_name, Dimensions) ->
+            minutes, for operations without a batch kernel; raises ValueError
+
+    Returns:
+        list: One breakdown dict per part, or {'error': message} for parts
+        that could not be priced
+    """
+    count = len(parts)
+    errors = [None] * count
+    machining = np.zeros(count)
+    idle = np.zeros(count)
+    op_minutes = []
+    groups = {}
+    stock_dims = []
+
+    for index, part in enumerate(parts):
+        normalized = []
+        minutes = []
+        for position, op in enumerate(part.get('operations') or []):
+            name = str(op['operation_name']).lower()
+            dimensions = normalize(name, op.get('dimensions') or {})
+            normalized.append((name, dimensions))
+            if op.get('time_minutes') is not None:
+                minutes.append(float(op['time_minutes']))
+                continue
+            minutes.append(None)
+            problems = schemas.validate_dimensions(name, dimensions)
+            if problems:
+                errors[index] = errors[index] or f"{name}: " + '; '.join(p['message'] for p in problems)
+                continue
+            key = (part.get('material_id'), name, batch.supports(name, dimensions))
+            groups.setdefault(key, []).append((index, position, dimensions))
+        if float(part.get('quantity') or 1) <= 0:
+            errors[index] = errors[index] or 'quantity must be greater than zero.'
+        op_minutes.append(minutes)
+        stock_dims.append(stock_size(normalized, part.get('stock')))
+
+    for (material_id, name, batched), members in groups.items():
+        live = [member for member in members if errors[member[0]] is None]
+        if not live:
+            continue
+        try:
+            if not batched:
+                for index, position, dimensions in live:
+                    try:
+                        op_minutes[index][position] = float(price_operation(material_id, name, dimensions))
+                    except ValueError as e:
+                        errors[index] = errors[index] or str(e)
+                continue
+            rows, rating = load_parameters(material_id, name)
+            values, messages = batch.operation_minutes(name, rows, rating, [m[2] for m in live])
+        except ValueError as e:
+            for index, _, _ in live:
+                errors[index] = errors[index] or str(e)
+            continue
+        for (index, position, _), value, message in zip(live, values, messages):
+            if message is not None:
+                errors[index] = errors[index] or f"{name}: {message}"
+            op_minutes[index][position] = float(value)
+
+    names = [[str(op['operation_name']).lower() for op in part.get('operations') or []] for part in parts]
+    for index in range(count):
+        if errors[index] is None:
+            for name, value in zip(names[index], op_minutes[index]):
+                if name == 'idle':
+                    idle[index] += value
+                else:
+                    machining[index] += value
+
+    def column(key, default=0.0):
+        return np.fromiter((float(part.get(key, default) or default) for part in parts), dtype=float, count=count)
+
+    quantity = column('quantity', 1.0)
+    setup = column('setup_minutes')
+    tool = column('tool_minutes')
+    misc_time = column('misc_minutes')
+    material_ids = [part.get('material_id') for part in parts]
+    density = np.fromiter((rates.materials.get(m, (0.0, 0.0))[1] for m in material_ids), dtype=float, count=count)
+    rate_per_kg = np.fromiter(
+        (float(part['material_rate_per_kg']) if part.get('material_rate_per_kg') is not None
+         else rates.materials.get(part.get('material_id'), (0.0, 0.0))[0] for part in parts),
+        dtype=float, count=count
+    )
+    diameter = np.fromiter((d if d is not None else np.nan for d, _ in stock_dims), dtype=float, count=count)
+    length = np.fromiter((l if l is not None else np.nan for _, l in stock_dims), dtype=float, count=count)
+
+    stock_known = np.isfinite(diameter) & np.isfinite(length)
+    mass = np.where(stock_known, stock_mass_kg(np.nan_to_num(diameter), np.nan_to_num(length), density), 0.0)
+    flat_material = np.fromiter(
+        (np.nan if part.get('material_cost') is None else float(part['material_cost']) for part in parts),
+        dtype=float, count=count
+    )
+    setup_per_piece = setup / np.maximum(quantity, 1.0)
+
+    costs = cost_components(
+        rates, machining, idle, setup_per_piece, tool, misc_time,
+        material=np.where(np.isnan(flat_material), mass * rate_per_kg, flat_material),
+        tool_cost=column('tool_cost'),
+        misc_cost=column('misc_cost')
+    )
+    raw = sum(costs[component] for component in COST_COMPONENTS)
+    total = raw * rates.overhead_factor
+
+    results = []
+    for index, part in enumerate(parts):
+        if errors[index] is not None:
+            results.append({'error': errors[index]})
+            continue
+        warnings = []
+        stock_based = np.isnan(flat_material[index])
+        if stock_based and not stock_known[index]:
+            warnings.append('Stock size unknown; material cost not included.')
+        elif stock_based and (density[index] <= 0 or rate_per_kg[index] <= 0):
+            warnings.append('No material cost data for this material; material cost not included.')
+        results.append({
+            'material_id': part.get('material_id'),
+            'quantity': int(quantity[index]),
+            'stock': {
+                'diameter_mm': None if np.isnan(diameter[index]) else round(float(diameter[index]), 3),
+                'length_mm': None if np.isnan(length[index]) else round(float(length[index]), 3),
+                'mass_kg': round(float(mass[index]), 4),
+                'rate_per_kg': round(float(rate_per_kg[index]), 2)
+            },
+            'operations': [
+                {'operation_name': name, 'time_minutes': round(value, 3)}
+                for name, value in zip(names[index], op_minutes[index])
+            ],
+            'times': {
+                'setup': round(float(setup[index]), 3),
+                'setup_per_piece': round(float(setup_per_piece[index]), 3),
+                'idle': round(float(idle[index]), 3),
+                'machining': round(float(machining[index]), 3),
+                'tool': round(float(tool[index]), 3),
+                'misc': round(float(misc_time[index]), 3)
+            },
+            'costs': {component: round(float(costs[component][index]), 2) for component in COST_COMPONENTS},
+            'raw_cost': round(float(raw[index]), 2),
+            'overhead_cost': round(float(total[index] - raw[index]), 2),
+            'total_cost': round(float(total[index]), 2),
+            'lot_cost': round(float(total[index] * quantity[index]), 2),
+            'warnings': warnings
+        })
+    return results
+
+
+RANK_KEYS = {
+    'cost': 'total_cost',
+    'time': 'total_time_minutes',
+}
+
+
+def compare_materials(plan, materials, available, rates, load_parameters, price_operation, rank_by='cost'):
+    """
+    Price one plan in several materials and rank them.
+
+    Every material becomes one part of a single price_parts call, so each
+    operation runs once through its batch kernel for all materials together.
+    Operations the parameter store has no rows for are flagged per material
+    and left out of that material's figures; such materials rank after the
+    ones that can make the whole plan.
+
+    Args:
+        plan (dict): Part fields shared by all materials (operations, stock,
+            quantity, setup_minutes, ...; see price_parts)
+        materials (list): (material_id, material_name) pairs to compare
+        available (collection): (material_id, operation_name) pairs with parameters
+        rates (Rates): Rates to apply
+        load_parameters, price_operation: As for price_parts
+        rank_by (str): 'cost' or 'time'
+
+    Returns:
+        list: One row per material, best first, with rank, feasible,
+        unavailable_operations and the time and cost figures
+
+    Raises:
+        ValueError: If rank_by is unknown
+    """
+    if rank_by not in RANK_KEYS:
+        raise ValueError(f"rank_by must be one of {', '.join(RANK_KEYS)}.")
+
+    parts = []
+    flagged = []
+    for material_id, _ in materials:
+        operations = []
+        missing = []
+        for op in plan.get('operations') or []:
+            name = str(op['operation_name']).lower()
+            if op.get('time_minutes') is None and (material_id, name) not in available:
+                if name not in missing:
+                    missing.append(name)
+                continue
+            operations.append(op)
+        parts.append(dict(plan, material_id=material_id, operations=operations))
+        flagged.append(missing)
+
+    results = price_parts(parts, rates, load_parameters, price_operation)
+
+    rows = []
+    for (material_id, material_name), missing, result in zip(materials, flagged, results):
+        row = {
+            'material_id': material_id,
+            'material_name': material_name,
+            'feasible': not missing and 'error' not in result,
+            'unavailable_operations': missing
+        }
+        if 'error' in result:
+            row['error'] = result['error']
+        else:
+            times = result['times']
+            row.update({
+                'total_time_minutes': round(
+                    times['setup_per_piece'] + times['idle'] + times['machining'] + times['tool'] + times['misc'], 3
+                ),
+                'machining_minutes': times['machining'],
+                'material_cost': result['costs']['material'],
+                'total_cost': result['total_cost'],
+                'lot_cost': result['lot_cost'],
+                'costs': result['costs'],
+                'stock': result['stock'],
+                'operations': result['operations'],
+                'warnings': result['warnings']
+            })
+        rows.append(row)
+
+    key = RANK_KEYS[rank_by]
+    rows.sort(key=lambda row: (not row['feasible'], 'error' in row, row.get(key, 0.0)))
+    for rank, row in enumerate(rows, start=1):
+        row['rank'] = rank
+    return rows
@@ -0,0 +1,150 @@
+import gzip
+import json
+
+import numpy as np
+from flask import Response, request
+
+# Response encodings for the calculation APIs.
+#
+# Clients choose with standard content negotiation:
+#   Accept: application/msgpack     MessagePack instead of JSON (needs msgpack)
+#   Accept-Encoding: br / gzip      compression for bodies over COMPRESS_MIN_BYTES
+#   ?view=compact                   drop per-cut breakdowns and repeated metadata
+# orjson, msgpack and brotli are in requirements.txt. An install without orjson
+# or brotli falls back to the standard library JSON encoder and gzip; one
+# without msgpack answers 406 to clients that accept MessagePack but not JSON.
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional encoding
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional compression
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+MSGPACK_MIMETYPES = (MSGPACK_MIMETYPE, 'application/x-msgpack')
+
+# Bodies smaller than this are sent uncompressed; compressing them costs more
+# than it saves
+COMPRESS_MIN_BYTES = 1024
+GZIP_LEVEL = 5
+BROTLI_QUALITY = 5
+
+# Result keys that only repeat what the caller sent, dropped in the compact view
+COMPACT_DROP_KEYS = frozenset({'timestamp', 'material', 'operation', 'machine_hour_rate'})
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    """Serialize numpy values for encoders that do not know them."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f'Object of type {type(value).__name__} is not serializable')
+
+
+def dumps_json(payload):
+    """Encode payload as compact UTF-8 JSON, through orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(payload, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def dumps_msgpack(payload):
+    """Encode payload as MessagePack."""
+    return msgpack.packb(payload, default=_default, use_bin_type=True)
+
+
+def compact_result(payload):
+    """
+    Compact view of a calculation response.
+
+    Keeps the scalar results (total time, cost, passes, dimensions) and
+    warnings; drops nested per-cut breakdowns and the metadata in
+    COMPACT_DROP_KEYS.
+    """
+    data = payload.get('data')
+    if not isinstance(data, dict):
+        return payload
+    compact = dict(payload)
+    compact['data'] = {
+        key: value for key, value in data.items()
+        if key not in COMPACT_DROP_KEYS and not isinstance(value, dict)
+    }
+    return compact
+
+
+def negotiate_mimetype(accept_mimetypes):
+    """
+    MSGPACK_MIMETYPE if the client prefers it and msgpack is available, else JSON.
+
+    Returns None when the client only accepts MessagePack and msgpack is not
+    installed.
+    """
+    if msgpack is None:
+        if not accept_mimetypes.quality(JSON_MIMETYPE) and any(
+            accept_mimetypes.quality(mimetype) for mimetype in MSGPACK_MIMETYPES
+        ):
+            return None
+        return JSON_MIMETYPE
+    best = accept_mimetypes.best_match((JSON_MIMETYPE,) + MSGPACK_MIMETYPES, default=JSON_MIMETYPE)
+    return MSGPACK_MIMETYPE if best in MSGPACK_MIMETYPES else JSON_MIMETYPE
+
+
+def negotiate_encoding(accept_encodings):
+    """Preferred content coding the server can produce: 'br', 'gzip' or None."""
+    candidates = ('br', 'gzip') if brotli is not None else ('gzip',)
+    return accept_encodings.best_match(candidates)
+
+
+def compress(body, encoding):
+    """Compress body with the given content coding."""
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def respond(payload, status=200, compact=None):
+    """
+    Build a response for payload using the encoding the client asked for.
+
+    Args:
+        payload (dict): Response body; may contain numpy arrays and scalars
+        status (int): HTTP status code
+        compact (callable, optional): Builds the compact view of payload; when
+            omitted ?view=compact is ignored
+
+    Returns:
+        flask.Response
+    """
+    if compact is not None and request.args.get('view') == 'compact':
+        payload = compact(payload)
+
+    mimetype = negotiate_mimetype(request.accept_mimetypes)
+    if mimetype is None:
+        mimetype, status = JSON_MIMETYPE, 406
+        payload = {
+            'status': 'error',
+            'message': 'MessagePack responses need msgpack on the server; accept application/json instead.'
+        }
+    body = dumps_msgpack(payload) if mimetype == MSGPACK_MIMETYPE else dumps_json(payload)
+
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    if len(body) >= COMPRESS_MIN_BYTES:
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding:
+            body = compress(body, encoding)
+            headers['Content-Encoding'] = encoding
+    return Response(body, status=status, mimetype=mimetype, headers=headers)
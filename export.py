@@ -0,0 +1,197 @@
+import argparse
+import os
+from datetime import datetime, timezone
+
+import history
+
+# Columnar export of the calculation history.
+#
+# Rows are read from the history database with fetchmany, BATCH_ROWS at a
+# time, transposed into one Arrow array per column and written as record
+# batches, so memory stays at one batch whatever the size of the extract.
+# Two formats:
+#   parquet  - Parquet file, one row group per batch
+#   arrow    - Arrow IPC stream (readable with pyarrow.ipc.open_stream)
+# Both can be written to a file (python export.py ...) or streamed over HTTP
+# (GET /api/history/export). pyarrow is in requirements.txt; an install
+# without it raises ExportUnavailable (501 over HTTP) instead of failing to import.
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - declared dependency missing
+    pa = None
+
+BATCH_ROWS = 16384
+PARQUET_COMPRESSION = 'zstd'
+
+# format: (mimetype, file extension)
+FORMATS = {
+    'parquet': ('application/vnd.apache.parquet', '.parquet'),
+    'arrow': ('application/vnd.apache.arrow.stream', '.arrows'),
+}
+
+
+class ExportUnavailable(RuntimeError):
+    """pyarrow is not installed."""
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ExportUnavailable('Columnar export needs pyarrow (pip install pyarrow).')
+
+
+def schema():
+    """Arrow schema of the calculations table."""
+    _require_pyarrow()
+    types = {'INTEGER': pa.int64(), 'REAL': pa.float64(), 'TEXT': pa.string()}
+    return pa.schema([
+        pa.field(name, pa.timestamp('us', tz='UTC') if name == 'created_at' else types[kind])
+        for name, kind in history.COLUMNS
+    ])
+
+
+def record_batches(cursor, batch_rows=BATCH_ROWS):
+    """
+    Arrow record batches from an executed history.select_sql cursor.
+
+    Yields:
+        pyarrow.RecordBatch: Up to batch_rows rows each
+    """
+    target = schema()
+    while True:
+        rows = cursor.fetchmany(batch_rows)
+        if not rows:
+            return
+        columns = list(zip(*rows))
+        arrays = []
+        for field, values in zip(target, columns):
+            if field.name == 'created_at':
+                arrays.append(pa.array(values, pa.int64()).cast(field.type))
+            else:
+                arrays.append(pa.array(values, field.type))
+        yield pa.RecordBatch.from_arrays(arrays, schema=target)
+
+
+def _writer(sink, fmt):
+    if fmt == 'parquet':
+        return pq.ParquetWriter(sink, schema(), compression=PARQUET_COMPRESSION)
+    if fmt == 'arrow':
+        return pa.ipc.new_stream(sink, schema())
+    raise ValueError(f"format must be one of {', '.join(FORMATS)}.")
+
+
+def write(batches, sink, fmt):
+    """
+    Write record batches to a path or writable file object.
+
+    Returns:
+        int: Rows written
+    """
+    _require_pyarrow()
+    rows = 0
+    writer = _writer(sink, fmt)
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            rows += batch.num_rows
+    finally:
+        writer.close()
+    return rows
+
+
+class _ChunkSink:
+    """Write-only file object whose contents are taken out chunk by chunk."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self):
+        return True
+
+    def take(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream(batches, fmt):
+    """
+    Encode record batches as they are produced, for a streamed HTTP response.
+
+    Yields:
+        bytes: Encoded chunks; together they form one Parquet file or Arrow stream
+    """
+    _require_pyarrow()
+    sink = _ChunkSink()
+    writer = _writer(pa.PythonFile(sink, mode='w'), fmt)
+    try:
+        for batch in batches:
+            writer.write_batch(batch)
+            chunk = sink.take()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    chunk = sink.take()
+    if chunk:
+        yield chunk
+
+
+def parse_time(value):
+    """Seconds since the epoch from an ISO 8601 date or datetime (UTC unless it says otherwise)."""
+    if value is None or value == '':
+        return None
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the calculation history as Parquet or Arrow.')
+    parser.add_argument('output', help='Output file')
+    parser.add_argument('--format', choices=sorted(FORMATS), help='Defaults to the output file extension')
+    parser.add_argument('--db', default=os.path.join('instance', history.HISTORY_FILENAME), help='History database')
+    parser.add_argument('--since', help='ISO date or datetime, inclusive')
+    parser.add_argument('--until', help='ISO date or datetime, exclusive')
+    parser.add_argument('--material-id', type=int)
+    parser.add_argument('--operation')
+    args = parser.parse_args()
+
+    fmt = args.format or next(
+        (name for name, (_, extension) in FORMATS.items() if args.output.endswith(extension)), 'parquet'
+    )
+    sql, parameters = history.select_sql(
+        since=parse_time(args.since),
+        until=parse_time(args.until),
+        material_id=args.material_id,
+        operation=args.operation
+    )
+    conn = history.connect(args.db)
+    try:
+        rows = write(record_batches(conn.execute(sql, parameters)), args.output, fmt)
+    finally:
+        conn.close()
+    print(f"Exported {rows} rows to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
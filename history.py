@@ -0,0 +1,232 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from models.dimensions import DIMENSION_FIELDS
+
+# Calculation history for analytics.
+#
+# Every successful /api/calculate result is flattened into one row of a fixed
+# schema (operation, material, machine, each canonical dimension, passes,
+# time and cost) and kept in its own SQLite file, separate from the machining
+# database, which may be a read-only snapshot. Rows are buffered in memory and
+# written with one executemany per batch, when BATCH_SIZE rows are waiting or
+# the oldest has waited FLUSH_INTERVAL seconds; readers flush first, and the
+# buffer is flushed at exit. export.py turns the table into Parquet or Arrow.
+
+HISTORY_FILENAME = 'history.db'
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 2.0  # seconds
+
+SQL_TYPES = {float: 'REAL', int: 'INTEGER', str: 'TEXT'}
+
+# Canonical dimensions as dim_<name> columns, the same for every operation
+DIMENSION_COLUMNS = tuple(sorted({
+    (f'dim_{name}', SQL_TYPES[kind]) for fields in DIMENSION_FIELDS.values() for name, _, kind in fields
+}))
+
+# (column, SQLite type); created_at is microseconds since the epoch, UTC
+COLUMNS = (
+    ('id', 'INTEGER'),
+    ('created_at', 'INTEGER'),
+    ('material_id', 'INTEGER'),
+    ('material', 'TEXT'),
+    ('operation_id', 'INTEGER'),
+    ('operation', 'TEXT'),
+    ('machine_id', 'INTEGER'),
+) + DIMENSION_COLUMNS + (
+    # Full dimensions as JSON, including hole patterns and profiles
+    ('dimensions', 'TEXT'),
+    ('rough_passes', 'INTEGER'),
+    ('finish_passes', 'INTEGER'),
+    ('total_passes', 'INTEGER'),
+    ('total_time_minutes', 'REAL'),
+    ('cost', 'REAL'),
+    ('machine_hour_rate', 'REAL'),
+)
+COLUMN_NAMES = tuple(name for name, _ in COLUMNS)
+# Columns a recorded row gives; id is assigned by SQLite
+INSERT_COLUMNS = COLUMN_NAMES[1:]
+
+SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS calculations (
+        {', '.join(f'{name} {kind}' + (' PRIMARY KEY' if name == 'id' else '') for name, kind in COLUMNS)}
+    );
+    CREATE INDEX IF NOT EXISTS idx_calculations_created ON calculations(created_at);
+'''
+
+INSERT_SQL = (
+    f"INSERT INTO calculations ({', '.join(INSERT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in INSERT_COLUMNS)})"
+)
+
+
+def count_passes(result):
+    """
+    (rough, finish, total) passes of a calculation result.
+
+    Operation classes report passes in nested blocks ('rough_cut',
+    'finish_cut', 'parameters', ...); rough and finish are taken from the
+    blocks named after them and total is the sum over all blocks.
+    """
+    rough = finish = total = 0
+    found = False
+    for key, value in result.items():
+        if isinstance(value, dict):
+            passes = value.get('passes')
+        elif key in ('passes', 'num_passes'):
+            passes = value
+        else:
+            continue
+        if isinstance(passes, bool) or not isinstance(passes, (int, float)):
+            continue
+        found = True
+        total += int(passes)
+        if 'rough' in key:
+            rough += int(passes)
+        elif 'finish' in key and 'semi' not in key:
+            finish += int(passes)
+    if not found:
+        return None, None, None
+    return rough, finish, total
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None
+    return value
+
+
+def make_row(result, material_id, material, operation_id, operation, dimensions, machine_id=None, created_at=None):
+    """
+    One history row, in INSERT_COLUMNS order, from a calculation result.
+
+    Args:
+        result (dict): Result of the operation class
+        dimensions (Mapping): Normalized dimensions the result was calculated from
+        created_at (float): Seconds since the epoch; now if not given
+    """
+    created_at = time.time() if created_at is None else created_at
+    values = {
+        'created_at': int(created_at * 1_000_000),
+        'material_id': material_id,
+        'material': material,
+        'operation_id': operation_id,
+        'operation': operation,
+        'machine_id': machine_id,
+        'dimensions': json.dumps(dict(dimensions), separators=(',', ':'), default=str),
+        'total_time_minutes': _number(result.get('total_time_minutes', result.get('machining_time'))),
+        'cost': _number(result.get('cost')),
+        'machine_hour_rate': _number(result.get('machine_hour_rate')),
+    }
+    values['rough_passes'], values['finish_passes'], values['total_passes'] = count_passes(result)
+    for column, kind in DIMENSION_COLUMNS:
+        value = dimensions.get(column[4:])
+        if kind == 'TEXT':
+            values[column] = None if value is None else str(value)
+        else:
+            values[column] = _number(value)
+    return tuple(values.get(name) for name in INSERT_COLUMNS)
+
+
+def connect(path):
+    """Open the history database, creating the table if needed."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class HistoryStore:
+    """Buffered writer for the calculations table of one history database."""
+
+    def __init__(self, path, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._buffer = []
+        self._oldest = None
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._conn = None
+
+    def record(self, row):
+        """Queue one row from make_row; writes the batch once it is full or old enough."""
+        with self._buffer_lock:
+            self._buffer.append(row)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._oldest >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write all queued rows in one transaction."""
+        with self._buffer_lock:
+            rows, self._buffer, self._oldest = self._buffer, [], None
+        if not rows:
+            return
+        with self._write_lock:
+            if self._conn is None:
+                self._conn = connect(self.path)
+            with self._conn:
+                self._conn.executemany(INSERT_SQL, rows)
+
+    def reader(self):
+        """A new connection for reading, after flushing queued rows."""
+        self.flush()
+        return connect(self.path)
+
+    def close(self):
+        self.flush()
+        with self._write_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path):
+    """The process-wide HistoryStore for path; flushed at interpreter exit."""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            store = _stores[path] = HistoryStore(path)
+            atexit.register(store.close)
+        return store
+
+
+def select_sql(since=None, until=None, material_id=None, operation=None):
+    """
+    SELECT over calculations with optional filters, oldest first.
+
+    Args:
+        since, until (float): Seconds since the epoch; since inclusive, until exclusive
+
+    Returns:
+        tuple: (sql, parameters)
+    """
+    clauses, parameters = [], []
+    if since is not None:
+        clauses.append('created_at >= ?')
+        parameters.append(int(since * 1_000_000))
+    if until is not None:
+        clauses.append('created_at < ?')
+        parameters.append(int(until * 1_000_000))
+    if material_id is not None:
+        clauses.append('material_id = ?')
+        parameters.append(material_id)
+    if operation is not None:
+        clauses.append('operation = ?')
+        parameters.append(operation.lower())
+    where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+    return f"SELECT {', '.join(COLUMN_NAMES)} FROM calculations{where} ORDER BY id", parameters
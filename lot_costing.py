@@ -0,0 +1,107 @@
+import numpy as np
+
+import cost_engine
+
+# Lot-size cost curves.
+#
+# A lot is one setup followed by `quantity` identical cycles, so every quantity
+# dependent figure is a closed-form function of the quantity:
+#
+#   time_total(Q) = setup + Q * cycle + tool_change(Q)
+#   cost_total(Q) = Q * cost_engine.cost_components(setup / Q, ...) * overhead_factor
+#
+# The plan is priced once and the curves are evaluated with numpy over the whole
+# quantity array, so a curve over thousands of quantities costs about the same
+# as a single quote. Time breakdown follows static/time.js; costs are the
+# cost_engine components (labor, machine and overhead rates from cost_rates),
+# so a point of the curve matches /api/cost for the same plan and quantity.
+
+TIME_COMPONENTS = ('machining', 'idle', 'tool', 'misc')
+
+
+def piece_times(operation_minutes, tool_minutes=0.0, misc_minutes=0.0):
+    """
+    Per-piece time breakdown of a plan.
+
+    Args:
+        operation_minutes (list): (operation_name, minutes) per piece for each
+            operation; operations named 'idle' count as idle time
+        tool_minutes (float): Manual tool handling time per piece
+        misc_minutes (float): Miscellaneous time per piece
+
+    Returns:
+        dict: Minutes per piece for each of TIME_COMPONENTS
+    """
+    machining = sum(minutes for name, minutes in operation_minutes if name != 'idle')
+    idle = sum(minutes for name, minutes in operation_minutes if name == 'idle')
+    return {
+        'machining': float(machining),
+        'idle': float(idle),
+        'tool': float(tool_minutes),
+        'misc': float(misc_minutes)
+    }
+
+
+def cost_curve(quantities, times, setup_minutes, rates, material_cost=0.0, tool_cost=0.0, misc_cost=0.0,
+               tool_curve=None):
+    """
+    Time and cost per piece and per lot for every quantity.
+
+    Args:
+        quantities (array-like): Lot sizes, each greater than zero
+        times (dict): Per-piece minutes from piece_times
+        setup_minutes (float): Setup time, paid once per lot
+        rates (cost_engine.Rates): Labor, machine and overhead rates
+        material_cost (float): Material cost per piece
+        tool_cost (float): Flat tool cost per piece
+        misc_cost (float): Miscellaneous cost per piece
+        tool_curve (dict, optional): Result of tool_life.tool_change_curve for the
+            same quantities; adds tool change time and tool edge cost per lot
+
+    Returns:
+        dict: Arrays keyed by figure (time_per_piece, time_total, cost_per_piece,
+        cost_total, setup_cost_per_piece, raw_cost_total, overhead_total),
+        costs (per-piece arrays by cost_engine.COST_COMPONENTS) and
+        cycle_minutes, the quantity independent time per piece
+
+    Raises:
+        ValueError: If a quantity is not greater than zero
+    """
+    quantities = np.asarray(quantities, dtype=float)
+    if np.any(quantities <= 0):
+        raise ValueError("Quantities must be greater than zero.")
+
+    cycle = sum(times[component] for component in TIME_COMPONENTS)
+    time_total = setup_minutes + quantities * cycle
+    tool_change = edge_cost = 0.0
+    if tool_curve is not None:
+        time_total = time_total + tool_curve['tool_change_minutes']
+        tool_change = tool_curve['tool_change_minutes'] / quantities
+        edge_cost = tool_curve['tool_cost'] / quantities
+
+    costs = cost_engine.cost_components(
+        rates,
+        times['machining'],
+        times['idle'],
+        setup_minutes / quantities,
+        times['tool'] + tool_change,
+        times['misc'],
+        material=material_cost,
+        tool_cost=tool_cost + edge_cost,
+        misc_cost=misc_cost
+    )
+    costs = {component: np.broadcast_to(value, quantities.shape) for component, value in costs.items()}
+    raw_cost_total = sum(costs[component] for component in cost_engine.COST_COMPONENTS) * quantities
+    cost_total = raw_cost_total * rates.overhead_factor
+
+    return {
+        'cycle_minutes': cycle,
+        'time_total': time_total,
+        'time_per_piece': time_total / quantities,
+        'raw_cost_total': raw_cost_total,
+        'overhead_total': cost_total - raw_cost_total,
+        'cost_total': cost_total,
+        'cost_per_piece': cost_total / quantities,
+        'setup_cost_per_piece': setup_minutes * rates.labor_rate_per_hr / 60.0 * rates.overhead_factor / quantities,
+        'costs': costs
+    }
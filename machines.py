@@ -0,0 +1,298 @@
+import math
+import threading
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import FrozenSet
+
+import numpy as np
+
+import query_stats
+import reference_data
+
+# Machine profiles and the limits they put on a calculation.
+#
+# Parameters from MachiningParameters assume an unlimited machine. On a real
+# machine two limits apply:
+#   - spindle speed: rows are clamped to the machine's max_rpm before the
+#     operation class (or batch kernel) sees them;
+#   - power: the rough cut needs kc * ap * f * vc / 60000 kW (turning-type
+#     cuts) or kc * f * D * vc / 240000 kW (drilling). When that exceeds the
+#     machine's power the feed has to drop in proportion, which stretches the
+#     operation time by the same ratio. The stretch is applied to the whole
+#     operation time, a slightly conservative estimate.
+# kc, the specific cutting force, is estimated from the machinability rating
+# (about 750 N/mm^2 for aluminium up to 1750 for stainless steel).
+#
+# Machine cost is time at the machine's hour rate. Machines are cached per
+# catalogue version, like the bootstrap data.
+
+KC_AT_ZERO_RATING = 3000.0  # N/mm^2
+KC_PER_RATING = 2500.0
+# Usable share of the spindle motor power at the cut
+SPINDLE_EFFICIENCY = 0.8
+# Workpiece diameter assumed when an operation gives none (matches GroovingOperation)
+DEFAULT_CUT_DIAMETER = 20.0
+# Operations whose power follows the drilling formula
+DRILLING_OPERATIONS = frozenset({'drilling', 'reaming'})
+
+# Dimension giving the cutting diameter, per operation (first one present wins)
+CUT_DIAMETER = {
+    'turning': ('initial_diameter',),
+    'facing': ('diameter',),
+    'drilling': ('diameter',),
+    'boring': ('final_diameter', 'initial_diameter'),
+    'reaming': ('diameter',),
+    'threading': ('diameter',),
+    'knurling': ('diameter',),
+    'parting': ('diameter',),
+    'grooving': (),
+}
+
+ROW_FIELDS = (
+    'param_id', 'material_id', 'operation_id', 'spindle_speed_min', 'spindle_speed_max',
+    'feed_rate_min', 'feed_rate_max', 'depth_of_cut_min', 'depth_of_cut_max', 'notes'
+)
+
+
+@dataclass(frozen=True)
+class Machine:
+    """A machine tool from the Machines table."""
+    machine_id: int
+    machine_name: str
+    max_rpm: float
+    power_kw: float
+    rapid_rate: float
+    hour_rate: float
+    capabilities: FrozenSet[str]
+
+    def can_do(self, operation_name):
+        return operation_name in self.capabilities
+
+    def to_dict(self):
+        return {
+            'machine_id': self.machine_id,
+            'machine_name': self.machine_name,
+            'max_rpm': self.max_rpm,
+            'power_kw': self.power_kw,
+            'rapid_rate': self.rapid_rate,
+            'hour_rate': self.hour_rate,
+            'capabilities': sorted(self.capabilities)
+        }
+
+
+_lock = threading.Lock()
+_cached = None
+
+
+def parse_capabilities(text):
+    """Operation names from the comma-separated capabilities column."""
+    return frozenset(name.strip().lower() for name in (text or '').split(',') if name.strip())
+
+
+def load_machines(conn):
+    """
+    All machines, ordered by machine_id; empty if the Machines table does not exist.
+    """
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            'SELECT machine_id, machine_name, max_rpm, power_kw, rapid_rate, hour_rate, capabilities '
+            'FROM Machines ORDER BY machine_id'
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+    except Exception as e:
+        if 'no such table' in str(e):
+            return ()
+        raise
+    return tuple(
+        Machine(row[0], row[1], float(row[2]), float(row[3]), float(row[4]), float(row[5]), parse_capabilities(row[6]))
+        for row in rows
+    )
+
+
+def get_machines(conn, version=None):
+    """
+    Cached machines for the current catalogue version.
+
+    Args:
+        conn: DB-API connection to the SQLite database
+        version: Catalogue version the caller has already read this request;
+            read from the database when None
+    """
+    global _cached
+    if version is None:
+        version = reference_data.current_version(conn)
+    cached = _cached
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _lock:
+        if _cached is None or _cached[0] != version:
+            with query_stats.reloading():
+                _cached = (version, load_machines(conn))
+        return _cached[1]
+
+
+def clamp_rows(rows, machine):
+    """
+    Copies of MachiningParameter rows with spindle speeds capped at the machine's max_rpm.
+
+    Returns:
+        tuple: (rows, rpm_limited) where rpm_limited says whether any speed was capped
+    """
+    clamped = []
+    limited = False
+    for row in rows:
+        values = {name: getattr(row, name, None) for name in ROW_FIELDS}
+        for name in ('spindle_speed_min', 'spindle_speed_max'):
+            if values[name] is not None and values[name] > machine.max_rpm:
+                values[name] = machine.max_rpm
+                limited = True
+        clamped.append(SimpleNamespace(**values))
+    return clamped, limited
+
+
+def specific_cutting_force(material_rating):
+    """Estimated kc (N/mm^2) for a machinability rating between 0 and 1."""
+    return KC_AT_ZERO_RATING - KC_PER_RATING * min(max(material_rating, 0.0), 1.0)
+
+
+def cut_diameters(operation_name, records):
+    """Cutting diameter of each normalized Dimensions record, as a float array."""
+    keys = CUT_DIAMETER.get(operation_name, ('diameter',))
+    values = []
+    for record in records:
+        value = next((record[key] for key in keys if isinstance(record.get(key), (int, float))), None)
+        values.append(DEFAULT_CUT_DIAMETER if value is None else float(value))
+    return np.asarray(values, dtype=float)
+
+
+def power_stretch(operation_name, rows, material_rating, machine, diameters):
+    """
+    Time multiplier (>= 1) per operation from the machine's power limit.
+
+    Uses the rough cut of the (already clamped) rows: depth_of_cut_max,
+    feed_rate_max and spindle_speed_min.
+
+    Args:
+        operation_name (str): Lowercase operation name
+        rows (list): Clamped parameter rows for the material and operation
+        material_rating (float): Machinability rating (0-1)
+        machine (Machine): Machine the operations run on
+        diameters (array-like): Cutting diameter per operation, mm
+
+    Returns:
+        tuple: (stretch array, required power array in kW)
+    """
+    rough = next((row for row in rows if 'rough' in (getattr(row, 'notes', '') or '').lower()), rows[0])
+    rpm = float(getattr(rough, 'spindle_speed_min', 0) or 0)
+    feed = float(getattr(rough, 'feed_rate_max', 0) or 0)
+    depth = float(getattr(rough, 'depth_of_cut_max', 0) or 0)
+    diameters = np.asarray(diameters, dtype=float)
+    cutting_speed = math.pi * diameters * rpm / 1000.0  # m/min
+    kc = specific_cutting_force(material_rating)
+    if operation_name in DRILLING_OPERATIONS:
+        required = kc * feed * diameters * cutting_speed / 240000.0
+    else:
+        required = kc * depth * feed * cutting_speed / 60000.0
+    available = machine.power_kw * SPINDLE_EFFICIENCY
+    if available <= 0:
+        return np.full_like(required, np.inf), required
+    return np.maximum(1.0, required / available), required
+
+
+def machine_cost(minutes, machine):
+    """Cost of minutes on machine at its hour rate; scalars or arrays."""
+    return minutes * machine.hour_rate / 60.0
+
+
+OBJECTIVES = {
+    'cost': lambda option: option['cost'],
+    'time': lambda option: option['time_minutes'],
+}
+
+
+def select(operations, machines, evaluate, objective='cost'):
+    """
+    Best machine for every operation of a plan.
+
+    Operations of the same kind are evaluated together on each eligible
+    machine, one call of evaluate per (operation kind, machine).
+
+    Args:
+        operations (list): (operation_name, Dimensions) pairs
+        machines (tuple): Candidate Machine objects
+        evaluate (callable): (operation_name, machine, [Dimensions]) ->
+            (minutes array, list of error messages or None, rpm_limited,
+            stretch array); raises ValueError if the kind cannot be priced
+        objective (str): 'cost' or 'time'
+
+    Returns:
+        dict: operations (per operation: best and options) and totals for the
+        chosen routing
+
+    Raises:
+        ValueError: If the objective is unknown
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {', '.join(OBJECTIVES)}.")
+    pick = OBJECTIVES[objective]
+
+    groups = {}
+    for position, (name, dimensions) in enumerate(operations):
+        groups.setdefault(name, []).append((position, dimensions))
+
+    options = [[] for _ in operations]
+    errors = [dict() for _ in operations]
+    for name, members in groups.items():
+        records = [dimensions for _, dimensions in members]
+        for machine in machines:
+            if not machine.can_do(name):
+                continue
+            try:
+                minutes, messages, rpm_limited, stretch = evaluate(name, machine, records)
+            except ValueError as e:
+                for position, _ in members:
+                    errors[position][machine.machine_id] = str(e)
+                continue
+            costs = machine_cost(minutes, machine)
+            for (position, _), value, cost, message, factor in zip(members, minutes, costs, messages, stretch):
+                if message is not None:
+                    errors[position][machine.machine_id] = message
+                    continue
+                options[position].append({
+                    'machine_id': machine.machine_id,
+                    'machine_name': machine.machine_name,
+                    'time_minutes': round(float(value), 3),
+                    'cost': round(float(cost), 2),
+                    'rpm_limited': bool(rpm_limited),
+                    'power_limited': bool(factor > 1.0)
+                })
+
+    results = []
+    total_time = total_cost = 0.0
+    unroutable = 0
+    for (name, _), candidates, failed in zip(operations, options, errors):
+        candidates.sort(key=pick)
+        entry = {
+            'operation_name': name,
+            'best': candidates[0] if candidates else None,
+            'options': candidates,
+            'ineligible_machines': [m.machine_id for m in machines if not m.can_do(name)]
+        }
+        if failed:
+            entry['errors'] = {str(machine_id): message for machine_id, message in failed.items()}
+        if candidates:
+            total_time += candidates[0]['time_minutes']
+            total_cost += candidates[0]['cost']
+        else:
+            unroutable += 1
+        results.append(entry)
+
+    return {
+        'objective': objective,
+        'operations': results,
+        'total_time_minutes': round(total_time, 3),
+        'total_cost': round(total_cost, 2),
+        'unroutable_operations': unroutable
+    }
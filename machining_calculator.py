@@ -10,6 +10,7 @@ from models import (
     TurningOperation, FacingOperation, 
     DrillingOperation, MillingOperation
 )
+from models.results import as_result
 
 class MachiningCalculator:
     """
@@ -71,11 +72,11 @@ class MachiningCalculator:
         Returns:
 tuple: A tuple containing the raw machining time and total time
         """
-        result = self.calculate_machining_parameters(operation_name, user_inputs )
-        if 'error' in result:
-            raise ValueError(result['error'])
+        result = as_result(self.calculate_machining_parameters(operation_name, user_inputs))
+        if result.error is not None:
+            raise ValueError(result.error)
             
-        machining_time = result.get('machining_time', 0)
+        machining_time = result.total_time_minutes
         total_time = machining_time * (1 + self.material_rating * 0.1)  # Add material factor
         
         return machining_time, total_time
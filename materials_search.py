@@ -0,0 +1,208 @@
+import base64
+import json
+import re
+
+# Full-text index over the Materials catalogue.
+#
+# Materials_fts is an external-content FTS5 table: it stores only the inverted
+# index and reads the column values back from Materials, so the catalogue is not
+# duplicated. Triggers keep it in step with inserts, updates and deletes.
+
+FTS_TABLE = 'Materials_fts'
+
+# Ranking weights per column: a hit in the name outranks a hit in the tool or notes
+COLUMN_WEIGHTS = (10.0, 2.0, 1.0)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Queries whose words are all this short match most of a large catalogue, and
+# ranking them costs time in proportion to the matches. They are answered in
+# material_id order instead, which reads only one page from the index.
+SHORT_PREFIX_CHARS = 2
+
+FTS_SCHEMA = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS Materials_fts USING fts5(
+        material_name,
+        recommended_tool,
+        notes,
+        content='Materials',
+        content_rowid='material_id',
+        prefix='1 2 3 4',
+        tokenize='unicode61 remove_diacritics 2'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS Materials_fts_insert AFTER INSERT ON Materials BEGIN
+        INSERT INTO Materials_fts(rowid, material_name, recommended_tool, notes)
+        VALUES (new.material_id, new.material_name, new.recommended_tool, new.notes);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS Materials_fts_delete AFTER DELETE ON Materials BEGIN
+        INSERT INTO Materials_fts(Materials_fts, rowid, material_name, recommended_tool, notes)
+        VALUES ('delete', old.material_id, old.material_name, old.recommended_tool, old.notes);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS Materials_fts_update AFTER UPDATE ON Materials BEGIN
+        INSERT INTO Materials_fts(Materials_fts, rowid, material_name, recommended_tool, notes)
+        VALUES ('delete', old.material_id, old.material_name, old.recommended_tool, old.notes);
+        INSERT INTO Materials_fts(rowid, material_name, recommended_tool, notes)
+        VALUES (new.material_id, new.material_name, new.recommended_tool, new.notes);
+    END;
+'''
+
+# FTS5 ranking function: BM25 with the column weights above. FTS5 negates
+# BM25, so better matches have lower ranks and ORDER BY rank puts them first.
+RANK_FUNCTION = f"bm25({', '.join(str(weight) for weight in COLUMN_WEIGHTS)})"
+
+# Rows after the keyset (rank, material_id) of the previous page, best first
+SEARCH_SQL = f'''
+    SELECT m.material_id, m.material_name, m.machinability_rating,
+           m.recommended_tool, m.notes, {FTS_TABLE}.rank
+    FROM {FTS_TABLE}
+    JOIN Materials m ON m.material_id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH ? AND {FTS_TABLE}.rank MATCH '{RANK_FUNCTION}'
+      AND ({FTS_TABLE}.rank, {FTS_TABLE}.rowid) > (?, ?)
+    ORDER BY {FTS_TABLE}.rank, {FTS_TABLE}.rowid
+    LIMIT ?
+'''
+
+# Short-prefix queries: rows after the material_id of the previous page
+PREFIX_SQL = f'''
+    SELECT m.material_id, m.material_name, m.machinability_rating,
+           m.recommended_tool, m.notes, NULL
+    FROM {FTS_TABLE}
+    JOIN Materials m ON m.material_id = {FTS_TABLE}.rowid
+    WHERE {FTS_TABLE} MATCH ? AND {FTS_TABLE}.rowid > ?
+    ORDER BY {FTS_TABLE}.rowid
+    LIMIT ?
+'''
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def ensure_index(conn):
+    """
+    Create the FTS5 index and its triggers if they do not exist yet.
+
+    When the index is created on a database that already holds materials it is
+    rebuilt from the Materials table in the same transaction.
+
+    Args:
+        conn: DB-API connection to the SQLite database (sqlite3 or a pooled proxy)
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,))
+    exists = cursor.fetchone() is not None
+    if not exists:
+        cursor.executescript(FTS_SCHEMA)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+        conn.commit()
+    cursor.close()
+
+
+def tokenize(text):
+    """Split text into lowercase words the same way for queries and documents."""
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+def build_match_expression(query):
+    """
+    Turn free text typed by a user into an FTS5 MATCH expression.
+
+    Every word becomes a quoted prefix term, so 'stain ste' matches
+    'Stainless Steel' and FTS5 operators typed by the user are treated as text.
+
+    Returns:
+        str or None: MATCH expression, or None when the query has no searchable words
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def encode_cursor(rank, material_id):
+    """Encode the position after the last row of a page as an opaque token (rank None when unranked)."""
+    raw = json.dumps([rank, material_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token):
+    """
+    Decode a token produced by encode_cursor.
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        rank, material_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return None if rank is None else float(rank), int(material_id)
+    except Exception as e:
+        raise ValueError("Invalid pagination cursor.") from e
+
+
+def search(conn, query, limit=DEFAULT_PAGE_SIZE, cursor=None):
+    """
+    Search the materials catalogue with ranking and keyset pagination.
+
+    Matches are ordered by BM25 relevance, best first, with material_id as a
+    tie breaker. FTS5 scores the matches while it reads them from the index and
+    SQLite keeps only the best page, so the time grows with the number of
+    matches. Queries whose words are all at most SHORT_PREFIX_CHARS long are
+    not ranked: they come back in material_id order, read page by page from
+    the index, so their time does not depend on the catalogue size. The cursor
+    holds the sort key of the last row returned, so later pages skip ahead on
+    it instead of using an OFFSET.
+
+    Args:
+        conn: DB-API connection to the SQLite database
+        query (str): Text typed by the user; every word is matched as a prefix
+        limit (int): Page size, clamped to MAX_PAGE_SIZE
+        cursor (str, optional): next_cursor value from the previous page
+
+    Returns:
+        dict: {'materials': [...], 'next_cursor': str or None, 'ranked': bool}
+
+    Raises:
+        ValueError: If the query has no searchable words or the cursor is invalid
+    """
+    match = build_match_expression(query)
+    if match is None:
+        raise ValueError("Search query must contain at least one letter or digit.")
+    ranked = max(len(token) for token in tokenize(query)) > SHORT_PREFIX_CHARS
+
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    if cursor:
+        after_rank, after_id = decode_cursor(cursor)
+        if (after_rank is None) == ranked:
+            raise ValueError("Invalid pagination cursor.")
+    else:
+        after_rank, after_id = float('-inf'), -1
+
+    # One extra row tells whether another page exists
+    db_cursor = conn.cursor()
+    if ranked:
+        db_cursor.execute(SEARCH_SQL, (match, after_rank, after_id, limit + 1))
+    else:
+        db_cursor.execute(PREFIX_SQL, (match, after_id, limit + 1))
+    rows = db_cursor.fetchall()
+    db_cursor.close()
+
+    materials = [
+        {
+            'material_id': row[0],
+            'material_name': row[1],
+            'machinability_rating': row[2],
+            'recommended_tool': row[3],
+            'notes': row[4]
+        }
+        for row in rows[:limit]
+    ]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = rows[limit - 1]
+        next_cursor = encode_cursor(last[5], last[0])
+
+    return {'materials': materials, 'next_cursor': next_cursor, 'ranked': ranked}
@@ -0,0 +1,237 @@
+import numpy as np
+
+# Vectorized operation times.
+#
+# Each kernel computes total_time_minutes for many operations of one kind that
+# share a material (and so share their MachiningParameters rows), with the
+# same formulas and parameter choices as the operation class, evaluated with
+# numpy over columns of dimensions instead of one object per operation. The
+# classes remain the reference and produce the full per-cut breakdown; the
+# kernels are what the cost engine runs for whole plans and batches.
+#
+# Kernels take:
+#   rows             MachiningParameter rows for the material and operation,
+#                    in the order app.py passes them to the classes
+#   material_rating  Machinability rating of the material (0-1)
+#   columns          {canonical dimension name: float array}, one entry per
+#                    operation; optional dimensions are NaN where not given
+# and return (minutes, problems): minutes is a float array, NaN where the
+# operation is invalid, and problems is a list of (mask, message) naming the
+# operations the class would have rejected. Dimensions are expected to have
+# passed schemas.validate_dimensions already.
+
+
+def _value(row, name, default=0.0):
+    return float(getattr(row, name, default) or 0.0)
+
+
+def _cut_rows(rows, operation_name):
+    """Rough and finish rows, picked by their notes as the classes do."""
+    rough = finish = None
+    for row in rows:
+        note = (getattr(row, 'notes', '') or '').strip().lower()
+        if 'rough' in note:
+            rough = row
+        elif 'finish' in note:
+            finish = row
+    if rough is None or finish is None:
+        raise ValueError(f"Missing rough or finish cut parameters for {operation_name}.")
+    return rough, finish
+
+
+def turning_minutes(rows, material_rating, columns):
+    """TurningOperation.calculate over arrays."""
+    rough, finish = _cut_rows(rows, 'turning')
+    rough_doc = _value(rough, 'depth_of_cut_max')
+    rough_rate = _value(rough, 'spindle_speed_min') * _value(rough, 'feed_rate_max')
+    finish_doc = _value(finish, 'depth_of_cut_min')
+    finish_rate = _value(finish, 'spindle_speed_max') * _value(finish, 'feed_rate_min')
+
+    effective_length = columns['length'] + 10.0
+    radial_reduction = (columns['initial_diameter'] - columns['final_diameter']) / 2
+    rough_passes = np.maximum(1, np.ceil(np.maximum(0, radial_reduction - finish_doc) / rough_doc))
+    finish_time = effective_length / finish_rate if finish_doc > 0 else 0.0
+    minutes = (effective_length / rough_rate * rough_passes + finish_time) * 1.1
+    return minutes, []
+
+
+def facing_minutes(rows, material_rating, columns):
+    """FacingOperation.calculate over arrays (rough, semi-finish and finish passes)."""
+    rough, finish = _cut_rows(rows, 'facing')
+    rough_speed, rough_feed = _value(rough, 'spindle_speed_min'), _value(rough, 'feed_rate_min')
+    rough_doc = _value(rough, 'depth_of_cut_max')
+    finish_speed, finish_feed = _value(finish, 'spindle_speed_max'), _value(finish, 'feed_rate_max')
+    finish_doc = _value(finish, 'depth_of_cut_min')
+    semi_speed = (rough_speed + finish_speed) / 2.0
+    semi_feed = (rough_feed + finish_feed) / 2.0
+    semi_doc = (rough_doc + finish_doc) / 2.0
+
+    length_of_cut = columns['diameter'] / 2.0
+    rough_depth = np.maximum(0, columns['depth_of_cut'] - semi_doc - finish_doc)
+    rough_passes = np.ceil(rough_depth / rough_doc) if rough_doc else np.zeros_like(rough_depth)
+
+    per_length = 0.0
+    if rough_speed and rough_feed:
+        per_length = per_length + rough_passes / (rough_speed * rough_feed)
+    if semi_doc > 0 and semi_speed and semi_feed:
+        per_length = per_length + 1.0 / (semi_speed * semi_feed)
+    if finish_doc > 0 and finish_speed and finish_feed:
+        per_length = per_length + 1.0 / (finish_speed * finish_feed)
+    return length_of_cut * per_length * 1.1, []
+
+
+def drilling_minutes(rows, material_rating, columns):
+    """DrillingOperation.calculate over arrays, including its peck depth limits."""
+    row = rows[0]
+    feed = round(_value(row, 'feed_rate_min', 0.1), 3)
+    spindle_speed = round(_value(row, 'spindle_speed_min', 500), 1)
+
+    diameter = columns['diameter']
+    depth = columns['depth']
+    peck_depth = columns.get('peck_depth')
+    default_peck = np.minimum(3 * diameter, 15.0)
+    peck_depth = default_peck if peck_depth is None else np.where(np.isnan(peck_depth), default_peck, peck_depth)
+    retract = columns.get('retract_distance')
+    retract = np.full_like(depth, 2.0) if retract is None else np.where(np.isnan(retract), 2.0, retract)
+    retract = np.clip(retract, 1.0, 5.0)
+
+    pecks = np.maximum(1, np.ceil(depth / peck_depth))
+    minutes = (depth + retract * (pecks - 1)) / (feed * spindle_speed) * 1.1
+
+    problems = [
+        (peck_depth < diameter * 0.5, "Peck depth is too small for the drill diameter."),
+        (peck_depth > 20.0, "Peck depth exceeds maximum allowed (20mm)."),
+    ]
+    return minutes, problems
+
+
+def boring_minutes(rows, material_rating, columns):
+    """BoringOperation.calculate over arrays; final_diameter may come from cutting_depth."""
+    row = rows[0]
+    speed_scale = 0.5 + material_rating * 0.5
+    rough_doc = max(_value(row, 'depth_of_cut_max'), 0.1)
+    rough_rate = _value(row, 'feed_rate_max') * _value(row, 'spindle_speed_min') * speed_scale
+    finish_doc_max = _value(row, 'depth_of_cut_min')
+    finish_rate = _value(row, 'feed_rate_min') * _value(row, 'spindle_speed_min') * speed_scale
+
+    initial = columns['initial_diameter']
+    final = columns.get('final_diameter')
+    from_cut = initial + 2 * columns['cutting_depth'] if 'cutting_depth' in columns else np.full_like(initial, np.nan)
+    final = from_cut if final is None else np.where(np.isnan(final), from_cut, final)
+
+    radial = (final - initial) / 2
+    finish_doc = np.minimum(finish_doc_max, radial)
+    rough_passes = np.maximum(1, np.ceil(np.maximum(0, radial - finish_doc) / rough_doc))
+    depth = columns['depth']
+    rough_time = depth / rough_rate * rough_passes if rough_rate > 0 else np.zeros_like(depth)
+    finish_time = np.where(finish_doc > 0, depth / finish_rate, 0.0) if finish_rate > 0 else 0.0
+    minutes = (rough_time + finish_time) * 1.1
+
+    problems = [(~(final > initial), "Final diameter must be greater than initial diameter.")]
+    return minutes, problems
+
+
+def threading_minutes(rows, material_rating, columns):
+    """ThreadingOperation.calculate over arrays (feed equals the pitch, 7 passes)."""
+    spindle_speed = _value(rows[0], 'spindle_speed_min')
+    minutes = columns['length'] / (columns['pitch'] * spindle_speed) * 7 * 1.1
+    return minutes, []
+
+
+def knurling_minutes(rows, material_rating, columns):
+    """KnurlingOperation.calculate over arrays (two rough and finish passes)."""
+    rough, finish = _cut_rows(rows, 'knurling')
+    per_length = (
+        1.0 / (_value(rough, 'spindle_speed_min') * _value(rough, 'feed_rate_max'))
+        + 1.0 / (_value(finish, 'spindle_speed_max') * _value(finish, 'feed_rate_min'))
+    )
+    return columns['length'] * per_length * 2 * 1.1, []
+
+
+def grooving_minutes(rows, material_rating, columns):
+    """GroovingOperation.calculate over arrays (20 mm job diameter assumed)."""
+    rough, finish = _cut_rows(rows, 'grooving')
+    circumference = 3.14 * 20
+    per_pass = (
+        circumference / (_value(rough, 'feed_rate_max') * _value(rough, 'spindle_speed_min'))
+        + circumference / (_value(finish, 'feed_rate_min') * _value(finish, 'spindle_speed_max'))
+    )
+    passes = np.maximum(1, np.ceil(columns['width'] / _value(rough, 'depth_of_cut_max')))
+    return passes * per_pass * 1.2, []
+
+
+KERNELS = {
+    'turning': turning_minutes,
+    'facing': facing_minutes,
+    'drilling': drilling_minutes,
+    'boring': boring_minutes,
+    'threading': threading_minutes,
+    'knurling': knurling_minutes,
+    'grooving': grooving_minutes,
+}
+
+
+# Inputs the kernels do not model; operations that give them are priced by their class
+SCALAR_FIELDS = {
+    'drilling': ('holes', 'pattern'),
+    'turning': ('profile',),
+}
+
+
+def supports(operation_name, dimensions):
+    """Whether an operation with these dimensions can go through KERNELS."""
+    if operation_name not in KERNELS:
+        return False
+    return not any(dimensions.get(name) is not None for name in SCALAR_FIELDS.get(operation_name, ()))
+
+
+def stack_dimensions(records):
+    """
+    Column arrays from normalized Dimensions records of one operation.
+
+    Numeric fields become float arrays with NaN where a record does not give
+    them; text fields (e.g. the thread type) are left out.
+    """
+    names = {}
+    for record in records:
+        for name, value in record.items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                names.setdefault(name, None)
+    return {
+        name: np.fromiter((record.get(name, np.nan) for record in records), dtype=float, count=len(records))
+        for name in names
+    }
+
+
+def operation_minutes(operation_name, rows, material_rating, records):
+    """
+    Total time in minutes for many operations of one kind on one material.
+
+    Args:
+        operation_name (str): Lowercase operation name; must be in KERNELS
+        rows (list): MachiningParameter rows for the material and operation
+        material_rating (float): Machinability rating of the material (0-1)
+        records (list): Normalized Dimensions records, already validated
+
+    Returns:
+        tuple: (minutes array, list of error messages or None per record)
+
+    Raises:
+        KeyError: If the operation has no kernel
+        ValueError: If the parameter rows are incomplete
+    """
+    kernel = KERNELS[operation_name]
+    minutes, problems = kernel(rows, material_rating, stack_dimensions(records))
+    minutes = np.broadcast_to(np.asarray(minutes, dtype=float), (len(records),)).copy()
+
+    errors = [None] * len(records)
+    for mask, message in problems:
+        for index in np.flatnonzero(mask):
+            if errors[index] is None:
+                errors[index] = message
+    bad = ~np.isfinite(minutes)
+    for index in np.flatnonzero(bad):
+        if errors[index] is None:
+            errors[index] = f"Could not calculate {operation_name} time from the given dimensions."
+    minutes[[error is not None for error in errors]] = np.nan
+    return minutes, errors
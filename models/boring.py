@@ -1,5 +1,57 @@
+import logging
 import math
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from .results import FailedResult, OperationResult
+
+logger = logging.getLogger(__name__)
+
+
+class BoringResult(OperationResult):
+    """Boring: rough passes then a finish pass."""
+
+    __slots__ = ('material_rating', 'rough', 'finish', 'rough_passes', 'actual_rough_doc', 'feed_rate_rough',
+                 'rough_time_per_pass', 'rough_time', 'finish_doc', 'finish_time')
+
+    FIELDS = ('operation', 'total_time_minutes', 'material_rating', 'machine_hour_rate', 'rough_cut',
+              'finish_cut', 'cost', 'warnings')
+
+    def __init__(self, total_time_minutes, cost, warnings, material_rating, machine_hour_rate, rough, finish,
+                 rough_passes, actual_rough_doc, feed_rate_rough, rough_time_per_pass, rough_time,
+                 finish_doc, finish_time):
+        super().__init__('boring', total_time_minutes, cost, warnings)
+        self.material_rating = material_rating
+        self.machine_hour_rate = machine_hour_rate
+        self.rough = rough
+        self.finish = finish
+        self.rough_passes = rough_passes
+        self.actual_rough_doc = actual_rough_doc
+        self.feed_rate_rough = feed_rate_rough
+        self.rough_time_per_pass = rough_time_per_pass
+        self.rough_time = rough_time
+        self.finish_doc = finish_doc
+        self.finish_time = finish_time
+
+    def render_rough_cut(self):
+        return {
+            'passes': self.rough_passes,
+            'depth_per_pass_mm': round(self.actual_rough_doc, 3),
+            'feed_mm_per_rev': round(self.rough['feed'], 3),
+            'spindle_speed_rpm': round(self.rough['spindle_speed'], 0),
+            'feed_rate_mm_per_min': round(self.feed_rate_rough, 1),
+            'time_per_pass_min': round(self.rough_time_per_pass, 3),
+            'total_time_min': round(self.rough_time, 3),
+        }
+
+    def render_finish_cut(self):
+        return {
+            'depth_mm': round(self.finish_doc, 3),
+            'feed_mm_per_rev': round(self.finish['feed'], 3),
+            'spindle_speed_rpm': round(self.finish['spindle_speed'], 0),
+            'feed_rate_mm_per_min': round(self.finish['feed'] * self.finish['spindle_speed'], 1),
+            'time_min': round(self.finish_time, 3),
+        }
+
 
 class BoringOperation(BaseOperation):
     """Class for boring operation calculations with rough and finish cuts."""
@@ -37,24 +89,16 @@ class BoringOperation(BaseOperation):
         1. initial_diameter, final_diameter, depth
         2. hole_diameter (initial_diameter), hole_depth (depth), cutting_depth (final_diameter - initial_diameter)
         """
+        dims = normalize('boring', input_dims)
         try:
-            # Try to get values using both naming conventions
-            initial_diameter = input_dims.get('initial_diameter') or input_dims.get('hole_diameter')
-            depth = input_dims.get('depth') or input_dims.get('hole_depth')
-            
-            if 'final_diameter' in input_dims:
-                final_diameter = input_dims['final_diameter']
-            elif 'hole_diameter' in input_dims and 'cutting_depth' in input_dims:
-                final_diameter = input_dims['hole_diameter'] + 2 * float(input_dims['cutting_depth'])
+            self.initial_diameter = float(dims['initial_diameter'])
+            self.depth = float(dims['depth'])
+            if 'final_diameter' in dims:
+                self.final_diameter = float(dims['final_diameter'])
             else:
-                raise KeyError("Missing required parameters")
-                
-            # Convert and validate
-            self.initial_diameter = float(initial_diameter)
-            self.final_diameter = float(final_diameter)
-            self.depth = float(depth)
+                self.final_diameter = self.initial_diameter + 2 * float(dims['cutting_depth'])
             
-        except (KeyError, ValueError) as e:
+        except (KeyError, TypeError, ValueError) as e:
             raise ValueError(
                 "Must provide either (initial_diameter, final_diameter, depth) "
                 "or (hole_diameter, hole_depth, cutting_depth)."
@@ -133,7 +177,7 @@ class BoringOperation(BaseOperation):
         Calculate boring operation time and cost.
         
         Returns:
-            dict: Dictionary containing operation results including time, cost, and parameters
+            BoringResult: Time, cost and per-cut parameters, or a FailedResult
         """
         try:
             # Total radial stock to remove
@@ -177,55 +221,32 @@ class BoringOperation(BaseOperation):
             # Generate warnings
             warnings = []
             if rough_passes > 3:
-                warnings.append(f"High number of roughing passes ({rough_passes}) - consider increasing depth of cut.")
+                warnings.append(("High number of roughing passes ({}) - consider increasing depth of cut.", (rough_passes,)))
                 
             if feed_rate_rough > 1000:
-                warnings.append(f"High rough cut feed rate: {feed_rate_rough:.1f} mm/min")
+                warnings.append(("High rough cut feed rate: {:.1f} mm/min", (feed_rate_rough,)))
                 
             if finish_doc > 0 and finish_params['feed'] * finish_params['spindle_speed'] > 800:
-                warnings.append("High finish cut feed rate.")
+                warnings.append(("High finish cut feed rate.", ()))
                 
             if actual_rough_doc < 0.1:
-                warnings.append("Very small roughing depth of cut - consider adjusting parameters.")
+                warnings.append(("Very small roughing depth of cut - consider adjusting parameters.", ()))
 
-            # Prepare result
-            result = {
-                'operation': 'boring',
-                'total_time_minutes': round(total_cutting_time, 3),
-                'material_rating': self.material_rating,
-                'machine_hour_rate': machine_hour_rate,
-                'rough_cut': {
-                    'passes': rough_passes,
-                    'depth_per_pass_mm': round(actual_rough_doc, 3),
-                    'feed_mm_per_rev': round(rough_params['feed'], 3),
-                    'spindle_speed_rpm': round(rough_params['spindle_speed'], 0),
-                    'feed_rate_mm_per_min': round(feed_rate_rough, 1),
-                    'time_per_pass_min': round(rough_time_per_pass, 3),
-                    'total_time_min': round(total_rough_time, 3),
-                },
-                'finish_cut': {
-                    'depth_mm': round(finish_doc, 3),
-                    'feed_mm_per_rev': round(finish_params['feed'], 3),
-                    'spindle_speed_rpm': round(finish_params['spindle_speed'], 0),
-                    'feed_rate_mm_per_min': round(finish_params['feed'] * finish_params['spindle_speed'], 1),
-                    'time_min': round(finish_time, 3),
-                },
-                'cost': round(cost, 2),
-                'warnings': warnings
-            }
-            
-            return result
+            return BoringResult(
+                total_cutting_time, cost, warnings, self.material_rating, machine_hour_rate, rough_params,
+                finish_params, rough_passes, actual_rough_doc, feed_rate_rough, rough_time_per_pass,
+                total_rough_time, finish_doc, finish_time
+            )
 
         except Exception as e:
             error_msg = f'Error in boring calculation: {str(e)}'
             import traceback
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
-            return {
-                'error': error_msg,
+            return FailedResult(error_msg, {
                 'operation': 'boring',
                 'parameters': {
                     'initial_diameter_mm': getattr(self, 'initial_diameter', 0),
                     'final_diameter_mm': getattr(self, 'final_diameter', 0),
                     'depth_mm': getattr(self, 'depth', 0)
                 }
-            }
+            })
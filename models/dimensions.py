@@ -0,0 +1,184 @@
+from collections.abc import Mapping
+
+# Canonical dimension names per operation and the request keys accepted for each.
+#
+# Requests from the UI, the API and imported plans use different names for the
+# same dimension (start_diameter/initial_diameter, hole_depth/depth, ...).
+# normalize() resolves them once, up front, into an immutable Dimensions record
+# keyed by the canonical names below, so operation classes, validators and
+# cache keys all see the same thing. An alias counts as given when its value is
+# not None or an empty string; 0 is a value, not a missing field.
+#
+# Each entry is (canonical name, accepted keys in order of preference, kind).
+# Numbers are converted to float/int here when possible; values that do not
+# convert are kept as given so the validator can report them.
+
+DIMENSION_FIELDS = {
+    'turning': (
+        ('initial_diameter', ('start_diameter', 'initial_diameter'), float),
+        ('final_diameter', ('end_diameter', 'final_diameter'), float),
+        ('length', ('length',), float),
+    ),
+    'facing': (
+        ('diameter', ('diameter',), float),
+        ('depth_of_cut', ('depth_of_cut',), float),
+    ),
+    'drilling': (
+        ('diameter', ('diameter', 'hole_diameter'), float),
+        ('depth', ('depth', 'hole_depth'), float),
+        ('peck_depth', ('peck_depth',), float),
+        ('retract_distance', ('retract_distance',), float),
+        ('rapid_rate', ('rapid_rate', 'rapid_traverse_rate'), float),
+    ),
+    'boring': (
+        ('initial_diameter', ('initial_diameter', 'hole_diameter'), float),
+        ('depth', ('depth', 'hole_depth'), float),
+        ('final_diameter', ('final_diameter',), float),
+        ('cutting_depth', ('cutting_depth',), float),
+    ),
+    'reaming': (
+        ('diameter', ('diameter', 'hole_diameter'), float),
+        ('depth', ('depth', 'hole_depth'), float),
+    ),
+    'threading': (
+        ('diameter', ('diameter', 'thread_diameter'), float),
+        ('length', ('length', 'thread_length'), float),
+        ('pitch', ('pitch', 'thread_pitch'), float),
+        ('threads_per_pass', ('threads_per_pass',), int),
+        ('type', ('type',), str),
+    ),
+    'knurling': (
+        ('length', ('knurling_length', 'length'), float),
+        ('diameter', ('workpiece_diameter', 'diameter'), float),
+    ),
+    'parting': (
+        ('diameter', ('diameter', 'parting_diameter'), float),
+        ('depth', ('depth',), float),
+        ('width', ('width', 'tool_width'), float),
+    ),
+    'grooving': (
+        ('width', ('groove_width', 'width'), float),
+        ('depth', ('groove_depth', 'depth'), float),
+    ),
+}
+
+
+def _compile(fields):
+    """Precompute the alias lookups of one operation."""
+    plan = tuple((name, aliases, kind) for name, aliases, kind in fields)
+    consumed = frozenset(alias for _, aliases, _ in fields for alias in aliases)
+    return plan, consumed
+
+
+_PLANS = {operation: _compile(fields) for operation, fields in DIMENSION_FIELDS.items()}
+
+
+def _convert(value, kind):
+    if isinstance(value, bool):
+        return value
+    try:
+        if kind is float:
+            return float(value)
+        if kind is int:
+            number = float(value)
+            return int(number) if number.is_integer() else number
+    except (TypeError, ValueError):
+        return value
+    return str(value).strip().lower()
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+class Dimensions(Mapping):
+    """
+    Immutable, hashable mapping of canonical dimension names to values.
+
+    Behaves like a read-only dict, so operation classes keep using .get() and
+    [] on it. Fields that were not given are absent rather than None.
+    """
+
+    __slots__ = ('operation', '_values', '_key')
+
+    def __init__(self, operation, values):
+        self.operation = operation
+        self._values = dict(values)
+        self._key = None
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"Dimensions({self.operation!r}, {self._values!r})"
+
+    @property
+    def key(self):
+        """Hashable identity of the record, for cache keys."""
+        if self._key is None:
+            self._key = (self.operation, tuple(sorted((k, _freeze(v)) for k, v in self._values.items())))
+        return self._key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __eq__(self, other):
+        if isinstance(other, Dimensions):
+            return self.key == other.key
+        return Mapping.__eq__(self, other)
+
+    def to_dict(self):
+        """Plain dict copy, e.g. for JSON responses."""
+        return dict(self._values)
+
+
+def normalize(operation_name, input_dims):
+    """
+    Resolve request keys to the canonical dimensions of an operation.
+
+    Keys that are not aliases of a known field are kept unchanged (extra UI
+    fields such as feed or spindle_speed, or operations without an alias map).
+    A Dimensions record for the same operation is returned as is.
+
+    Args:
+        operation_name (str): Operation name, case-insensitive
+        input_dims (Mapping): Dimensions from the request; never modified
+
+    Returns:
+        Dimensions: Canonical, immutable dimensions
+
+    Raises:
+        ValueError: If operation_name is not a string or input_dims not a mapping
+    """
+    if operation_name is not None and not isinstance(operation_name, str):
+        raise ValueError("operation_name must be a string.")
+    operation = (operation_name or '').lower()
+    if isinstance(input_dims, Dimensions) and input_dims.operation == operation:
+        return input_dims
+    input_dims = input_dims or {}
+    if not isinstance(input_dims, Mapping):
+        raise ValueError("dimensions must be an object.")
+
+    plan = _PLANS.get(operation)
+    if plan is None:
+        return Dimensions(operation, input_dims)
+
+    fields, consumed = plan
+    values = {key: value for key, value in input_dims.items() if key not in consumed}
+    for name, aliases, kind in fields:
+        for alias in aliases:
+            value = input_dims.get(alias)
+            if value is not None and value != '':
+                values[name] = _convert(value, kind)
+                break
+    return Dimensions(operation, values)
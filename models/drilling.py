@@ -1,5 +1,84 @@
+import logging
 import math
+import tracing
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from . import hole_pattern
+from .results import FailedResult, OperationResult
+
+logger = logging.getLogger(__name__)
+
+
+class DrillingResult(OperationResult):
+    """Peck drilling of one hole, or of every hole of a pattern plus the traverse between them."""
+
+    __slots__ = ('material_rating', 'diameter', 'depth', 'peck_depth', 'feed', 'spindle_speed',
+                 'feed_rate', 'peck_count', 'total_travel', 'hole_time', 'plan', 'hole_count',
+                 'drilling_time', 'traverse_time', 'rapid_rate', 'start')
+
+    FIELDS = ('operation', 'total_time_minutes', 'cost', 'material_rating', 'machine_hour_rate', 'parameters',
+              'warnings')
+    PATTERN_FIELDS = FIELDS + ('hole_pattern',)
+
+    def __init__(self, total_time_minutes, cost, warnings, material_rating, machine_hour_rate, diameter, depth,
+                 peck_depth, feed, spindle_speed, feed_rate, peck_count, total_travel):
+        super().__init__('drilling', total_time_minutes, cost, warnings)
+        self.material_rating = material_rating
+        self.machine_hour_rate = machine_hour_rate
+        self.diameter = diameter
+        self.depth = depth
+        self.peck_depth = peck_depth
+        self.feed = feed
+        self.spindle_speed = spindle_speed
+        self.feed_rate = feed_rate
+        self.peck_count = peck_count
+        self.total_travel = total_travel
+        self.plan = None
+
+    def set_pattern(self, plan, hole_time, hole_count, drilling_time, traverse_time, rapid_rate, start):
+        """Turn the single-hole result into the totals for a hole pattern."""
+        self.plan = plan
+        self.hole_time = hole_time
+        self.hole_count = hole_count
+        self.drilling_time = drilling_time
+        self.traverse_time = traverse_time
+        self.rapid_rate = rapid_rate
+        self.start = start
+
+    def field_names(self):
+        names = list(self.FIELDS if self.plan is None else self.PATTERN_FIELDS)
+        for name in self.META_FIELDS:
+            if name not in names and getattr(self, name) is not None:
+                names.append(name)
+        return names
+
+    def render_parameters(self):
+        return {
+            'diameter_mm': round(self.diameter, 2),
+            'depth_mm': round(self.depth, 2),
+            'peck_depth_mm': round(self.peck_depth, 2),
+            'feed_mm_per_rev': round(self.feed, 3),
+            'spindle_speed_rpm': round(self.spindle_speed, 1),
+            'feed_rate_mm_per_min': round(self.feed_rate, 1),
+            'peck_count': self.peck_count,
+            'total_travel_mm': round(self.total_travel, 2)
+        }
+
+    def render_hole_pattern(self):
+        plan = self.plan
+        return {
+            'hole_count': self.hole_count,
+            'time_per_hole_minutes': round(self.hole_time, 3),
+            'drilling_time_minutes': round(self.drilling_time, 3),
+            'traverse_time_minutes': round(self.traverse_time, 3),
+            'rapid_rate_mm_per_min': self.rapid_rate,
+            'traverse_length_mm': round(plan['path_length_mm'], 2),
+            'nearest_neighbour_length_mm': round(plan['nearest_neighbour_length_mm'], 2),
+            'two_opt_moves': plan['two_opt_moves'],
+            'sequencing_seconds': round(plan['sequencing_seconds'], 4),
+            'start': list(self.start),
+            'order': plan['order'].tolist()
+        }
 
 class DrillingOperation(BaseOperation):
     """Class for drilling operation calculations with peck drilling support."""
@@ -15,6 +94,11 @@ class DrillingOperation(BaseOperation):
                 - diameter (float): Drill diameter in mm (required)
                 - depth (float): Hole depth in mm (required)
                 - peck_depth (float, optional): Depth per peck in mm (default: 3x diameter)
+                - holes / pattern (optional): Hole coordinates or pattern generators
+                  (see models.hole_pattern.expand); the result then covers every
+                  hole plus the rapid traverse between them
+                - start (optional): [x, y] tool start point for a pattern (default origin)
+                - rapid_rate (float, optional): Rapid traverse rate in mm/min
         """
         super().__init__(db_params, material_rating)
         self.db_params = db_params
@@ -25,6 +109,9 @@ class DrillingOperation(BaseOperation):
         self.depth = 0.0
         self.peck_depth = 0.0  # Will be set based on diameter if not provided
         self.retract_distance = 2.0  # Standard retract distance in mm
+        self.holes = None  # (n, 2) hole coordinates in pattern mode
+        self.start = (0.0, 0.0)
+        self.rapid_rate = hole_pattern.DEFAULT_RAPID_RATE
         
         if input_dims:
             self.set_dimensions(input_dims)
@@ -39,26 +126,19 @@ class DrillingOperation(BaseOperation):
                 - depth or hole_depth (float): Hole depth in mm
                 - peck_depth (float, optional): Depth per peck in mm
         """
+        dims = normalize('drilling', input_dims)
         try:
-            # Support both 'diameter' and 'hole_diameter' for backward compatibility
-            self.diameter = float(
-                input_dims.get('diameter') or 
-                input_dims.get('hole_diameter')
-            )
-            # Support both 'depth' and 'hole_depth' for backward compatibility
-            self.depth = float(
-                input_dims.get('depth') or 
-                input_dims.get('hole_depth')
-            )
+            self.diameter = float(dims['diameter'])
+            self.depth = float(dims['depth'])
             
             # Set peck depth to 3x diameter if not provided, but not more than 15mm
             default_peck = min(3 * self.diameter, 15.0)
-            self.peck_depth = float(input_dims.get('peck_depth', default_peck))
+            self.peck_depth = float(dims.get('peck_depth', default_peck))
             
             # Ensure retract distance is positive and reasonable
-            self.retract_distance = max(1.0, min(5.0, float(input_dims.get('retract_distance', 2.0))))
+            self.retract_distance = max(1.0, min(5.0, float(dims.get('retract_distance', 2.0))))
             
-        except (KeyError, ValueError) as e:
+        except (KeyError, TypeError, ValueError) as e:
             required_keys = [
                 'diameter', 'hole_diameter', 
                 'depth', 'hole_depth'
@@ -80,6 +160,16 @@ class DrillingOperation(BaseOperation):
         if self.peck_depth > 20.0:  # Safety limit
             raise ValueError(f"Peck depth ({self.peck_depth}mm) exceeds maximum allowed (20mm).")
 
+        # Hole pattern mode: the same hole at every position of the pattern
+        if dims.get('holes') is not None or dims.get('pattern') is not None:
+            with tracing.span('hole_pattern.expand') as span:
+                self.holes = hole_pattern.expand(dims.get('pattern'), dims.get('holes'))
+                span.set_attribute('holes', len(self.holes))
+            self.start = hole_pattern.as_point(dims.get('start') or (0.0, 0.0), 'start')
+            self.rapid_rate = float(dims.get('rapid_rate', hole_pattern.DEFAULT_RAPID_RATE))
+            if self.rapid_rate <= 0:
+                raise ValueError("Rapid traverse rate must be positive.")
+
     def _get_machining_parameters(self):
         """
         Retrieve feed and spindle speed for drilling.
@@ -112,12 +202,27 @@ class DrillingOperation(BaseOperation):
             'spindle_speed': round(spindle_speed, 1)  # RPM
         }
 
+    def _apply_pattern(self, result, hole_time, machine_hour_rate):
+        """
+        Totals for a hole pattern: every hole at hole_time plus rapid traverse
+        along a travel-minimizing hole order.
+        """
+        with tracing.span('hole_pattern.sequence', holes=len(self.holes)):
+            plan = hole_pattern.sequence(self.holes, self.start)
+        hole_count = len(self.holes)
+        drilling_time = hole_time * hole_count
+        traverse_time = plan['path_length_mm'] / self.rapid_rate
+        total_time = drilling_time + traverse_time
+        result.total_time_minutes = total_time
+        result.cost = (total_time / 60) * machine_hour_rate
+        result.set_pattern(plan, hole_time, hole_count, drilling_time, traverse_time, self.rapid_rate, self.start)
+
     def calculate(self, inputs=None):
         """
         Calculate drilling time and cost.
         
         Returns:
-            dict: Dictionary containing operation results including time, cost, and parameters
+            DrillingResult: Time, cost and parameters, or a FailedResult
         """
         try:
             # Get machining parameters
@@ -147,43 +252,31 @@ class DrillingOperation(BaseOperation):
             # Generate warnings if needed
             warnings = []
             if feed_rate_mm_min > 1000:
-                warnings.append(f"High feed rate: {feed_rate_mm_min:.1f} mm/min")
+                warnings.append(("High feed rate: {:.1f} mm/min", (feed_rate_mm_min,)))
             if peck_count > 1:
-                warnings.append(f"Using {peck_count} pecks with {self.retract_distance}mm retract")
+                warnings.append(("Using {} pecks with {}mm retract", (peck_count, self.retract_distance)))
             if self.diameter < 3.0 and feed > 0.1:
-                warnings.append("Consider reducing feed rate for small diameter drills")
+                warnings.append(("Consider reducing feed rate for small diameter drills", ()))
                 
             # Prepare result
-            result = {
-                'operation': 'drilling',
-                'total_time_minutes': round(total_time, 3),
-                'cost': round(cost, 2),
-                'material_rating': self.material_rating,
-                'machine_hour_rate': machine_hour_rate,
-                'parameters': {
-                    'diameter_mm': round(self.diameter, 2),
-                    'depth_mm': round(self.depth, 2),
-                    'peck_depth_mm': round(self.peck_depth, 2),
-                    'feed_mm_per_rev': round(feed, 3),
-                    'spindle_speed_rpm': round(spindle_speed, 1),
-                    'feed_rate_mm_per_min': round(feed_rate_mm_min, 1),
-                    'peck_count': peck_count,
-                    'total_travel_mm': round(total_travel, 2)
-                },
-                'warnings': warnings
-            }
-            
+            result = DrillingResult(
+                total_time, cost, warnings, self.material_rating, machine_hour_rate, self.diameter, self.depth,
+                self.peck_depth, feed, spindle_speed, feed_rate_mm_min, peck_count, total_travel
+            )
+
+            if self.holes is not None:
+                self._apply_pattern(result, total_time, machine_hour_rate)
+
             return result
             
         except Exception as e:
             error_msg = f'Error in drilling calculation: {str(e)}'
             import traceback
             logger.error(f"{error_msg}\n{traceback.format_exc()}")
-            return {
-                'error': error_msg,
+            return FailedResult(error_msg, {
                 'operation': 'drilling',
                 'parameters': {
                     'diameter_mm': getattr(self, 'diameter', 0),
                     'depth_mm': getattr(self, 'depth', 0)
                 }
-            }
+            })
@@ -1,11 +1,83 @@
+import logging
 import math
+import tracing
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from .results import OperationResult
+
+
+class FacingResult(OperationResult):
+    """Facing: rough passes, one semi-finish and one finish pass."""
+
+    __slots__ = ('rough_speed', 'rough_feed', 'semi_speed', 'semi_feed', 'semi_doc', 'finish_speed',
+                 'finish_feed', 'finish_doc', 'rough_passes', 'semi_passes', 'finish_passes',
+                 'actual_rough_doc', 'rough_time', 'semi_time', 'finish_time')
+
+    FIELDS = ('operation', 'total_time_minutes', 'rough_cut', 'semi_finish_cut', 'finish_cut', 'cost', 'warnings')
+
+    def __init__(self, total_time_minutes, cost, rough_speed, rough_feed, semi_speed, semi_feed, semi_doc,
+                 finish_speed, finish_feed, finish_doc, rough_passes, semi_passes, finish_passes,
+                 actual_rough_doc, rough_time, semi_time, finish_time):
+        super().__init__('facing', total_time_minutes, cost)
+        self.rough_speed = rough_speed
+        self.rough_feed = rough_feed
+        self.semi_speed = semi_speed
+        self.semi_feed = semi_feed
+        self.semi_doc = semi_doc
+        self.finish_speed = finish_speed
+        self.finish_feed = finish_feed
+        self.finish_doc = finish_doc
+        self.rough_passes = rough_passes
+        self.semi_passes = semi_passes
+        self.finish_passes = finish_passes
+        self.actual_rough_doc = actual_rough_doc
+        self.rough_time = rough_time
+        self.semi_time = semi_time
+        self.finish_time = finish_time
+
+    def render_rough_cut(self):
+        return {
+            'passes': self.rough_passes,
+            'depth_per_pass': round(self.actual_rough_doc, 3),
+            'spindle_speed': self.rough_speed,
+            'feed': self.rough_feed,
+            'time_per_pass': round(self.rough_time, 3),
+            'total_time': round(self.rough_time * self.rough_passes, 3),
+        }
+
+    def render_semi_finish_cut(self):
+        return {
+            'passes': self.semi_passes,
+            'depth': round(self.semi_doc, 3),
+            'spindle_speed': self.semi_speed,
+            'feed': self.semi_feed,
+            'time': round(self.semi_time * self.semi_passes, 3),
+        }
+
+    def render_finish_cut(self):
+        return {
+            'passes': self.finish_passes,
+            'depth': round(self.finish_doc, 3),
+            'spindle_speed': self.finish_speed,
+            'feed': self.finish_feed,
+            'time': round(self.finish_time * self.finish_passes, 3),
+        }
+
+    def render_warnings(self):
+        return [
+            f"{self.rough_passes} rough passes",
+            f"{self.semi_passes} semi-finish pass",
+            f"{self.finish_passes} finish pass",
+        ]
+
 
 class FacingOperation(BaseOperation):
     def __init__(self, db_params, material_rating, input_dims=None):
         """
         Args:
-            db_params: SQLAlchemy model object containing machining parameters
+            db_params: MachiningParameter rows for the material (rough and finish
+                entries, picked by their notes), or a single SQLAlchemy row, in
+                which case they are looked up again through its session
             material_rating (float): Material machinability rating (0-1)
             input_dims (dict): Dictionary containing 'diameter' and 'depth_of_cut'
         """
@@ -14,7 +86,8 @@ class FacingOperation(BaseOperation):
         # Store parameters
         self.db_params = db_params
         self.material_rating = material_rating
-        self.db = db_params.query.session  # Get SQLAlchemy session
+        self.rows = list(db_params) if isinstance(db_params, (list, tuple)) else None
+        self.db = None if self.rows is not None else db_params.query.session  # Get SQLAlchemy session
         
         # Initialize dimensions
         self.diameter = 0.0
@@ -23,13 +96,24 @@ class FacingOperation(BaseOperation):
             self.set_dimensions(input_dims)
 
     def set_dimensions(self, input_dims):
-        self.diameter = float(input_dims.get('diameter'))
-        self.depth_of_cut = float(input_dims.get('depth_of_cut'))
+        dims = normalize('facing', input_dims)
+        try:
+            self.diameter = float(dims['diameter'])
+            self.depth_of_cut = float(dims['depth_of_cut'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("diameter and depth_of_cut are required and must be numbers.") from e
         if self.diameter <= 0 or self.depth_of_cut <= 0:
             raise ValueError("Diameter and depth_of_cut must be positive numbers.")
 
+    @tracing.traced('facing.parameters')
     def _get_parameters(self, material_id, operation_id, cut_type):
         """Helper method to fetch parameters for a specific cut type"""
+        if self.rows is not None:
+            params = next((row for row in self.rows if cut_type.lower() in (row.notes or '').lower()), None)
+            if not params:
+                raise ValueError(f"No {cut_type.lower()} parameters found for facing")
+            return params
+
         from app import MachiningParameter  # Import here to avoid circular imports
         
         params = self.db.query(MachiningParameter).filter(
@@ -107,35 +191,8 @@ class FacingOperation(BaseOperation):
         total_time = ((rough_time * rough_passes) + (semi_time * semi_passes) + (finish_time * finish_passes)) * 1.1
         cost = (total_time / 60.0) * float(getattr(self.db_params, 'machine_hour_rate', 150.0))
 
-        return {
-            'operation': 'facing',
-            'total_time_minutes': round(total_time, 3),
-            'rough_cut': {
-                'passes': rough_passes,
-                'depth_per_pass': round(actual_rough_doc, 3),
-                'spindle_speed': rough_speed,
-                'feed': rough_feed,
-                'time_per_pass': round(rough_time, 3),
-                'total_time': round(rough_time * rough_passes, 3),
-            },
-            'semi_finish_cut': {
-                'passes': semi_passes,
-                'depth': round(semi_doc, 3),
-                'spindle_speed': semi_speed,
-                'feed': semi_feed,
-                'time': round(semi_time * semi_passes, 3),
-            },
-            'finish_cut': {
-                'passes': finish_passes,
-                'depth': round(finish_doc, 3),
-                'spindle_speed': finish_speed,
-                'feed': finish_feed,
-                'time': round(finish_time * finish_passes, 3),
-            },
-            'cost': round(cost, 2),
-            'warnings': [
-                f"{rough_passes} rough passes",
-                f"{semi_passes} semi-finish pass",
-                f"{finish_passes} finish pass",
-            ]
-        }
+        return FacingResult(
+            total_time, cost, rough_speed, rough_feed, semi_speed, semi_feed, semi_doc, finish_speed,
+            finish_feed, finish_doc, rough_passes, semi_passes, finish_passes, actual_rough_doc,
+            rough_time, semi_time, finish_time
+        )
@@ -1,5 +1,53 @@
 import math
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from .results import FailedResult, OperationResult
+
+
+class GroovingResult(OperationResult):
+    """Grooving: rough and finish passes across the groove width."""
+
+    __slots__ = ('width', 'depth', 'rough', 'finish', 'passes', 'rough_time_per_pass', 'finish_time_per_pass',
+                 'rough_time', 'finish_time')
+
+    FIELDS = ('operation', 'total_time_minutes', 'cost', 'groove_width', 'groove_depth', 'rough_cut',
+              'finish_cut', 'warnings')
+
+    def __init__(self, total_time_minutes, cost, width, depth, rough, finish, passes, rough_time_per_pass,
+                 finish_time_per_pass, rough_time, finish_time):
+        super().__init__('grooving', total_time_minutes, cost)
+        self.width = width
+        self.depth = depth
+        self.rough = rough
+        self.finish = finish
+        self.passes = passes
+        self.rough_time_per_pass = rough_time_per_pass
+        self.finish_time_per_pass = finish_time_per_pass
+        self.rough_time = rough_time
+        self.finish_time = finish_time
+
+    def render_groove_width(self):
+        return round(self.width, 2)
+
+    def render_groove_depth(self):
+        return round(self.depth, 2)
+
+    def _cut(self, params, time_per_pass, total_time):
+        return {
+            'passes': self.passes,
+            'spindle_speed': round(params['spindle_speed']),
+            'feed': round(params['feed'], 3),
+            'depth_of_cut': round(params['depth_of_cut'], 2),
+            'time_per_pass': round(time_per_pass, 3),
+            'total_time': round(total_time, 3)
+        }
+
+    def render_rough_cut(self):
+        return self._cut(self.rough, self.rough_time_per_pass, self.rough_time)
+
+    def render_finish_cut(self):
+        return self._cut(self.finish, self.finish_time_per_pass, self.finish_time)
+
 
 class GroovingOperation(BaseOperation):
     """Class for grooving (undercut) operation time and cost estimation."""
@@ -15,10 +63,11 @@ class GroovingOperation(BaseOperation):
             self.set_dimensions(input_dims)
 
     def set_dimensions(self, input_dims):
+        dims = normalize('grooving', input_dims)
         try:
-            self.width = float(input_dims.get('groove_width') or input_dims['width'])
-            self.depth = float(input_dims.get('groove_depth') or input_dims['depth'])
-        except (KeyError, ValueError) as e:
+            self.width = float(dims['width'])
+            self.depth = float(dims['depth'])
+        except (KeyError, TypeError, ValueError) as e:
             raise ValueError("Both groove_width and groove_depth must be provided as positive numbers.") from e
 
         if self.width <= 0 or self.depth <= 0:
@@ -70,31 +119,11 @@ class GroovingOperation(BaseOperation):
             self.MACHINE_HOUR_RATE = 150.0
             cost = (total_time / 60) * self.MACHINE_HOUR_RATE
 
-            return {
-                'operation': 'grooving',
-                'total_time_minutes': round(total_time, 3),
-                'cost': round(cost, 2),
-                'groove_width': round(self.width, 2),
-                'groove_depth': round(self.depth, 2),
-                'rough_cut': {
-                    'passes': num_passes,
-                    'spindle_speed': round(rough['spindle_speed']),
-                    'feed': round(rough['feed'], 3),
-                    'depth_of_cut': round(rough['depth_of_cut'], 2),
-                    'time_per_pass': round(rough_time_per_pass, 3),
-                    'total_time': round(total_rough_time, 3)
-                },
-                'finish_cut': {
-                    'passes': num_passes,
-                    'spindle_speed': round(finish['spindle_speed']),
-                    'feed': round(finish['feed'], 3),
-                    'depth_of_cut': round(finish['depth_of_cut'], 2),
-                    'time_per_pass': round(finish_time_per_pass, 3),
-                    'total_time': round(total_finish_time, 3)
-                },
-                'warnings': []
-            }
+            return GroovingResult(
+                total_time, cost, self.width, self.depth, rough, finish, num_passes, rough_time_per_pass,
+                finish_time_per_pass, total_rough_time, total_finish_time
+            )
 
         except Exception as e:
             import traceback
-            return {'error': f"Error in grooving calculation: {str(e)}\n{traceback.format_exc()}"}
+            return FailedResult(f"Error in grooving calculation: {str(e)}\n{traceback.format_exc()}")
@@ -0,0 +1,418 @@
+import math
+import time
+
+import numpy as np
+
+# Hole patterns for drilling: expansion of pattern generators into hole
+# coordinates and ordering of the holes to keep rapid travel short.
+#
+# Ordering is an open travelling-salesman path from the tool start point:
+#   1. greedy nearest neighbour, where the nearest unvisited hole is found by
+#      searching rings of cells of a uniform grid (a bucket spatial index)
+#      around the current hole, so each step looks at a handful of holes;
+#   2. 2-opt refinement restricted to each hole's NEIGHBOURS nearest holes
+#      (taken from the same grid), until no move improves the path or the
+#      time limit is reached.
+# Coordinates are in mm in the plane of the face being drilled.
+
+MAX_HOLES = 100_000
+# Nearest neighbours per hole considered by 2-opt
+NEIGHBOURS = 8
+DEFAULT_TIME_LIMIT = 0.25  # seconds of 2-opt refinement
+# Target number of holes per grid cell
+CELL_OCCUPANCY = 2.0
+# Rapid traverse rate between holes (mm/min) when the request does not give one
+DEFAULT_RAPID_RATE = 5000.0
+
+
+def as_point(value, name):
+    """(x, y) floats from an [x, y] pair; ValueError naming the field otherwise."""
+    try:
+        x, y = value
+        return float(x), float(y)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{name} must be an [x, y] pair.") from e
+
+
+def bolt_circle(center, radius, count, start_angle=0.0):
+    """
+    Holes equally spaced on a circle.
+
+    Args:
+        center (tuple): (x, y) of the circle centre
+        radius (float): Circle radius in mm (half the pitch circle diameter)
+        count (int): Number of holes
+        start_angle (float): Angle of the first hole in degrees
+
+    Returns:
+        numpy.ndarray: (count, 2) hole coordinates
+    """
+    angles = np.radians(start_angle) + np.arange(count) * (2 * math.pi / count)
+    return np.column_stack((center[0] + radius * np.cos(angles), center[1] + radius * np.sin(angles)))
+
+
+def grid(origin, rows, columns, pitch_x, pitch_y):
+    """
+    Holes on a rectangular grid, row by row from origin.
+
+    Returns:
+        numpy.ndarray: (rows * columns, 2) hole coordinates
+    """
+    xs = origin[0] + np.arange(columns) * pitch_x
+    ys = origin[1] + np.arange(rows) * pitch_y
+    gx, gy = np.meshgrid(xs, ys)
+    return np.column_stack((gx.ravel(), gy.ravel())).astype(float)
+
+
+def _number(feature, key, default=None):
+    value = feature.get(key, default)
+    if value is None:
+        raise KeyError(key)
+    try:
+        return float(value)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"{key} must be a number.") from e
+
+
+def _count(feature, key):
+    """A whole-number count; fractional, non-finite and non-numeric values are rejected."""
+    number = _number(feature, key)
+    if not number.is_integer():
+        raise ValueError(f"{key} must be a whole number.")
+    return int(number)
+
+
+def _feature_holes(feature, limit):
+    """Coordinates of one feature; counts are checked against limit before anything is allocated."""
+    kind = str(feature.get('type', 'points')).lower()
+    if kind == 'points':
+        points = feature.get('points', [])
+        if not isinstance(points, (list, tuple)):
+            raise ValueError("points must be a list of [x, y] pairs.")
+        if len(points) > limit:
+            raise ValueError(f"Hole patterns are limited to {MAX_HOLES} holes.")
+        try:
+            points = np.asarray(points, dtype=float)
+        except (TypeError, ValueError) as e:
+            raise ValueError("points must be a list of [x, y] pairs.") from e
+        if points.size == 0:
+            return points.reshape(0, 2)
+        if points.ndim != 2 or points.shape[1] != 2:
+            raise ValueError("points must be a list of [x, y] pairs.")
+        return points
+    if kind == 'bolt_circle':
+        count = _count(feature, 'count')
+        if 'radius' in feature:
+            radius = _number(feature, 'radius')
+        else:
+            radius = _number(feature, 'pcd') / 2.0
+        if count <= 0 or radius <= 0:
+            raise ValueError("bolt_circle needs count and radius (or pcd) greater than zero.")
+        if count > limit:
+            raise ValueError(f"Hole patterns are limited to {MAX_HOLES} holes.")
+        return bolt_circle(as_point(feature.get('center', (0.0, 0.0)), 'center'), radius, count,
+                           _number(feature, 'start_angle', 0.0))
+    if kind == 'grid':
+        rows, columns = _count(feature, 'rows'), _count(feature, 'columns')
+        pitch_x = _number(feature, 'pitch_x', feature.get('pitch', 0.0))
+        pitch_y = _number(feature, 'pitch_y', feature.get('pitch', 0.0))
+        if rows <= 0 or columns <= 0 or pitch_x <= 0 or pitch_y <= 0:
+            raise ValueError("grid needs rows, columns and pitch (or pitch_x and pitch_y) greater than zero.")
+        if rows * columns > limit:
+            raise ValueError(f"Hole patterns are limited to {MAX_HOLES} holes.")
+        return grid(as_point(feature.get('origin', (0.0, 0.0)), 'origin'), rows, columns, pitch_x, pitch_y)
+    raise ValueError(f"Unknown hole pattern type '{kind}'. Use points, bolt_circle or grid.")
+
+
+def expand(pattern=None, holes=None):
+    """
+    Hole coordinates from a pattern specification.
+
+    Args:
+        pattern (dict or list, optional): One feature or a list of features:
+            {'type': 'points', 'points': [[x, y], ...]}
+            {'type': 'bolt_circle', 'center': [x, y], 'radius' or 'pcd': float,
+             'count': int, 'start_angle': degrees}
+            {'type': 'grid', 'origin': [x, y], 'rows': int, 'columns': int,
+             'pitch' or 'pitch_x'/'pitch_y': float}
+        holes (list, optional): Explicit [[x, y], ...] coordinates
+
+    Returns:
+        numpy.ndarray: (n, 2) hole coordinates
+
+    Raises:
+        ValueError: If the specification is invalid, empty or has more than MAX_HOLES holes
+    """
+    features = []
+    if holes is not None:
+        features.append({'type': 'points', 'points': holes})
+    if isinstance(pattern, dict):
+        features.append(pattern)
+    elif isinstance(pattern, (list, tuple)):
+        features.extend(pattern)
+    elif pattern is not None:
+        raise ValueError("pattern must be a hole pattern feature or a list of them.")
+
+    parts = []
+    total = 0
+    try:
+        for feature in features:
+            if not isinstance(feature, dict):
+                raise ValueError("Each hole pattern feature must be an object.")
+            part = _feature_holes(feature, MAX_HOLES - total)
+            total += len(part)
+            parts.append(part)
+    except KeyError as e:
+        raise ValueError(f"Hole pattern feature is missing {e}.") from e
+
+    if not total:
+        raise ValueError("The hole pattern has no holes.")
+    points = np.concatenate(parts)
+    if not np.all(np.isfinite(points)):
+        raise ValueError("Hole coordinates must be finite numbers.")
+    return points
+
+
+class _Grid:
+    """
+    Uniform grid of cells holding point indices.
+
+    The cell size starts from the bounding box and shrinks until occupied
+    cells hold about CELL_OCCUPANCY points, so clustered patterns (a few
+    dense bolt circles far apart) do not end up with hundreds of holes per cell.
+    """
+
+    def __init__(self, points):
+        n = len(points)
+        lo = points.min(axis=0)
+        span = points.max(axis=0) - lo
+        longest = max(float(span.max()), 1e-9)
+        # The second term covers holes on (or close to) a line
+        size = max(math.sqrt(float(span[0] * span[1]) * CELL_OCCUPANCY / n), longest * CELL_OCCUPANCY / n)
+        min_size = longest / 2 ** 20
+        for _ in range(6):
+            cells = np.floor((points - lo) / size).astype(np.int64)
+            stride = int(cells[:, 1].max()) + 3
+            keys = (cells[:, 0] + 1) * stride + cells[:, 1] + 1
+            unique, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+            occupancy = n / len(unique)
+            if occupancy <= 2 * CELL_OCCUPANCY or size <= min_size:
+                break
+            size = max(size / math.sqrt(occupancy / CELL_OCCUPANCY), min_size)
+
+        self.size = size
+        self.lo = lo
+        self.cells = cells
+        self.stride = stride
+        self.keys = keys
+        self.unique = unique
+        # members[u] lists the points of cell unique[u], padded with -1
+        order = np.argsort(inverse, kind='stable')
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        rank = np.arange(n) - starts[inverse[order]]
+        self.members = np.full((len(unique), int(counts.max())), -1, dtype=np.int64)
+        self.members[inverse[order], rank] = order
+
+    def bucket_lists(self):
+        """{(cx, cy): [point indices]} for the occupied cells."""
+        buckets = {}
+        for index, (cx, cy) in enumerate(self.cells.tolist()):
+            buckets.setdefault((cx, cy), []).append(index)
+        return buckets
+
+    def ring(self, cx, cy, r):
+        """Cells at Chebyshev distance r from (cx, cy)."""
+        if r == 0:
+            yield cx, cy
+            return
+        for dx in range(-r, r + 1):
+            yield cx + dx, cy - r
+            yield cx + dx, cy + r
+        for dy in range(-r + 1, r):
+            yield cx - r, cy + dy
+            yield cx + r, cy + dy
+
+
+def nearest_neighbour_order(points, start):
+    """
+    Greedy nearest-neighbour path over points from start.
+
+    Args:
+        points (numpy.ndarray): (n, 2) hole coordinates
+        start (tuple): Tool start point
+
+    Returns:
+        numpy.ndarray: Hole indices in visiting order
+    """
+    n = len(points)
+    index = _Grid(points)
+    buckets = index.bucket_lists()
+    xs, ys = points[:, 0].tolist(), points[:, 1].tolist()
+    visited = np.zeros(n, dtype=bool)
+    order = []
+    x, y = start
+    # Rings to search before falling back to a scan of every unvisited hole
+    max_rings = 3
+
+    for _ in range(n):
+        cx = int(math.floor((x - index.lo[0]) / index.size))
+        cy = int(math.floor((y - index.lo[1]) / index.size))
+        best = -1
+        best_d = math.inf
+        for r in range(max_rings + 1):
+            # Holes in ring r are at least (r - 1) cells away
+            if best >= 0 and best_d <= ((r - 1) * index.size) ** 2:
+                break
+            for cell in index.ring(cx, cy, r):
+                for j in buckets.get(cell, ()):
+                    d = (xs[j] - x) ** 2 + (ys[j] - y) ** 2
+                    if d < best_d:
+                        best, best_d = j, d
+        else:
+            if best < 0 or best_d > ((max_rings) * index.size) ** 2:
+                remaining = np.flatnonzero(~visited)
+                d = (points[remaining, 0] - x) ** 2 + (points[remaining, 1] - y) ** 2
+                k = int(np.argmin(d))
+                if best < 0 or d[k] < best_d:
+                    best = int(remaining[k])
+
+        visited[best] = True
+        order.append(best)
+        cell = (int(index.cells[best, 0]), int(index.cells[best, 1]))
+        members = buckets[cell]
+        members.remove(best)
+        if not members:
+            del buckets[cell]
+        x, y = xs[best], ys[best]
+
+    return np.asarray(order, dtype=np.int64)
+
+
+def neighbour_lists(points, k=NEIGHBOURS, chunk=4096):
+    """
+    Up to k nearest other points of every point, nearest first.
+
+    Candidates come from the 3x3 block of grid cells around each point's
+    cell, so a point in a sparse area may get fewer than k.
+
+    Returns:
+        list: One list of point indices per point
+    """
+    points = np.asarray(points, dtype=float)
+    index = _Grid(points)
+    offsets = np.array([dx * index.stride + dy for dx in (-1, 0, 1) for dy in (-1, 0, 1)], dtype=np.int64)
+    neighbours = []
+    for first in range(0, len(points), chunk):
+        rows = np.arange(first, min(first + chunk, len(points)))
+        keys = index.keys[rows, None] + offsets[None, :]
+        slot = np.minimum(np.searchsorted(index.unique, keys), len(index.unique) - 1)
+        found = index.unique[slot] == keys
+        candidates = np.where(found[:, :, None], index.members[slot], -1).reshape(len(rows), -1)
+        d = ((points[np.maximum(candidates, 0)] - points[rows, None, :]) ** 2).sum(axis=2)
+        d[(candidates < 0) | (candidates == rows[:, None])] = np.inf
+        count = min(k, d.shape[1])
+        nearest = np.argpartition(d, count - 1, axis=1)[:, :count] if count < d.shape[1] else np.argsort(d, axis=1)
+        nearest_d = np.take_along_axis(d, nearest, axis=1)
+        nearest = np.take_along_axis(nearest, np.argsort(nearest_d, axis=1), axis=1)
+        ids = np.take_along_axis(candidates, nearest, axis=1)
+        valid = np.isfinite(np.sort(nearest_d, axis=1))
+        neighbours.extend(
+            row_ids[row_valid].tolist() for row_ids, row_valid in zip(ids, valid)
+        )
+    return neighbours
+
+
+def path_length(points, order, start):
+    """Length of the path from start through points in order."""
+    path = np.vstack((np.asarray(start, dtype=float)[None, :], points[order]))
+    return float(np.sqrt((np.diff(path, axis=0) ** 2).sum(axis=1)).sum())
+
+
+def two_opt(points, order, start, time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Improve an open path with neighbour-list 2-opt moves.
+
+    A move replaces edges (a, succ a) and (c, succ c) with (a, c) and
+    (succ a, succ c) by reversing the path between them; only holes c among
+    the nearest neighbours of a, closer to a than succ a, are tried. The start
+    point stays first. time_limit covers the moves, not building the
+    neighbour lists.
+
+    Returns:
+        tuple: (improved order, number of moves applied)
+    """
+    n = len(order)
+    if n < 3:
+        return order, 0
+
+    # Tour positions 1..n are holes; position 0 is the start point (node n)
+    nodes = np.vstack((points, np.asarray(start, dtype=float)[None, :]))
+    xs, ys = nodes[:, 0].tolist(), nodes[:, 1].tolist()
+    tour = np.concatenate(([n], order)).astype(np.int64)
+    pos = np.empty(n + 1, dtype=np.int64)
+    pos[tour] = np.arange(n + 1)
+    neighbours = neighbour_lists(points)
+    last = n
+    deadline = time.perf_counter() + time_limit
+
+    def dist(a, b):
+        return math.hypot(xs[a] - xs[b], ys[a] - ys[b])
+
+    moves = 0
+    improved = True
+    while improved and time.perf_counter() < deadline:
+        improved = False
+        for i in range(n):
+            if (i & 255) == 0 and time.perf_counter() >= deadline:
+                break
+            a = int(tour[i])
+            b = int(tour[i + 1])
+            d_ab = dist(a, b)
+            for c in neighbours[a] if a != n else ():
+                d_ac = dist(a, c)
+                if d_ac >= d_ab:
+                    break
+                j = int(pos[c])
+                if j > i:
+                    lo, hi = i + 1, j
+                    d_next = dist(b, int(tour[j + 1])) - dist(c, int(tour[j + 1])) if j < last else 0.0
+                else:
+                    lo, hi = j + 1, i
+                    after = int(tour[j + 1])
+                    d_next = dist(after, b) - dist(c, after)
+                if d_ac + d_next - d_ab < -1e-9:
+                    segment = tour[lo:hi + 1][::-1].copy()
+                    tour[lo:hi + 1] = segment
+                    pos[segment] = np.arange(lo, hi + 1)
+                    moves += 1
+                    improved = True
+                    break
+    return tour[1:], moves
+
+
+def sequence(points, start=(0.0, 0.0), time_limit=DEFAULT_TIME_LIMIT):
+    """
+    Visiting order for holes that keeps rapid travel short.
+
+    Args:
+        points (numpy.ndarray): (n, 2) hole coordinates
+        start (tuple): Tool start point
+        time_limit (float): Seconds of 2-opt refinement
+
+    Returns:
+        dict: order (hole indices), path_length_mm, nearest_neighbour_length_mm,
+        two_opt_moves and sequencing_seconds
+    """
+    started = time.perf_counter()
+    points = np.asarray(points, dtype=float)
+    start = as_point(start, 'start')
+    order = nearest_neighbour_order(points, start)
+    greedy_length = path_length(points, order, start)
+    order, moves = two_opt(points, order, start, time_limit)
+    return {
+        'order': order,
+        'path_length_mm': path_length(points, order, start),
+        'nearest_neighbour_length_mm': greedy_length,
+        'two_opt_moves': moves,
+        'sequencing_seconds': time.perf_counter() - started
+    }
@@ -1,5 +1,35 @@
 import math
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from .results import FailedResult, OperationResult
+
+
+class KnurlingResult(OperationResult):
+    """Knurling: rough and finish passes over the knurl length."""
+
+    __slots__ = ('material_rating', 'knurling_length', 'workpiece_diameter', 'rough', 'finish', 'passes')
+
+    FIELDS = ('operation', 'total_time_minutes', 'cost', 'material_rating', 'parameters', 'warnings')
+
+    def __init__(self, total_time_minutes, cost, warnings, material_rating, knurling_length, workpiece_diameter,
+                 rough, finish, passes):
+        super().__init__('knurling', total_time_minutes, cost, warnings)
+        self.material_rating = material_rating
+        self.knurling_length = knurling_length
+        self.workpiece_diameter = workpiece_diameter
+        self.rough = rough
+        self.finish = finish
+        self.passes = passes
+
+    def render_parameters(self):
+        return {
+            'knurling_length_mm': round(self.knurling_length, 3),
+            'workpiece_diameter_mm': round(self.workpiece_diameter, 3),
+            'rough': self.rough,
+            'finish': self.finish,
+            'passes': self.passes
+        }
+
 
 class KnurlingOperation(BaseOperation):
     """Class for knurling operation calculations."""
@@ -24,10 +54,11 @@ class KnurlingOperation(BaseOperation):
             self.set_dimensions(input_dims)
 
     def set_dimensions(self, input_dims):
+        dims = normalize('knurling', input_dims)
         try:
-            self.knurling_length = float(input_dims.get('knurling_length') or input_dims.get('length'))
-            self.workpiece_diameter = float(input_dims.get('workpiece_diameter') or input_dims.get('diameter'))
-        except Exception as e:
+            self.knurling_length = float(dims['length'])
+            self.workpiece_diameter = float(dims['diameter'])
+        except (KeyError, TypeError, ValueError) as e:
             raise ValueError("Both length and diameter are required for knurling and must be valid numbers.") from e
 
         if self.knurling_length <= 0 or self.workpiece_diameter <= 0:
@@ -74,25 +105,15 @@ class KnurlingOperation(BaseOperation):
 
             warnings = []
             if rough_params['spindle_speed'] > 200:
-                warnings.append("Rough cut spindle speed is high for knurling.")
+                warnings.append(("Rough cut spindle speed is high for knurling.", ()))
             if rough_params['feed'] > 0.5:
-                warnings.append("Rough feed rate is high; may damage knurling tool.")
-
-            return {
-                'operation': 'knurling',
-                'total_time_minutes': round(total_time, 3),
-                'cost': round(cost, 2),
-                'material_rating': self.material_rating,
-                'parameters': {
-                    'knurling_length_mm': round(self.knurling_length, 3),
-                    'workpiece_diameter_mm': round(self.workpiece_diameter, 3),
-                    'rough': rough_params,
-                    'finish': finish_params,
-                    'passes': passes
-                },
-                'warnings': warnings
-            }
+                warnings.append(("Rough feed rate is high; may damage knurling tool.", ()))
+
+            return KnurlingResult(
+                total_time, cost, warnings, self.material_rating, self.knurling_length, self.workpiece_diameter,
+                rough_params, finish_params, passes
+            )
 
         except Exception as e:
             import traceback
-            return {'error': f'Error in knurling calculation: {str(e)}\n{traceback.format_exc()}'}
+            return FailedResult(f'Error in knurling calculation: {str(e)}\n{traceback.format_exc()}')
@@ -1,33 +1,36 @@
 from .base_operation import BaseOperation
+from .dimensions import normalize
 import math
 
 class PartingOperation(BaseOperation):
     """Class for parting operation calculations."""
     
-    def __init__(self, db_conn, material_id, db_params=None, material_rating=1.0, input_dims=None, machine_hour_rate=50.0):
-        super().__init__(db_conn, material_id, db_params, material_rating, input_dims, machine_hour_rate)
+    def __init__(self, db_params, material_rating=1.0, input_dims=None):
+        """
+        Initialize PartingOperation.
+
+        Args:
+            db_params: SQLAlchemy model row with the parting parameters of the material
+            material_rating (float): Material machinability rating (0-1)
+            input_dims (dict): Dictionary with diameter, depth and optionally width in mm
+        """
+        super().__init__(db_params, material_rating)
+        self.db_params = db_params
         self.operation_type = 'parting'
         self.min_diameter = 5.0  # Minimum diameter for parting in mm
+        self.input_dims = normalize('parting', input_dims or {})
+        self.diameter = 0.0
+        try:
+            self.diameter = float(self.input_dims.get('diameter', 0))
+        except (TypeError, ValueError) as e:
+            raise ValueError("Parting diameter must be a number.") from e
         
     def _get_machining_parameters(self):
-        """Get parameters from DB for parting operation."""
-        cursor = self.db_conn.cursor()
-        cursor.execute('''
-            SELECT 
-                feed_rate_min,
-                feed_rate_max,
-                spindle_speed_min,
-                spindle_speed_max
-            FROM MachiningParameters 
-            WHERE material_id = ? AND operation_id = 8  -- Parting operation
-            LIMIT 1
-        ''', (self.material_id,))
-        
-        result = cursor.fetchone()
-        if not result:
-            raise ValueError(f"No parameters found for material_id={self.material_id} and parting operation")
-        
-        feed_min, feed_max, speed_min, speed_max = result
+        """Parting parameters from the material's MachiningParameters row."""
+        feed_min = self.db_params.feed_rate_min
+        speed_min = self.db_params.spindle_speed_min
+        if not feed_min or not speed_min:
+            raise ValueError("No feed rate or spindle speed found for parting")
         
         # For parting, use lower feed and speed for better control
         return {
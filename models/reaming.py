@@ -1,33 +1,45 @@
 from .base_operation import BaseOperation
+from .dimensions import normalize
 import math
 
 class ReamingOperation(BaseOperation):
     """Class for reaming operation calculations."""
     
-    def __init__(self, db_conn, material_id, db_params=None, material_rating=1.0, input_dims=None, machine_hour_rate=50.0):
-        super().__init__(db_conn, material_id, db_params, material_rating, input_dims, machine_hour_rate)
+    def __init__(self, db_params, material_rating=1.0, input_dims=None):
+        """
+        Initialize ReamingOperation.
+
+        Args:
+            db_params: SQLAlchemy model row with the reaming parameters of the material
+            material_rating (float): Material machinability rating (0-1)
+            input_dims (dict): Dictionary with diameter and depth in mm
+        """
+        super().__init__(db_params, material_rating)
+        self.db_params = db_params
         self.operation_type = 'reaming'
         self.min_diameter = 3.0  # Minimum reamer diameter in mm
+        self.diameter = 0.0
+        self.depth = 0.0
+
+        if input_dims:
+            self.set_dimensions(input_dims)
+
+    def set_dimensions(self, input_dims):
+        dims = normalize('reaming', input_dims)
+        try:
+            self.diameter = float(dims['diameter'])
+            self.depth = float(dims['depth'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("diameter and depth are required for reaming and must be numbers.") from e
+        if self.diameter <= 0 or self.depth <= 0:
+            raise ValueError("Diameter and depth must be positive numbers.")
         
     def _get_machining_parameters(self):
-        """Get parameters from DB for reaming operation."""
-        cursor = self.db_conn.cursor()
-        cursor.execute('''
-            SELECT 
-                feed_rate_min,
-                feed_rate_max,
-                spindle_speed_min,
-                spindle_speed_max
-            FROM MachiningParameters 
-            WHERE material_id = ? AND operation_id = 5  -- Reaming operation
-            LIMIT 1
-        ''', (self.material_id,))
-        
-        result = cursor.fetchone()
-        if not result:
-            raise ValueError(f"No parameters found for material_id={self.material_id} and reaming operation")
-        
-        feed_min, feed_max, speed_min, speed_max = result
+        """Reaming parameters from the material's MachiningParameters row."""
+        feed_min = self.db_params.feed_rate_min
+        speed_max = self.db_params.spindle_speed_max
+        if not feed_min or not speed_max:
+            raise ValueError("No feed rate or spindle speed found for reaming")
         
         # For reaming, use lower feed and higher speed for better finish
         return {
@@ -35,6 +47,10 @@ class ReamingOperation(BaseOperation):
             'spindle_speed': speed_max * 0.8  # Slightly reduced speed
         }
     
+    def _calculate_cutting_time(self, length, feed, spindle_speed):
+        """Minutes to feed length mm at feed mm/rev and spindle_speed rpm."""
+        return length / (feed * spindle_speed)
+    
     def calculate(self):
         """Calculate reaming operation time and cost."""
         try:
@@ -0,0 +1,130 @@
+# Calculation results.
+#
+# Operation classes return an OperationResult rather than a dict: a slotted
+# object holding the raw, unrounded numbers of the calculation. Rounding, the
+# nested per-cut breakdowns and warning text are only produced by to_dict(),
+# and only for the fields asked for, so callers that need just the time (plan
+# pricing, machine selection, warm-up) read result.total_time_minutes without
+# building any of it. Warnings are kept as (template, args) pairs until then.
+
+
+class OperationResult:
+    """
+    Result of one operation calculation.
+
+    Subclasses list their serialized fields in FIELDS, in response order. A
+    field is rendered by render_<name>() where the class has one and read
+    from the attribute of that name otherwise. app.py fills in material,
+    machine_hour_rate and machine, which are serialized after FIELDS when set.
+    """
+
+    __slots__ = ('operation', 'total_time_minutes', 'cost', 'warning_args',
+                 'material', 'machine_hour_rate', 'machine')
+
+    FIELDS = ('operation', 'total_time_minutes', 'cost', 'warnings')
+    META_FIELDS = ('material', 'machine_hour_rate', 'machine')
+    error = None
+
+    def __init__(self, operation, total_time_minutes, cost, warnings=()):
+        self.operation = operation
+        self.total_time_minutes = total_time_minutes
+        self.cost = cost
+        self.warning_args = warnings
+        self.material = None
+        self.machine_hour_rate = None
+        self.machine = None
+
+    def render_total_time_minutes(self):
+        return round(self.total_time_minutes, 3)
+
+    def render_cost(self):
+        return round(self.cost, 2)
+
+    def render_warnings(self):
+        return [template.format(*args) for template, args in self.warning_args]
+
+    def field_names(self):
+        names = list(self.FIELDS)
+        for name in self.META_FIELDS:
+            if name not in names and getattr(self, name) is not None:
+                names.append(name)
+        return names
+
+    def field(self, name):
+        render = getattr(self, 'render_' + name, None)
+        return render() if render is not None else getattr(self, name)
+
+    def to_dict(self, fields=None):
+        """
+        Serialize the result.
+
+        Args:
+            fields (iterable): Field names to include; all fields when omitted.
+                Unknown names are ignored.
+
+        Returns:
+            dict: Rounded values and nested breakdowns, in FIELDS order
+        """
+        names = self.field_names()
+        if fields is not None:
+            wanted = set(fields)
+            names = [name for name in names if name in wanted]
+        return {name: self.field(name) for name in names}
+
+
+class FailedResult(OperationResult):
+    """A calculation the operation class could not complete."""
+
+    __slots__ = ('error', 'details')
+
+    def __init__(self, error, details=None):
+        super().__init__(None, float('nan'), float('nan'))
+        self.error = error
+        self.details = details or {}
+
+    def to_dict(self, fields=None):
+        return dict({'error': self.error}, **self.details)
+
+
+class DictResult(OperationResult):
+    """
+    Result of a calculation that still returns a plain dict (the generic
+    calculator and the classes not converted yet).
+    """
+
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        super().__init__(
+            data.get('operation'),
+            data.get('total_time_minutes', data.get('machining_time', 0)),
+            data.get('cost', 0.0)
+        )
+        self.data = data
+        self.material = data.get('material')
+        self.machine_hour_rate = data.get('machine_hour_rate')
+        self.machine = data.get('machine')
+
+    def field_names(self):
+        names = list(self.data)
+        for name in ('operation', 'total_time_minutes', 'cost'):
+            if name not in self.data:
+                names.append(name)
+        for name in self.META_FIELDS:
+            if name not in names and getattr(self, name) is not None:
+                names.append(name)
+        return names
+
+    def field(self, name):
+        if name in self.data and name not in OperationResult.__slots__ and name not in ('total_time_minutes', 'cost'):
+            return self.data[name]
+        return super().field(name)
+
+
+def as_result(value):
+    """An OperationResult for what an operation's calculate() returned (result object or dict)."""
+    if isinstance(value, OperationResult):
+        return value
+    if 'error' in value:
+        return FailedResult(value['error'], {key: item for key, item in value.items() if key != 'error'})
+    return DictResult(value)
@@ -1,5 +1,39 @@
 import math
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from .results import FailedResult, OperationResult
+
+
+class ThreadingResult(OperationResult):
+    """Single-point threading at pitch feed."""
+
+    __slots__ = ('thread_type', 'diameter', 'length', 'pitch', 'passes', 'feed', 'spindle_speed', 'time_per_pass')
+
+    FIELDS = ('operation', 'thread_type', 'total_time_minutes', 'parameters', 'cost', 'warnings')
+
+    def __init__(self, total_time_minutes, cost, warnings, thread_type, diameter, length, pitch, passes, feed,
+                 spindle_speed, time_per_pass):
+        super().__init__('threading', total_time_minutes, cost, warnings)
+        self.thread_type = thread_type
+        self.diameter = diameter
+        self.length = length
+        self.pitch = pitch
+        self.passes = passes
+        self.feed = feed
+        self.spindle_speed = spindle_speed
+        self.time_per_pass = time_per_pass
+
+    def render_parameters(self):
+        return {
+            'diameter': self.diameter,
+            'length': self.length,
+            'pitch': self.pitch,
+            'passes': self.passes,
+            'feed': round(self.feed, 3),
+            'spindle_speed': round(self.spindle_speed, 0),
+            'time_per_pass': round(self.time_per_pass, 3)
+        }
+
 
 class ThreadingOperation(BaseOperation):
     """Class for threading operation calculations (internal and external)."""
@@ -18,6 +52,7 @@ class ThreadingOperation(BaseOperation):
                 - type (str): 'internal' or 'external'
         """
         super().__init__(db_params, material_rating)
+        self.db_params = db_params
         self.diameter = 0.0
         self.length = 0.0
         self.pitch = 0.0
@@ -47,10 +82,10 @@ class ThreadingOperation(BaseOperation):
         if not input_dims:
             raise ValueError("No dimensions provided")
             
-        # Get values with clear error messages
-        diameter = input_dims.get('diameter') or input_dims.get('thread_diameter')
-        length = input_dims.get('length') or input_dims.get('thread_length')
-        pitch = input_dims.get('pitch') or input_dims.get('thread_pitch')
+        dims = normalize('threading', input_dims)
+        diameter = dims.get('diameter')
+        length = dims.get('length')
+        pitch = dims.get('pitch')
         
         # Check for missing required parameters
         missing = []
@@ -73,12 +108,12 @@ class ThreadingOperation(BaseOperation):
             self.diameter = float(diameter)
             self.length = float(length)
             self.pitch = float(pitch)
-            self.type = input_dims.get('type', 'external').lower()
+            self.type = str(dims.get('type', 'external')).lower()
             
             # Get threads per pass if provided, otherwise use default from DB or fallback to 7
             self.threads_per_pass = int(
-                input_dims.get('threads_per_pass') or 
-                getattr(self.db_params, 'threading_passes', 7)
+                dims['threads_per_pass'] if 'threads_per_pass' in dims
+                else getattr(self.db_params, 'threading_passes', 7)
             )
             
         except (ValueError, TypeError) as e:
@@ -129,27 +164,15 @@ class ThreadingOperation(BaseOperation):
             # Warnings
             warnings = []
             if feed != self.pitch:
-                warnings.append(f"Thread feed ({feed} mm) does not match pitch ({self.pitch} mm).")
+                warnings.append(("Thread feed ({} mm) does not match pitch ({} mm).", (feed, self.pitch)))
             if spindle_speed > 800:
-                warnings.append("Spindle speed for threading is unusually high.")
-
-            return {
-                'operation': 'threading',
-                'thread_type': self.type,
-                'total_time_minutes': round(total_time, 3),
-                'parameters': {
-                    'diameter': self.diameter,
-                    'length': self.length,
-                    'pitch': self.pitch,
-                    'passes': passes,
-                    'feed': round(feed, 3),
-                    'spindle_speed': round(spindle_speed, 0),
-                    'time_per_pass': round(single_pass_time, 3)
-                },
-                'cost': round(cost, 2),
-                'warnings': warnings
-            }
+                warnings.append(("Spindle speed for threading is unusually high.", ()))
+
+            return ThreadingResult(
+                total_time, cost, warnings, self.type, self.diameter, self.length, self.pitch, passes, feed,
+                spindle_speed, single_pass_time
+            )
 
         except Exception as e:
             import traceback
-            return {'error': f'Error in threading calculation: {str(e)}\n{traceback.format_exc()}'}
+            return FailedResult(f'Error in threading calculation: {str(e)}\n{traceback.format_exc()}')
@@ -1,5 +1,122 @@
 import math
+import numpy as np
 from .base_operation import BaseOperation
+from .dimensions import normalize
+from .results import FailedResult, OperationResult
+
+# Upper bound on the number of segments in a stepped-shaft profile
+MAX_PROFILE_SEGMENTS = 200
+
+
+class TurningResult(OperationResult):
+    """Single-diameter turning: rough passes then one finish pass."""
+
+    __slots__ = ('rough', 'finish', 'rough_passes', 'finish_passes', 'rough_time_per_pass', 'rough_time',
+                 'finish_time', 'effective_length', 'initial_diameter', 'final_diameter', 'length')
+
+    FIELDS = ('operation', 'total_time_minutes', 'rough_cut', 'finish_cut', 'effective_length',
+              'initial_diameter', 'final_diameter', 'length', 'cost', 'warnings')
+
+    def __init__(self, total_time_minutes, cost, warnings, rough, finish, rough_passes, finish_passes,
+                 rough_time_per_pass, rough_time, finish_time, effective_length, initial_diameter,
+                 final_diameter, length):
+        super().__init__('turning', total_time_minutes, cost, warnings)
+        self.rough = rough
+        self.finish = finish
+        self.rough_passes = rough_passes
+        self.finish_passes = finish_passes
+        self.rough_time_per_pass = rough_time_per_pass
+        self.rough_time = rough_time
+        self.finish_time = finish_time
+        self.effective_length = effective_length
+        self.initial_diameter = initial_diameter
+        self.final_diameter = final_diameter
+        self.length = length
+
+    def render_rough_cut(self):
+        return {
+            'passes': self.rough_passes,
+            'depth_per_pass': round(self.rough['depth_of_cut'], 3),
+            'spindle_speed': round(self.rough['spindle_speed'], 0),
+            'feed': round(self.rough['feed'], 3),
+            'time_per_pass': round(self.rough_time_per_pass, 3),
+            'total_time': round(self.rough_time, 3)
+        }
+
+    def render_finish_cut(self):
+        return {
+            'passes': self.finish_passes,
+            'depth': round(self.finish['depth_of_cut'], 3),
+            'spindle_speed': round(self.finish['spindle_speed'], 0),
+            'feed': round(self.finish['feed'], 3),
+            'time': round(self.finish_time, 3)
+        }
+
+
+class TurningProfileResult(OperationResult):
+    """Stepped-shaft turning: shared rough passes and a finish pass per segment."""
+
+    __slots__ = ('rough', 'finish', 'rough_passes', 'pass_lengths', 'rough_time', 'finish_time',
+                 'diameters', 'lengths', 'radial', 'passes', 'segment_rough', 'segment_finish',
+                 'segment_total', 'initial_diameter', 'final_diameter', 'length')
+
+    FIELDS = ('operation', 'mode', 'total_time_minutes', 'rough_cut', 'finish_cut', 'segments',
+              'initial_diameter', 'final_diameter', 'length', 'cost', 'warnings')
+    mode = 'profile'
+
+    def __init__(self, total_time_minutes, cost, warnings, rough, finish, rough_passes, pass_lengths,
+                 rough_time, finish_time, diameters, lengths, radial, passes, segment_rough,
+                 segment_finish, segment_total, initial_diameter, final_diameter, length):
+        super().__init__('turning', total_time_minutes, cost, warnings)
+        self.rough = rough
+        self.finish = finish
+        self.rough_passes = rough_passes
+        self.pass_lengths = pass_lengths
+        self.rough_time = rough_time
+        self.finish_time = finish_time
+        self.diameters = diameters
+        self.lengths = lengths
+        self.radial = radial
+        self.passes = passes
+        self.segment_rough = segment_rough
+        self.segment_finish = segment_finish
+        self.segment_total = segment_total
+        self.initial_diameter = initial_diameter
+        self.final_diameter = final_diameter
+        self.length = length
+
+    def render_rough_cut(self):
+        return {
+            'passes': self.rough_passes,
+            'depth_per_pass': round(self.rough['depth_of_cut'], 3),
+            'spindle_speed': round(self.rough['spindle_speed'], 0),
+            'feed': round(self.rough['feed'], 3),
+            'pass_lengths': np.round(self.pass_lengths, 2).tolist(),
+            'total_time': round(self.rough_time, 3)
+        }
+
+    def render_finish_cut(self):
+        return {
+            'passes': int(np.count_nonzero(self.segment_finish)),
+            'depth': round(self.finish['depth_of_cut'], 3),
+            'spindle_speed': round(self.finish['spindle_speed'], 0),
+            'feed': round(self.finish['feed'], 3),
+            'time': round(self.finish_time, 3)
+        }
+
+    def render_segments(self):
+        return [
+            {
+                'diameter': float(self.diameters[i]),
+                'length': float(self.lengths[i]),
+                'radial_depth': round(float(self.radial[i]), 3),
+                'rough_passes': int(self.passes[i]),
+                'rough_time': round(float(self.segment_rough[i]), 3),
+                'finish_time': round(float(self.segment_finish[i]), 3),
+                'total_time': round(float(self.segment_total[i]), 3)
+            }
+            for i in range(len(self.diameters))
+        ]
 
 class TurningOperation(BaseOperation):
     """Class for turning operation calculations with rough and finish cuts."""
@@ -20,6 +137,9 @@ class TurningOperation(BaseOperation):
                 - 'start_diameter' or 'initial_diameter' (float): Starting diameter of the workpiece in mm
                 - 'end_diameter' or 'final_diameter' (float): Final diameter after machining in mm
                 - 'length' (float): Axial length of the cut in mm
+                - 'profile' (list, optional): Stepped shaft turned from the initial_diameter
+                  stock, as ordered segments {'diameter', 'length'} (or [diameter, length])
+                  from the free end towards the chuck; replaces final_diameter and length
         """
 
         # Initialize the base class with required parameters
@@ -33,18 +153,23 @@ class TurningOperation(BaseOperation):
         self.initial_diameter = 0
         self.final_diameter = 0
         self.length = 0
+        self.profile = None  # (diameters, lengths) arrays in profile mode
         
         # Set dimensions if provided
         if input_dims is not None:
             self.set_dimensions(input_dims)
 
     def set_dimensions(self, input_dims):
-        """Set the turning dimensions from user input."""
+        """Set the turning dimensions from user input (raw dict or normalized Dimensions)."""
+        dims = normalize('turning', input_dims)
+        if dims.get('profile') is not None:
+            self._set_profile(dims)
+            return
         try:
-            self.initial_diameter = float(input_dims.get('start_diameter') or input_dims['initial_diameter'])
-            self.final_diameter = float(input_dims.get('end_diameter') or input_dims['final_diameter'])
-            self.length = float(input_dims['length'])
-        except (KeyError, ValueError) as e:
+            self.initial_diameter = float(dims['initial_diameter'])
+            self.final_diameter = float(dims['final_diameter'])
+            self.length = float(dims['length'])
+        except (KeyError, TypeError, ValueError) as e:
             raise ValueError("start_diameter/end_diameter (or initial_diameter/final_diameter) and length are required and must be numbers.") from e
 
         if self.initial_diameter <= self.final_diameter:
@@ -52,14 +177,40 @@ class TurningOperation(BaseOperation):
         if self.length <= 0:
             raise ValueError("Length must be a positive number.")
 
-        input_dims.update({
-            'start_diameter': self.initial_diameter,
-            'end_diameter': self.final_diameter,
-            'initial_diameter': self.initial_diameter,
-            'final_diameter': self.final_diameter
-        })
+    def _set_profile(self, dims):
+        """Set a stepped-shaft profile from the stock diameter and its segments."""
+        try:
+            self.initial_diameter = float(dims['initial_diameter'])
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError("start_diameter (or initial_diameter) is required for a profile and must be a number.") from e
+
+        segments = dims['profile']
+        if not isinstance(segments, (list, tuple)) or not segments:
+            raise ValueError("profile must be a non-empty list of {diameter, length} segments.")
+        if len(segments) > MAX_PROFILE_SEGMENTS:
+            raise ValueError(f"A profile can have at most {MAX_PROFILE_SEGMENTS} segments.")
+        try:
+            pairs = [
+                (float(seg['diameter']), float(seg['length'])) if isinstance(seg, dict) else (float(seg[0]), float(seg[1]))
+                for seg in segments
+            ]
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            raise ValueError("Each profile segment needs a numeric diameter and length.") from e
+
+        diameters, lengths = (np.array(values, dtype=float) for values in zip(*pairs))
+        if not (np.all(np.isfinite(diameters)) and np.all(np.isfinite(lengths))):
+            raise ValueError("Profile diameters and lengths must be finite numbers.")
+        if np.any(diameters <= 0) or np.any(lengths <= 0):
+            raise ValueError("Profile diameters and lengths must be positive numbers.")
+        if np.any(diameters > self.initial_diameter):
+            raise ValueError("Profile diameters cannot be larger than the initial/start diameter.")
+        if not np.any(diameters < self.initial_diameter):
+            raise ValueError("At least one profile segment must be smaller than the initial/start diameter.")
+
+        self.profile = (diameters, lengths)
+        self.final_diameter = float(diameters.min())
+        self.length = float(lengths.sum())
 
-    
     def _get_machining_parameters(self):
         """
         Separates rough and finish parameters using the 'notes' field.
@@ -91,7 +242,67 @@ class TurningOperation(BaseOperation):
 
 
 
+    def _calculate_profile(self):
+        """
+        Stepped-shaft profile: shared rough passes, then one finish pass per segment.
+
+        Rough pass k removes the k-th layer of rough_doc from every segment
+        that still needs it, in one cut per run of adjacent segments; each run
+        pays approach and overrun. Finishing runs over each reduced segment.
+        """
+        APPROACH = 5  # mm
+        OVERRUN = 5   # mm
+        clearance = APPROACH + OVERRUN
+        diameters, lengths = self.profile
+
+        rough_params, finish_params = self._get_machining_parameters()
+        rough_doc = rough_params['depth_of_cut']
+        finish_doc = finish_params['depth_of_cut']
+        rough_rate = rough_params['spindle_speed'] * rough_params['feed']
+        finish_rate = finish_params['spindle_speed'] * finish_params['feed']
+
+        # Radial stock per segment and the passes each needs (as for a single step)
+        radial = (self.initial_diameter - diameters) / 2
+        rough_radial = np.maximum(0, radial - finish_doc)
+        passes = np.where(radial > 0, np.maximum(1, np.ceil(rough_radial / rough_doc)), 0).astype(int)
+        total_passes = int(passes.max())
+
+        # cuts[k, i]: rough pass k+1 cuts segment i; a run starts where the previous segment is not cut
+        cuts = passes[None, :] >= np.arange(1, total_passes + 1)[:, None]
+        run_starts = cuts & ~np.pad(cuts[:, :-1], ((0, 0), (1, 0)))
+        pass_lengths = cuts.astype(float) @ lengths + run_starts.sum(axis=1) * clearance
+
+        segment_rough = (passes * lengths + run_starts.sum(axis=0) * clearance) / rough_rate
+        segment_finish = np.where((radial > 0) & (finish_doc > 0), (lengths + clearance) / finish_rate, 0.0)
+        segment_total = (segment_rough + segment_finish) * 1.1  # 10% buffer
+        total_rough_time = float(segment_rough.sum())
+        finish_time = float(segment_finish.sum())
+        total_cutting_time = float(segment_total.sum())
+
+        self.MACHINE_HOUR_RATE = 150.0
+        cost = (total_cutting_time / 60) * self.MACHINE_HOUR_RATE
+
+        warnings = []
+        if total_passes > 1:
+            warnings.append(("Multiple rough passes ({}) used.", (total_passes,)))
+        if rough_rate > 1000:
+            warnings.append(("Rough cut feed rate is high ({} mm/min).", (rough_rate,)))
+        if finish_rate > 1000:
+            warnings.append(("Finish cut feed rate is high ({} mm/min).", (finish_rate,)))
+
+        return TurningProfileResult(
+            total_cutting_time, cost, warnings, rough_params, finish_params, total_passes, pass_lengths,
+            total_rough_time, finish_time, diameters, lengths, radial, passes, segment_rough,
+            segment_finish, segment_total, self.initial_diameter, self.final_diameter, self.length
+        )
+
     def calculate(self, inputs=None):
+        if self.profile is not None:
+            try:
+                return self._calculate_profile()
+            except Exception as e:
+                import traceback
+                return FailedResult(f'Error in turning calculation: {str(e)}\n{traceback.format_exc()}')
         try:
             # Constants
             APPROACH = 5  # mm
@@ -125,39 +336,19 @@ class TurningOperation(BaseOperation):
             # Warnings
             warnings = []
             if rough_passes > 1:
-                warnings.append(f"Multiple rough passes ({rough_passes}) used.")
+                warnings.append(("Multiple rough passes ({}) used.", (rough_passes,)))
             if rough_params['feed'] * rough_params['spindle_speed'] > 1000:
-                warnings.append(f"Rough cut feed rate is high ({rough_params['feed'] * rough_params['spindle_speed']} mm/min).")
+                warnings.append(("Rough cut feed rate is high ({} mm/min).", (rough_params['feed'] * rough_params['spindle_speed'],)))
             if finish_params['feed'] * finish_params['spindle_speed'] > 1000:
-                warnings.append(f"Finish cut feed rate is high ({finish_params['feed'] * finish_params['spindle_speed']} mm/min).")
+                warnings.append(("Finish cut feed rate is high ({} mm/min).", (finish_params['feed'] * finish_params['spindle_speed'],)))
 
             # Final return
-            return {
-                'operation': 'turning',
-                'total_time_minutes': round(total_cutting_time, 3),
-                'rough_cut': {
-                    'passes': rough_passes,
-                    'depth_per_pass': round(rough_doc, 3),
-                    'spindle_speed': round(rough_params['spindle_speed'], 0),
-                    'feed': round(rough_params['feed'], 3),
-                    'time_per_pass': round(rough_time_per_pass, 3),
-                    'total_time': round(total_rough_time, 3)
-                },
-                'finish_cut': {
-                    'passes': finish_passes,
-                    'depth': round(finish_doc, 3),
-                    'spindle_speed': round(finish_params['spindle_speed'], 0),
-                    'feed': round(finish_params['feed'], 3),
-                    'time': round(finish_time, 3)
-                },
-                'effective_length': effective_length,
-                'initial_diameter': self.initial_diameter,
-                'final_diameter': self.final_diameter,
-                'length': self.length,
-                'cost': round(cost, 2),
-                'warnings': warnings
-            }
+            return TurningResult(
+                total_cutting_time, cost, warnings, rough_params, finish_params, rough_passes, finish_passes,
+                rough_time_per_pass, total_rough_time, finish_time, effective_length,
+                self.initial_diameter, self.final_diameter, self.length
+            )
 
         except Exception as e:
             import traceback
-            return {'error': f'Error in turning calculation: {str(e)}\n{traceback.format_exc()}'}
\ No newline at end of file
+            return FailedResult(f'Error in turning calculation: {str(e)}\n{traceback.format_exc()}')
@@ -0,0 +1,326 @@
+import contextlib
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+
+from sqlalchemy import event
+
+# Per-request SQL statement counting.
+#
+# install() hooks the app's engine twice:
+#   - every new DBAPI connection gets a sqlite3 trace callback, which sees each
+#     statement SQLite runs on it, whether issued through the ORM or through a
+#     raw_connection() cursor (the catalogue version and machine caches);
+#   - before/after_cursor_execute time the statements SQLAlchemy executes.
+# Statements are added to the QueryStats of the current /api/ request and to
+# any capture() block that is open, so tests can assert on counts:
+#
+#     with query_stats.assert_max_queries(2):
+#         client.post('/api/calculate', json=payload)
+#
+# Statements run inside reloading() - a cache rebuilding itself after the
+# catalogue version moved - are counted apart as reloads, so a budget states
+# what a request costs in steady state. At the end of a request the steady
+# statements are checked against QUERY_BUDGETS and the reloads against
+# RELOAD_BUDGETS (both per endpoint), and all of them for N+1 patterns: the
+# same statement shape, literals stripped, run more than repeat_limit times. MACHINING_QUERY_GUARD=raise answers an
+# offending request with a 500 (the default under app.testing), warn logs it
+# (the default otherwise) and off skips the check. X-Query-Count,
+# X-Query-Time-Ms, X-Query-Reloads and X-Query-Repeats headers are added when
+# MACHINING_QUERY_HEADERS is on (the default in debug mode).
+#
+# Statements run while exempt() is open (one-time schema setup) and on threads
+# outside a request (warm-up, history writer) are not counted.
+
+logger = logging.getLogger(__name__)
+
+GUARD_MODES = ('raise', 'warn', 'off')
+DEFAULT_REPEAT_LIMIT = 5
+# Statements kept per request for error messages
+MAX_RECORDED = 50
+
+# Most statements each endpoint may run in steady state, reloads not
+# included; endpoints not listed are only checked for repeated statements.
+# /api/calculate: the catalogue version and, on a result cache miss, the
+# parameter rows (the machine catalogue reuses the version already read).
+# /api/cost and /api/schedule: the catalogue version or the operation names,
+# the materials and the parameter rows of every part, one query each.
+QUERY_BUDGETS = {
+    'calculate': 2,
+    'part_cost': 3,
+    'schedule_jobs': 3,
+    'get_materials': 1,
+    'get_operations': 1,
+    'get_machines': 1,
+    'get_bootstrap': 1,
+    'get_availability_index': 1,
+}
+
+# Most reload statements each endpoint may run: the three bootstrap queries
+# behind the availability index, the machine catalogue and the two cost rate
+# tables, as far as the endpoint uses them
+RELOAD_BUDGETS = {
+    'calculate': 4,
+    'part_cost': 2,
+    'schedule_jobs': 0,
+    'get_machines': 1,
+    'get_bootstrap': 3,
+    'get_availability_index': 3,
+}
+
+COUNT_HEADER = 'X-Query-Count'
+TIME_HEADER = 'X-Query-Time-Ms'
+RELOADS_HEADER = 'X-Query-Reloads'
+REPEATS_HEADER = 'X-Query-Repeats'
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b")
+_SPACE = re.compile(r'\s+')
+
+
+def get_settings():
+    """
+    Read query guard settings from the environment.
+
+    guard and headers are None when not set, and then follow the app's
+    testing and debug flags at request time.
+    """
+    mode = os.getenv('MACHINING_QUERY_GUARD')
+    if mode is not None and mode.lower() not in GUARD_MODES:
+        raise ValueError(f"MACHINING_QUERY_GUARD must be one of {', '.join(GUARD_MODES)}, got '{mode}'")
+    headers = os.getenv('MACHINING_QUERY_HEADERS')
+    return {
+        'guard': mode.lower() if mode is not None else None,
+        'headers': None if headers is None else headers.lower() not in ('off', '0', 'false'),
+        'repeat_limit': int(os.getenv('MACHINING_QUERY_REPEAT_LIMIT', DEFAULT_REPEAT_LIMIT)),
+    }
+
+
+def statement_shape(sql):
+    """A statement with its literal values replaced by ?, so repeats with different arguments match."""
+    return _SPACE.sub(' ', _LITERALS.sub('?', sql)).strip()
+
+
+class QueryStats:
+    """
+    Statements run during one request or capture() block.
+
+    count includes the reloads; steady is count without them.
+    """
+
+    __slots__ = ('count', 'reloads', 'seconds', 'statements', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.reloads = 0
+        self.seconds = 0.0
+        self.statements = []
+        self.shapes = {}
+
+    @property
+    def steady(self):
+        return self.count - self.reloads
+
+    def add(self, sql, reload=False):
+        self.count += 1
+        if reload:
+            self.reloads += 1
+        if len(self.statements) < MAX_RECORDED:
+            self.statements.append(sql)
+        shape = statement_shape(sql)
+        self.shapes[shape] = self.shapes.get(shape, 0) + 1
+
+    def most_repeated(self):
+        """(shape, times) of the most repeated statement, or (None, 0)."""
+        if not self.shapes:
+            return None, 0
+        shape = max(self.shapes, key=self.shapes.get)
+        return shape, self.shapes[shape]
+
+    def problems(self, budget=None, repeat_limit=DEFAULT_REPEAT_LIMIT, reload_budget=None):
+        """Descriptions of what exceeds the budgets or the repeat limit; empty when within all of them."""
+        found = []
+        if budget is not None and self.steady > budget:
+            found.append(f'{self.steady} queries, budget {budget}')
+        if reload_budget is not None and self.reloads > reload_budget:
+            found.append(f'{self.reloads} reload queries, budget {reload_budget}')
+        shape, times = self.most_repeated()
+        if repeat_limit and times > repeat_limit:
+            found.append(f'possible N+1: {times} x {shape}')
+        return found
+
+    def to_dict(self):
+        return {
+            'count': self.count,
+            'reloads': self.reloads,
+            'time_ms': round(self.seconds * 1000, 3),
+            'statements': list(self.statements),
+        }
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A request or capture() block ran more statements than allowed."""
+
+    def __init__(self, message, stats):
+        super().__init__(message)
+        self.stats = stats
+
+
+_current = contextvars.ContextVar('machining_query_stats', default=None)
+_exempt = contextvars.ContextVar('machining_query_exempt', default=False)
+_reloading = contextvars.ContextVar('machining_query_reloading', default=False)
+_captures = []
+_captures_lock = threading.Lock()
+
+
+def _targets():
+    if _exempt.get():
+        return ()
+    stats = _current.get()
+    if _captures:
+        with _captures_lock:
+            captures = [capture for thread, capture in _captures if thread == threading.get_ident()]
+        return ([stats] if stats is not None else []) + captures
+    return (stats,) if stats is not None else ()
+
+
+def _record(sql):
+    if sql.startswith('--'):
+        # Statements run by a trigger or virtual table on behalf of the statement being counted
+        return
+    reload = _reloading.get()
+    for stats in _targets():
+        stats.add(sql, reload)
+
+
+def _time(seconds):
+    for stats in _targets():
+        stats.seconds += seconds
+
+
+@contextlib.contextmanager
+def exempt():
+    """Leave the statements of the block out of all counts (for one-time setup work)."""
+    token = _exempt.set(True)
+    try:
+        yield
+    finally:
+        _exempt.reset(token)
+
+
+@contextlib.contextmanager
+def reloading():
+    """Count the statements of the block as a cache reload rather than steady-state work."""
+    token = _reloading.set(True)
+    try:
+        yield
+    finally:
+        _reloading.reset(token)
+
+
+@contextlib.contextmanager
+def capture():
+    """
+    Count the statements run on this thread inside the block.
+
+    Yields:
+        QueryStats: Filled in as statements run
+    """
+    stats = QueryStats()
+    entry = (threading.get_ident(), stats)
+    with _captures_lock:
+        _captures.append(entry)
+    try:
+        yield stats
+    finally:
+        with _captures_lock:
+            _captures.remove(entry)
+
+
+@contextlib.contextmanager
+def assert_max_queries(budget, repeat_limit=DEFAULT_REPEAT_LIMIT, reloads=None):
+    """
+    Fail if the block runs more than budget steady-state statements, more
+    than reloads reload statements (when given) or repeats one more than
+    repeat_limit times.
+
+    Raises:
+        QueryBudgetExceeded: Listing the statements that were run
+    """
+    with capture() as stats:
+        yield stats
+    problems = stats.problems(budget, repeat_limit, reloads)
+    if problems:
+        listing = '\n'.join(f'  {sql}' for sql in stats.statements)
+        raise QueryBudgetExceeded(f"{'; '.join(problems)}:\n{listing}", stats)
+
+
+def instrument_engine(engine):
+    """Count every statement on the engine's connections and time those SQLAlchemy executes."""
+    @event.listens_for(engine, 'connect')
+    def _trace_connection(dbapi_connection, connection_record):
+        dbapi_connection.set_trace_callback(_record)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info['query_started'] = time.perf_counter()
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _stop_timer(conn, cursor, statement, parameters, context, executemany):
+        _time(time.perf_counter() - conn.info.pop('query_started'))
+
+
+def install(app, engine, settings=None):
+    """
+    Count the statements of every /api/ request of the Flask app and apply the query guard.
+
+    Returns:
+        dict: The settings in use
+    """
+    from flask import g, jsonify, request
+
+    settings = settings or get_settings()
+    instrument_engine(engine)
+
+    @app.before_request
+    def start_counting():
+        if request.path.startswith('/api/'):
+            stats = QueryStats()
+            g.query_stats = (stats, _current.set(stats))
+
+    @app.after_request
+    def check_queries(response):
+        started = g.get('query_stats')
+        if started is None:
+            return response
+        stats = started[0]
+        guard = settings['guard'] or ('raise' if app.testing else 'warn')
+        problems = []
+        if guard != 'off' and response.status_code < 500:
+            problems = stats.problems(
+                QUERY_BUDGETS.get(request.endpoint), settings['repeat_limit'], RELOAD_BUDGETS.get(request.endpoint)
+            )
+        if problems:
+            message = f"Query guard: {request.method} {request.path}: {'; '.join(problems)}"
+            if guard == 'warn':
+                logger.warning(message)
+            else:
+                logger.error(message + '\n' + '\n'.join(f'  {sql}' for sql in stats.statements))
+                response = jsonify({'status': 'error', 'message': message, 'queries': stats.to_dict()})
+                response.status_code = 500
+        if app.debug if settings['headers'] is None else settings['headers']:
+            response.headers[COUNT_HEADER] = str(stats.count)
+            response.headers[TIME_HEADER] = f'{stats.seconds * 1000:.3f}'
+            response.headers[RELOADS_HEADER] = str(stats.reloads)
+            response.headers[REPEATS_HEADER] = str(stats.most_repeated()[1])
+        return response
+
+    @app.teardown_request
+    def stop_counting(exc=None):
+        started = g.pop('query_stats', None)
+        if started is not None:
+            _current.reset(started[1])
+
+    return settings
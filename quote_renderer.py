@@ -0,0 +1,380 @@
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import cost_engine
+
+# Server-side quote documents.
+#
+# A quote is built once from calculation results (build_quote) and split into
+# pages (paginate). HTML goes through the Jinja template templates/quote.html,
+# which Jinja compiles once and caches, and is streamed as it renders. PDF is
+# written directly as PDF objects, one page at a time: page content streams are
+# built on a shared worker pool and sent as soon as the next page in order is
+# ready, so a quote with hundreds of operations never sits in memory as a whole.
+
+QUOTE_TYPES = ('customer', 'shop')
+
+ORGANISATION = 'CWISS'
+ORGANISATION_LINES = (
+    'Central Workshop & Instrument Service Section',
+    'Indian Institute of Technology Kharagpur',
+)
+TITLES = {
+    'customer': 'Quotation for Machining Services',
+    'shop': 'Workshop Operation Sheet',
+}
+TERMS = (
+    '1. This is a computer-generated estimate and valid for 30 days.',
+    '2. Prices may vary based on raw material availability and market conditions.',
+    '3. Delivery timeline is estimated and subject to workshop schedule.',
+    '4. Final dimensions and specifications must be confirmed before production.',
+)
+
+# Operation rows per page; the first page also carries the header block and the
+# last page the summary tables
+FIRST_PAGE_ROWS = 24
+ROWS_PER_PAGE = 38
+SUMMARY_ROWS = 16
+
+RENDER_WORKERS = int(os.getenv('QUOTE_RENDER_WORKERS', os.cpu_count() or 4))
+
+_executor = None
+
+
+def get_executor():
+    """Worker pool shared by all PDF renders, created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=RENDER_WORKERS, thread_name_prefix='quote-render')
+    return _executor
+
+
+def _format_dimensions(dimensions):
+    return ', '.join(f"{key.replace('_', ' ')}: {value}" for key, value in (dimensions or {}).items())
+
+
+def build_quote(data, operation_minutes, rates):
+    """
+    Assemble everything a quote document shows.
+
+    Costs are the cost_engine components, so the quote total matches
+    /api/cost for the same plan, rates and quantity: setup (spread over
+    quantity), idle, machining, tool and misc time at the labor rate,
+    machining time at the machine rate as well, material from the stock size
+    unless material_cost is given, and the overhead factor on the raw total.
+
+    Args:
+        data (dict): Request payload (customer, project, order_id, quote_type,
+            material_id, material_name, quantity, stock, setup_minutes,
+            tool_minutes, misc_minutes, material_cost, material_rate_per_kg,
+            tool_cost, misc_cost and the operations list)
+        operation_minutes (list): Time in minutes for each entry of data['operations']
+        rates (cost_engine.Rates): Rates with the request's overrides applied
+
+    Returns:
+        dict: Template context for render_html and render_pdf
+
+    Raises:
+        ValueError: If quote_type is unknown or quantity is not greater than zero
+    """
+    quote_type = data.get('quote_type', 'customer')
+    if quote_type not in QUOTE_TYPES:
+        raise ValueError(f"quote_type must be one of {', '.join(QUOTE_TYPES)}.")
+    quantity = float(data.get('quantity') or 1)
+    if quantity <= 0:
+        raise ValueError("quantity must be greater than zero.")
+
+    operations = []
+    machining = idle = 0.0
+    for op, minutes in zip(data['operations'], operation_minutes):
+        name = str(op['operation_name']).lower()
+        if name == 'idle':
+            idle += minutes
+        else:
+            machining += minutes
+        operations.append({
+            'name': op.get('label') or name.title(),
+            'parameters': _format_dimensions(op.get('dimensions')),
+            'minutes': minutes
+        })
+
+    setup = float(data.get('setup_minutes', 0.0))
+    tool = float(data.get('tool_minutes', 0.0))
+    misc = float(data.get('misc_minutes', 0.0))
+    costs = cost_engine.cost_components(
+        rates, machining, idle, setup / max(quantity, 1.0), tool, misc,
+        material=cost_engine.material_cost(data, rates),
+        tool_cost=float(data.get('tool_cost', 0.0)),
+        misc_cost=float(data.get('misc_cost', 0.0))
+    )
+    raw_cost = sum(costs[component] for component in cost_engine.COST_COMPONENTS)
+    overhead_cost = raw_cost * (rates.overhead_factor - 1.0)
+    setup_label = 'Setup & Idle' if quantity == 1 else f"Setup & Idle (setup over {quantity:g} pcs)"
+
+    return {
+        'quote_type': quote_type,
+        'organisation': ORGANISATION,
+        'organisation_lines': ORGANISATION_LINES,
+        'title': f"{ORGANISATION} - {TITLES[quote_type]}",
+        'date': date.today().strftime('%d/%m/%y'),
+        'order_id': data.get('order_id') or 'N/A',
+        'customer': data.get('customer') or 'N/A',
+        'project': data.get('project') or 'N/A',
+        'material_name': data.get('material_name') or 'Not Specified',
+        'operations': operations,
+        'times': [
+            ('Machining Time', machining),
+            ('Setup Time', setup),
+            ('Idle Time', idle),
+            ('Tool Time', tool),
+            ('Misc Time', misc),
+            ('Total Time', machining + setup + idle + tool + misc),
+        ],
+        'costs': [
+            ('Material', costs['material']),
+            (setup_label, costs['setup_idle']),
+            ('Machining (labor)', costs['machining']),
+            ('Machine', costs['machine']),
+            ('Tooling', costs['tooling']),
+            ('Miscellaneous', costs['misc']),
+            (f"Overhead ({round((rates.overhead_factor - 1.0) * 100)}%)", overhead_cost),
+        ],
+        'total_cost': raw_cost + overhead_cost,
+        'terms': TERMS,
+    }
+
+
+def paginate(operations):
+    """
+    Split operation rows into pages.
+
+    The summary goes on the last page, so when the rows fill it completely an
+    extra page without rows is added for it.
+
+    Returns:
+        list: One list of operation rows per page
+    """
+    pages = [operations[:FIRST_PAGE_ROWS]]
+    rest = operations[FIRST_PAGE_ROWS:]
+    for start in range(0, len(rest), ROWS_PER_PAGE):
+        pages.append(rest[start:start + ROWS_PER_PAGE])
+    capacity = FIRST_PAGE_ROWS if len(pages) == 1 else ROWS_PER_PAGE
+    if len(pages[-1]) + SUMMARY_ROWS > capacity:
+        pages.append([])
+    return pages
+
+
+def render_html(template, quote):
+    """
+    Stream a quote as HTML.
+
+    Args:
+        template: Compiled Jinja template (templates/quote.html)
+        quote (dict): Result of build_quote
+
+    Returns:
+        generator: HTML text chunks, produced as the template renders
+    """
+    return template.generate(quote=quote, pages=paginate(quote['operations']))
+
+
+# --- PDF ---------------------------------------------------------------------
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 40
+ROW_HEIGHT = 16
+HEADER_COLOUR = '0 0.2 0.4'
+
+# Object numbers: the catalog, the page tree and the two fonts come first, then
+# a page object and its content stream for every page
+_CATALOG, _PAGES, _FONT, _FONT_BOLD = 1, 2, 3, 4
+_FIRST_PAGE_OBJECT = 5
+
+
+def _pdf_text(text):
+    """Escape text for a PDF string literal using the WinAnsi standard fonts."""
+    text = str(text).replace('₹', 'Rs.')
+    text = text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+    return text.encode('cp1252', errors='replace').decode('latin-1')
+
+
+class _Canvas:
+    """Collects the drawing operators of one page."""
+
+    def __init__(self):
+        self.ops = []
+
+    def text(self, x, y, text, size=10, bold=False, align='left'):
+        if align == 'right':
+            # Helvetica averages about half the font size per character
+            x -= len(str(text)) * size * 0.5
+        elif align == 'center':
+            x -= len(str(text)) * size * 0.25
+        font = '/F2' if bold else '/F1'
+        self.ops.append(f"BT {font} {size} Tf {x:.1f} {y:.1f} Td ({_pdf_text(text)}) Tj ET")
+
+    def fill_rect(self, x, y, width, height, colour):
+        self.ops.append(f"{colour} rg {x:.1f} {y:.1f} {width:.1f} {height:.1f} re f 0 g")
+
+    def line(self, x1, y1, x2, y2):
+        self.ops.append(f"0.75 G {x1:.1f} {y1:.1f} m {x2:.1f} {y2:.1f} l S 0 G")
+
+    def table_header(self, y, columns):
+        self.fill_rect(MARGIN, y - 4, PAGE_WIDTH - 2 * MARGIN, ROW_HEIGHT, HEADER_COLOUR)
+        self.ops.append('1 g')
+        for x, label, align in columns:
+            self.text(x, y, label, size=10, bold=True, align=align)
+        self.ops.append('0 g')
+        return y - ROW_HEIGHT
+
+    def row(self, y, cells, bold=False):
+        for x, value, align in cells:
+            self.text(x, y, value, size=9, bold=bold, align=align)
+        self.line(MARGIN, y - 4, PAGE_WIDTH - MARGIN, y - 4)
+        return y - ROW_HEIGHT
+
+    def content(self):
+        return zlib.compress('\n'.join(self.ops).encode('latin-1'))
+
+
+def _truncate(text, length):
+    return text if len(text) <= length else text[:length - 3] + '...'
+
+
+def _page_content(quote, rows, page_number, page_count):
+    """Draw one page and return its compressed content stream."""
+    canvas = _Canvas()
+    right = PAGE_WIDTH - MARGIN
+    y = PAGE_HEIGHT - MARGIN
+
+    if page_number == 1:
+        canvas.text(MARGIN, y, quote['organisation'], size=20, bold=True)
+        canvas.text(right, y, f"Date: {quote['date']}", size=10, align='right')
+        y -= 16
+        for line in quote['organisation_lines']:
+            canvas.text(MARGIN, y, line, size=11)
+            y -= 14
+        canvas.text(right, PAGE_HEIGHT - MARGIN - 14, f"Quotation #: {quote['order_id']}", size=10, align='right')
+        y -= 10
+        canvas.text(PAGE_WIDTH / 2, y, quote['title'], size=14, bold=True, align='center')
+        y -= 24
+        if quote['quote_type'] == 'customer':
+            canvas.text(MARGIN, y, f"Customer: {quote['customer']}", size=11)
+            y -= 14
+            canvas.text(MARGIN, y, f"Project: {quote['project']}", size=11)
+            y -= 14
+        canvas.text(MARGIN, y, f"Material: {quote['material_name']}", size=11, bold=True)
+        y -= 24
+    else:
+        canvas.text(MARGIN, y, f"{quote['title']} (continued)", size=11, bold=True)
+        y -= 24
+
+    if rows:
+        y = canvas.table_header(y, [
+            (MARGIN + 6, 'Operation', 'left'),
+            (MARGIN + 150, 'Parameters', 'left'),
+            (right - 6, 'Time (min)', 'right'),
+        ])
+        for op in rows:
+            y = canvas.row(y, [
+                (MARGIN + 6, _truncate(op['name'], 26), 'left'),
+                (MARGIN + 150, _truncate(op['parameters'], 60), 'left'),
+                (right - 6, f"{op['minutes']:.2f}", 'right'),
+            ])
+        y -= 12
+
+    if page_number == page_count:
+        if quote['quote_type'] == 'shop':
+            y = canvas.table_header(y, [(MARGIN + 6, 'Time Summary', 'left'), (right - 6, 'Minutes', 'right')])
+            for label, minutes in quote['times']:
+                y = canvas.row(y, [(MARGIN + 6, label, 'left'), (right - 6, f"{minutes:.2f}", 'right')],
+                               bold=label == 'Total Time')
+        else:
+            y = canvas.table_header(y, [(MARGIN + 6, 'Description', 'left'), (right - 6, 'Amount (Rs.)', 'right')])
+            for label, amount in quote['costs']:
+                y = canvas.row(y, [(MARGIN + 6, label, 'left'), (right - 6, f"{amount:.2f}", 'right')])
+            y = canvas.row(y, [
+                (MARGIN + 6, 'TOTAL ESTIMATED COST', 'left'),
+                (right - 6, f"{quote['total_cost']:.2f}", 'right'),
+            ], bold=True)
+            y -= 14
+            canvas.text(MARGIN, y, 'Terms & Conditions:', size=9, bold=True)
+            for term in quote['terms']:
+                y -= 11
+                canvas.text(MARGIN + 6, y, term, size=8)
+
+    canvas.text(PAGE_WIDTH / 2, MARGIN / 2, f"Page {page_number} of {page_count}", size=8, align='center')
+    return canvas.content()
+
+
+def render_pdf(quote, executor=None):
+    """
+    Stream a quote as a PDF document.
+
+    Pages are drawn on the worker pool a few pages ahead of the one being sent;
+    the byte offsets needed for the cross-reference table are counted as the
+    document is written.
+
+    Args:
+        quote (dict): Result of build_quote
+        executor (Executor, optional): Pool for page drawing, defaults to get_executor()
+
+    Returns:
+        generator: PDF bytes, one chunk per page plus the header and trailer
+    """
+    executor = executor or get_executor()
+    pages = paginate(quote['operations'])
+    page_count = len(pages)
+    page_objects = [_FIRST_PAGE_OBJECT + 2 * i for i in range(page_count)]
+
+    def generate():
+        offsets = {}
+        written = 0
+
+        def emit(number, body):
+            nonlocal written
+            offsets[number] = written
+            chunk = f"{number} 0 obj\n".encode('latin-1') + body + b"\nendobj\n"
+            written += len(chunk)
+            return chunk
+
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        written = len(header)
+        kids = ' '.join(f"{number} 0 R" for number in page_objects)
+        chunk = header + b''.join([
+            emit(_CATALOG, f"<< /Type /Catalog /Pages {_PAGES} 0 R >>".encode('latin-1')),
+            emit(_PAGES, f"<< /Type /Pages /Kids [{kids}] /Count {page_count} >>".encode('latin-1')),
+            emit(_FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"),
+            emit(_FONT_BOLD, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>"),
+        ])
+        yield chunk
+
+        lookahead = max(1, RENDER_WORKERS)
+        futures = {}
+        for index in range(page_count):
+            for ahead in range(index, min(index + lookahead, page_count)):
+                if ahead not in futures:
+                    futures[ahead] = executor.submit(_page_content, quote, pages[ahead], ahead + 1, page_count)
+            content = futures.pop(index).result()
+            number = page_objects[index]
+            page = (
+                f"<< /Type /Page /Parent {_PAGES} 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+                f"/Resources << /Font << /F1 {_FONT} 0 R /F2 {_FONT_BOLD} 0 R >> >> "
+                f"/Contents {number + 1} 0 R >>"
+            )
+            stream = (
+                f"<< /Length {len(content)} /Filter /FlateDecode >>\nstream\n".encode('latin-1')
+                + content + b"\nendstream"
+            )
+            yield emit(number, page.encode('latin-1')) + emit(number + 1, stream)
+
+        size = _FIRST_PAGE_OBJECT + 2 * page_count
+        xref = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        xref.extend(f"{offsets[number]:010d} 00000 n \n" for number in range(1, size))
+        xref.append(f"trailer\n<< /Size {size} /Root {_CATALOG} 0 R >>\nstartxref\n{written}\n%%EOF\n")
+        yield ''.join(xref).encode('latin-1')
+
+    return generate()
@@ -0,0 +1,187 @@
+import gzip
+import hashlib
+import json
+import sqlite3
+import threading
+
+import availability
+import query_stats
+
+# Reference data the UI needs on load, served as one cached payload.
+#
+# catalogue_version holds a single counter that triggers bump whenever
+# Materials, Operations or MachiningParameters change (and the cost tables and
+# Machines, which cost_engine and machines cache on the same counter). The payload is rebuilt
+# only when the counter moves; in between every request is answered from the
+# cached JSON (plain and gzip-compressed) or with 304 Not Modified.
+
+VERSION_TABLE = 'catalogue_version'
+TRACKED_TABLES = ('Materials', 'Operations', 'MachiningParameters', 'material_costs', 'cost_rates', 'Machines')
+EVENTS = ('INSERT', 'UPDATE', 'DELETE')
+
+VERSION_SCHEMA = f'''
+    CREATE TABLE IF NOT EXISTS {VERSION_TABLE} (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        version INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO {VERSION_TABLE} (id, version) VALUES (1, 1);
+'''
+
+
+def trigger_names(table):
+    return tuple(f'{table}_version_{event.lower()}' for event in EVENTS)
+
+
+def trigger_schema(table):
+    return ''.join(
+        f'''
+    CREATE TRIGGER IF NOT EXISTS {table}_version_{event.lower()} AFTER {event} ON {table} BEGIN
+        UPDATE {VERSION_TABLE} SET version = version + 1 WHERE id = 1;
+    END;
+    '''
+        for event in EVENTS
+    )
+
+
+PARAMETER_RANGES_SQL = '''
+    SELECT material_id, operation_id,
+           MIN(spindle_speed_min), MAX(spindle_speed_max),
+           MIN(feed_rate_min), MAX(feed_rate_max),
+           MIN(depth_of_cut_min), MAX(depth_of_cut_max)
+    FROM MachiningParameters
+    GROUP BY material_id, operation_id
+'''
+
+GZIP_LEVEL = 6
+
+_lock = threading.Lock()
+_cached = None
+
+
+def ensure_version_tracking(conn):
+    """
+    Create the catalogue_version table and its triggers if they do not exist yet.
+
+    Triggers added to TRACKED_TABLES later are created on databases that
+    already track the others; tables the database does not have (yet) are
+    skipped.
+
+    Args:
+        conn: DB-API connection to the SQLite database (sqlite3 or a pooled proxy)
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+    existing = {row[0] for row in cursor.fetchall()}
+    tables = [table for table in TRACKED_TABLES if table in existing]
+    missing = [table for table in tables if not existing.issuperset(trigger_names(table))]
+    if VERSION_TABLE not in existing or missing:
+        cursor.executescript(VERSION_SCHEMA + ''.join(trigger_schema(table) for table in missing))
+        conn.commit()
+    cursor.close()
+
+
+def current_version(conn):
+    """
+    Current catalogue version, or None if the database does not track one.
+    """
+    try:
+        row = conn.execute(f"SELECT version FROM {VERSION_TABLE} WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def build_payload(conn):
+    """
+    Collect materials, operations, parameter ranges and availability.
+
+    availability.matrix has one row per entry of materials and one column per
+    entry of operations; a 1 means MachiningParameters has rows for that pair,
+    which is exactly what /api/calculate needs to succeed.
+
+    Args:
+        conn: DB-API connection to the SQLite database
+
+    Returns:
+        dict: Bootstrap payload
+    """
+    materials = [
+        {
+            'material_id': row[0],
+            'material_name': row[1],
+            'machinability_rating': row[2],
+            'recommended_tool': row[3],
+            'notes': row[4]
+        }
+        for row in conn.execute(
+            'SELECT material_id, material_name, machinability_rating, recommended_tool, notes '
+            'FROM Materials ORDER BY material_id'
+        )
+    ]
+    operations = [
+        {'operation_id': row[0], 'operation_name': row[1], 'description': row[2]}
+        for row in conn.execute('SELECT operation_id, operation_name, description FROM Operations ORDER BY operation_id')
+    ]
+
+    material_index = {m['material_id']: i for i, m in enumerate(materials)}
+    operation_index = {op['operation_id']: j for j, op in enumerate(operations)}
+    matrix = [[0] * len(operations) for _ in materials]
+    parameter_ranges = []
+    for row in conn.execute(PARAMETER_RANGES_SQL):
+        i = material_index.get(row[0])
+        j = operation_index.get(row[1])
+        if i is None or j is None:
+            continue
+        matrix[i][j] = 1
+        parameter_ranges.append({
+            'material_id': row[0],
+            'operation_id': row[1],
+            'spindle_speed': [row[2], row[3]],
+            'feed_rate': [row[4], row[5]],
+            'depth_of_cut': [row[6], row[7]]
+        })
+
+    return {
+        'materials': materials,
+        'operations': operations,
+        'parameter_ranges': parameter_ranges,
+        'availability': {
+            'material_ids': [m['material_id'] for m in materials],
+            'operation_ids': [op['operation_id'] for op in operations],
+            'matrix': matrix
+        }
+    }
+
+
+def get_bootstrap(conn):
+    """
+    Cached bootstrap payload for the current catalogue version.
+
+    Returns:
+        dict: {'version', 'etag' (unquoted), 'body' (JSON bytes), 'gzip_body',
+        'availability' (AvailabilityIndex)}
+    """
+    global _cached
+    version = current_version(conn)
+    cached = _cached
+    # Without version tracking (e.g. an old read-only snapshot) the data
+    # cannot change under us, so the first payload stays valid
+    if cached is not None and cached['version'] == version:
+        return cached
+
+    with _lock:
+        if _cached is not None and _cached['version'] == version:
+            return _cached
+        with query_stats.reloading():
+            payload = build_payload(conn)
+        payload['version'] = version
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        etag = f'catalogue-{version}-{hashlib.sha1(body).hexdigest()[:16]}'
+        _cached = {
+            'version': version,
+            'etag': etag,
+            'body': body,
+            'gzip_body': gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0),
+            'availability': availability.AvailabilityIndex(payload, version, etag)
+        }
+        return _cached
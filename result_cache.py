@@ -0,0 +1,283 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import encoders
+from models.results import as_result
+
+# Cache of /api/calculate results in two tiers.
+#
+# The in-memory tier is an LRU of OperationResult objects, shared by every
+# request that hits them: callers serialize them with to_dict() and must not
+# modify them. warmup fills it with frequent inputs at start.
+#
+# Underneath it, DiskResultCache keeps serialized results in a SQLite file so
+# they survive restarts and are shared by all worker processes on the host.
+# Entries are content-addressed: the SHA-256 of the canonical JSON of the
+# memory key plus a namespace that changes whenever the calculation code does
+# (a hash of the operation and machine modules), so a deploy with different
+# formulas never reads old results. The file is opened in WAL mode with one
+# connection per thread; readers never block the writer. When the stored
+# values exceed max_bytes the least recently used tenth is deleted. A disk hit
+# is promoted into the memory tier as a DictResult of the stored dict.
+#
+# Keys include the catalogue identity (version and content hash), so a change
+# to materials, parameters, rates or machines makes every older entry
+# unreachable; those then age out of the LRU and the disk file.
+
+logger = logging.getLogger(__name__)
+
+DISK_CACHE_FILENAME = 'result_cache.db'
+DEFAULT_DISK_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this share of max_bytes
+EVICT_TO = 0.9
+# A hit refreshes an entry's last-used time at most this often, so reads rarely write
+TOUCH_INTERVAL_MS = 300_000
+BUSY_TIMEOUT_MS = 5000
+
+# Modules whose source decides what a calculation returns
+CODE_MODULES = ('models/*.py', 'machines.py', 'machining_calculator.py')
+
+DISK_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS results (
+        key BLOB PRIMARY KEY,
+        value BLOB NOT NULL,
+        size INTEGER NOT NULL,
+        used_at INTEGER NOT NULL  -- milliseconds since the epoch
+    );
+    CREATE INDEX IF NOT EXISTS idx_results_used ON results(used_at);
+'''
+
+# Keep the most recently used entries up to the target size, delete the rest
+EVICT_SQL = '''
+    DELETE FROM results WHERE rowid IN (
+        SELECT rowid FROM (
+            SELECT rowid, SUM(size) OVER (ORDER BY used_at DESC, rowid DESC) AS kept FROM results
+        ) WHERE kept > ?
+    )
+'''
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def get_max_entries():
+    """Cache size from MACHINING_RESULT_CACHE_SIZE; 0 disables the cache."""
+    return int(os.getenv('MACHINING_RESULT_CACHE_SIZE', DEFAULT_MAX_ENTRIES))
+
+
+def get_settings(instance_path='instance'):
+    """Read result cache settings from the environment; MACHINING_RESULT_DISK_CACHE=off disables the disk tier."""
+    return {
+        'max_entries': get_max_entries(),
+        'disk': os.getenv('MACHINING_RESULT_DISK_CACHE', 'on').lower() not in ('off', '0', 'false'),
+        'disk_path': os.getenv('MACHINING_RESULT_DISK_CACHE_PATH', os.path.join(instance_path, DISK_CACHE_FILENAME)),
+        'disk_max_bytes': int(os.getenv('MACHINING_RESULT_DISK_CACHE_MAX_BYTES', DEFAULT_DISK_MAX_BYTES)),
+    }
+
+
+def code_fingerprint(root=None):
+    """Hash of the calculation modules' source, used as the disk cache namespace."""
+    root = root or os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for pattern in CODE_MODULES:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(path, root).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def make_key(version, material_id, operation_id, operation_name, dimensions, machine_id=None):
+    """
+    Cache key of one calculation.
+
+    Args:
+        version: Catalogue identity the result was calculated at (version or etag)
+        dimensions (Dimensions): Normalized dimensions
+    """
+    return (version, str(material_id), str(operation_id), operation_name, dimensions.key,
+            None if machine_id is None else str(machine_id))
+
+
+class DiskResultCache:
+    """Size-bounded SQLite store of serialized results, safe to share between processes."""
+
+    def __init__(self, path, max_bytes=DEFAULT_DISK_MAX_BYTES, namespace=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.namespace = namespace if namespace is not None else code_fingerprint()
+        self._local = threading.local()
+        self._evict_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connection()
+        self._bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_MS / 1000, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('PRAGMA synchronous = NORMAL')
+            conn.executescript(DISK_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def digest(self, key):
+        """Content address of a make_key key."""
+        canonical = json.dumps([self.namespace, key], separators=(',', ':'), default=str)
+        return hashlib.sha256(canonical.encode('utf-8')).digest()
+
+    def get(self, key):
+        """The stored result as a DictResult, or None; a failing store counts as a miss."""
+        digest = self.digest(key)
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT value, used_at FROM results WHERE key = ?', (digest,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time_ns() // 1_000_000
+            if now - row[1] >= TOUCH_INTERVAL_MS:
+                conn.execute('UPDATE results SET used_at = ? WHERE key = ?', (now, digest))
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Result disk cache read failed: {str(e)}")
+            return None
+        self.hits += 1
+        return as_result(json.loads(row[0]))
+
+    def put(self, key, result):
+        """Store a result; failures are logged, never raised."""
+        value = encoders.dumps_json(result.to_dict())
+        try:
+            self._connection().execute(
+                'INSERT OR REPLACE INTO results (key, value, size, used_at) VALUES (?, ?, ?, ?)',
+                (self.digest(key), value, len(value), time.time_ns() // 1_000_000)
+            )
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Result disk cache write failed: {str(e)}")
+            return
+        self._bytes += len(value)
+        if self._bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Delete least recently used entries until the store is below EVICT_TO of max_bytes."""
+        if not self._evict_lock.acquire(blocking=False):
+            return
+        try:
+            # One statement, so processes evicting at the same time cannot
+            # each free the same space again
+            conn = self._connection()
+            conn.execute(EVICT_SQL, (int(self.max_bytes * EVICT_TO),))
+            self._bytes = conn.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        except sqlite3.Error as e:
+            self.errors += 1
+            logger.warning(f"Result disk cache eviction failed: {str(e)}")
+        finally:
+            self._evict_lock.release()
+
+    def clear(self):
+        self._connection().execute('DELETE FROM results')
+        self._bytes = 0
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'bytes': self._bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'errors': self.errors
+        }
+
+
+class ResultCache:
+    """
+    Thread-safe LRU mapping of make_key keys to calculation results,
+    optionally backed by a DiskResultCache.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, disk=None):
+        self.max_entries = max_entries
+        self.disk = disk
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """The cached result from memory or, failing that, from disk; None if neither has it."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        if self.disk is None:
+            return None
+        result = self.disk.get(key)
+        if result is not None:
+            self._remember(key, result)
+        return result
+
+    def put(self, key, result):
+        """Cache a result in memory and on disk."""
+        self._remember(key, result)
+        if self.disk is not None:
+            self.disk.put(key, result)
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats()
+        return stats
+
+
+def make_cache(settings):
+    """
+    The result cache for the settings from get_settings.
+
+    Returns:
+        ResultCache: With a disk tier unless it is disabled; None if both tiers are
+    """
+    disk = None
+    if settings['disk'] and settings['disk_max_bytes'] > 0:
+        try:
+            disk = DiskResultCache(settings['disk_path'], settings['disk_max_bytes'])
+        except sqlite3.Error as e:
+            logger.warning(f"Result disk cache unavailable at {settings['disk_path']}: {str(e)}")
+    if settings['max_entries'] <= 0 and disk is None:
+        return None
+    return ResultCache(max(settings['max_entries'], 0), disk)
@@ -0,0 +1,424 @@
+import argparse
+import heapq
+import json
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+# Objectives the scheduler can minimise
+OBJECTIVES = ('makespan', 'tardiness')
+
+# Dispatching rules tried to build the starting schedule. Each maps an
+# operation to a sort key; the machine that frees up takes the smallest.
+#   fifo - earliest released job first
+#   spt  - shortest processing time
+#   lpt  - longest processing time
+#   mwkr - most work remaining in the job
+#   edd  - earliest due date
+DISPATCH_RULES = ('fifo', 'spt', 'lpt', 'mwkr', 'edd')
+
+DEFAULT_TIME_LIMIT = 2.0  # seconds of local search
+# Local search also stops after this many moves per job without improving the best schedule
+STALL_MOVES_PER_JOB = 50
+
+
+@dataclass
+class Machine:
+    """A machine tool and the operations it can perform."""
+    machine_id: str
+    capabilities: frozenset
+    name: str = ''
+    # Relative speed; an operation takes time_minutes / speed_factor on this machine
+    speed_factor: float = 1.0
+
+
+@dataclass
+class JobOperation:
+    """One step of a job; steps of a job run in order."""
+    operation_name: str
+    time_minutes: float
+
+
+@dataclass
+class Job:
+    """An ordered list of operations with an optional due date (minutes from start)."""
+    job_id: str
+    operations: List[JobOperation]
+    due_date: Optional[float] = None
+    release_time: float = 0.0
+    weight: float = 1.0
+
+
+@dataclass
+class ScheduledOperation:
+    job_id: str
+    step: int
+    operation_name: str
+    machine_id: str
+    start: float
+    end: float
+
+    def to_dict(self):
+        return {
+            'job_id': self.job_id,
+            'step': self.step,
+            'operation': self.operation_name,
+            'machine_id': self.machine_id,
+            'start_minutes': round(self.start, 3),
+            'end_minutes': round(self.end, 3)
+        }
+
+
+@dataclass
+class Schedule:
+    operations: List[ScheduledOperation]
+    makespan: float
+    total_tardiness: float
+    job_completion: Dict[str, float]
+    rule: str = ''
+    iterations: int = 0
+    machine_busy: Dict[str, float] = field(default_factory=dict)
+
+    def objective(self, objective):
+        return self.makespan if objective == 'makespan' else self.total_tardiness
+
+    def to_dict(self):
+        return {
+            'makespan_minutes': round(self.makespan, 3),
+            'total_weighted_tardiness': round(self.total_tardiness, 3),
+            'rule': self.rule,
+            'local_search_iterations': self.iterations,
+            'job_completion': {job_id: round(end, 3) for job_id, end in self.job_completion.items()},
+            'machine_utilization': {
+                machine_id: round(busy / self.makespan, 4) if self.makespan else 0.0
+                for machine_id, busy in self.machine_busy.items()
+            },
+            'operations': [op.to_dict() for op in self.operations]
+        }
+
+
+class JobShopScheduler:
+    """
+    Flexible job-shop scheduler built on dispatching rules and local search.
+
+    The schedule is built by a discrete-event dispatcher: whenever a machine
+    is free it starts the waiting operation with the best priority that it is
+    capable of. A schedule is evaluated in O(N log N) for N operations, which
+    leaves time for a local search over job priorities within the time limit.
+    """
+
+    def __init__(self, machines, jobs, objective='makespan', seed=0):
+        """
+        Args:
+            machines (list): Machine objects
+            jobs (list): Job objects
+            objective (str): 'makespan' or 'tardiness' (total weighted tardiness)
+            seed (int): Seed for the local search, so results are reproducible
+
+        Raises:
+            ValueError: If the objective is unknown or an operation has no capable machine
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Objective must be one of {', '.join(OBJECTIVES)}")
+        self.machines = machines
+        self.jobs = jobs
+        self.objective = objective
+        self.random = random.Random(seed)
+
+        # Eligible machine indexes per operation name, fastest machine first
+        self.eligible = {}
+        for job in jobs:
+            for op in job.operations:
+                name = op.operation_name
+                if name not in self.eligible:
+                    self.eligible[name] = sorted(
+                        (i for i, m in enumerate(machines) if name in m.capabilities),
+                        key=lambda i: -machines[i].speed_factor
+                    )
+                    if not self.eligible[name]:
+                        raise ValueError(f"No machine can perform '{name}' (job {job.job_id})")
+
+        # Work remaining from each step to the end of its job, for MWKR
+        self.remaining = [
+            [sum(op.time_minutes for op in job.operations[step:]) for step in range(len(job.operations))]
+            for job in jobs
+        ]
+
+    def _rule_priority(self, rule):
+        """Build a priority function (job index, step) -> sort key for a dispatching rule."""
+        jobs = self.jobs
+        if rule == 'fifo':
+            return lambda j, s: (jobs[j].release_time, j, s)
+        if rule == 'spt':
+            return lambda j, s: (jobs[j].operations[s].time_minutes, j)
+        if rule == 'lpt':
+            return lambda j, s: (-jobs[j].operations[s].time_minutes, j)
+        if rule == 'mwkr':
+            return lambda j, s: (-self.remaining[j][s], j)
+        if rule == 'edd':
+            return lambda j, s: (jobs[j].due_date if jobs[j].due_date is not None else float('inf'), j)
+        raise ValueError(f"Unknown dispatching rule '{rule}'")
+
+    def dispatch(self, priority):
+        """
+        Build a non-delay schedule with the given priority function.
+
+        Args:
+            priority: Callable (job index, step) -> sort key; lower runs first
+
+        Returns:
+            Schedule
+        """
+        jobs, machines, eligible = self.jobs, self.machines, self.eligible
+        machine_free = [True] * len(machines)
+        queues = [[] for _ in machines]
+        taken = set()
+        events = []  # (time, sequence, kind, payload)
+        sequence = 0
+        scheduled = []
+        machine_busy = {m.machine_id: 0.0 for m in machines}
+        completion = {}
+
+        for j, job in enumerate(jobs):
+            if job.operations:
+                events.append((job.release_time, sequence, 'ready', (j, 0)))
+                sequence += 1
+            else:
+                completion[job.job_id] = job.release_time
+        heapq.heapify(events)
+
+        def start_next(m, now):
+            nonlocal sequence
+            queue = queues[m]
+            while queue:
+                _, j, s = heapq.heappop(queue)
+                if (j, s) in taken:
+                    continue
+                taken.add((j, s))
+                op = jobs[j].operations[s]
+                duration = op.time_minutes / machines[m].speed_factor
+                machine_free[m] = False
+                machine_busy[machines[m].machine_id] += duration
+                scheduled.append(ScheduledOperation(jobs[j].job_id, s, op.operation_name,
+                                                    machines[m].machine_id, now, now + duration))
+                heapq.heappush(events, (now + duration, sequence, 'done', (m, j, s)))
+                sequence += 1
+                return
+
+        def make_ready(j, s, woken):
+            key = priority(j, s)
+            for m in eligible[jobs[j].operations[s].operation_name]:
+                heapq.heappush(queues[m], (key, j, s))
+                woken.add(m)
+
+        while events:
+            # Take every event at this instant before dispatching, so all
+            # operations that became ready together compete on priority
+            now = events[0][0]
+            woken = set()
+            while events and events[0][0] == now:
+                _, _, kind, payload = heapq.heappop(events)
+                if kind == 'ready':
+                    make_ready(*payload, woken)
+                else:
+                    m, j, s = payload
+                    machine_free[m] = True
+                    woken.add(m)
+                    if s + 1 < len(jobs[j].operations):
+                        make_ready(j, s + 1, woken)
+                    else:
+                        completion[jobs[j].job_id] = now
+            # Fastest machines pick first
+            for m in sorted(woken, key=lambda i: (-machines[i].speed_factor, i)):
+                if machine_free[m]:
+                    start_next(m, now)
+
+        makespan = max(completion.values(), default=0.0)
+        tardiness = sum(
+            job.weight * max(0.0, completion[job.job_id] - job.due_date)
+            for job in jobs if job.due_date is not None
+        )
+        return Schedule(scheduled, makespan, tardiness, completion, machine_busy=machine_busy)
+
+    def _rank_priority(self, ranks):
+        return lambda j, s: (ranks[j], s)
+
+    def _critical_job(self, schedule):
+        """Job to move forward: the last to finish, or the one with the largest weighted tardiness."""
+        index = {job.job_id: j for j, job in enumerate(self.jobs)}
+        if self.objective == 'makespan':
+            job_id = max(schedule.job_completion, key=schedule.job_completion.get)
+        else:
+            job_id = max(
+                (job.job_id for job in self.jobs if job.due_date is not None),
+                key=lambda jid: self.jobs[index[jid]].weight
+                * (schedule.job_completion[jid] - self.jobs[index[jid]].due_date),
+                default=None
+            )
+            if job_id is None:
+                return None
+        return index[job_id]
+
+    def solve(self, time_limit=DEFAULT_TIME_LIMIT, max_iterations=None):
+        """
+        Find a good schedule for the configured objective.
+
+        Every dispatching rule builds a candidate schedule; the best one seeds a
+        local search over the job priority order, which moves the critical job
+        earlier or swaps random pairs and keeps non-worsening moves.
+
+        Args:
+            time_limit (float): Seconds to spend in local search
+            max_iterations (int, optional): Cap on local search iterations
+
+        Returns:
+            Schedule: Best schedule found
+        """
+        deadline = time.perf_counter() + time_limit
+        best = None
+        for rule in DISPATCH_RULES:
+            candidate = self.dispatch(self._rule_priority(rule))
+            candidate.rule = rule
+            if best is None or candidate.objective(self.objective) < best.objective(self.objective):
+                best = candidate
+        if len(self.jobs) < 2 or best.objective(self.objective) == 0:
+            return best
+
+        # Job order implied by the best rule: the order in which jobs first started
+        first_start = {}
+        for op in best.operations:
+            first_start.setdefault(op.job_id, op.start)
+        order = sorted(range(len(self.jobs)), key=lambda j: first_start.get(self.jobs[j].job_id, 0.0))
+
+        def evaluate(order):
+            ranks = [0] * len(order)
+            for rank, j in enumerate(order):
+                ranks[j] = rank
+            return self.dispatch(self._rank_priority(ranks))
+
+        current = evaluate(order)
+        current_value = current.objective(self.objective)
+        if current_value < best.objective(self.objective):
+            best = current
+            best.rule = f'{best.rule}+local_search'
+
+        iterations = 0
+        since_improvement = 0
+        stall_limit = STALL_MOVES_PER_JOB * len(self.jobs)
+        while time.perf_counter() < deadline and (max_iterations is None or iterations < max_iterations):
+            if since_improvement >= stall_limit:
+                break
+            iterations += 1
+            since_improvement += 1
+            candidate_order = order[:]
+            critical = self._critical_job(current)
+            if critical is not None and self.random.random() < 0.5:
+                # Move the critical job a random distance towards the front
+                position = candidate_order.index(critical)
+                if position == 0:
+                    continue
+                candidate_order.insert(self.random.randrange(position), candidate_order.pop(position))
+            else:
+                a, b = self.random.sample(range(len(candidate_order)), 2)
+                candidate_order[a], candidate_order[b] = candidate_order[b], candidate_order[a]
+
+            candidate = evaluate(candidate_order)
+            value = candidate.objective(self.objective)
+            if value <= current_value:
+                order, current, current_value = candidate_order, candidate, value
+                if value < best.objective(self.objective):
+                    best = candidate
+                    best.rule = f'{best.rule or "rank"}+local_search'
+                    since_improvement = 0
+
+        best.iterations = iterations
+        return best
+
+
+def machines_from_dicts(items):
+    """Build Machine objects from request/CLI dictionaries."""
+    machines = []
+    for item in items:
+        speed = float(item.get('speed_factor', 1.0))
+        if speed <= 0:
+            raise ValueError(f"speed_factor of machine {item.get('machine_id')} must be positive")
+        machines.append(Machine(
+            machine_id=str(item['machine_id']),
+            name=item.get('name', ''),
+            capabilities=frozenset(c.lower() for c in item.get('capabilities', [])),
+            speed_factor=speed
+        ))
+    if not machines:
+        raise ValueError("At least one machine is required")
+    return machines
+
+
+def jobs_from_dicts(items, price_operation):
+    """
+    Build Job objects from request/CLI dictionaries.
+
+    Operations may give time_minutes directly; otherwise price_operation is
+    called with (job dict, operation dict) and must return the time per piece.
+    A job's quantity multiplies the time of each of its operations.
+    """
+    jobs = []
+    for index, item in enumerate(items):
+        quantity = float(item.get('quantity', 1))
+        operations = []
+        for op in item.get('operations', []):
+            minutes = op.get('time_minutes')
+            if minutes is None:
+                minutes = price_operation(item, op)
+            operations.append(JobOperation(str(op['operation_name']).lower(), float(minutes) * quantity))
+        jobs.append(Job(
+            job_id=str(item.get('job_id', index + 1)),
+            operations=operations,
+            due_date=float(item['due_date']) if item.get('due_date') is not None else None,
+            release_time=float(item.get('release_time', 0.0)),
+            weight=float(item.get('weight', 1.0))
+        ))
+    return jobs
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Schedule machining jobs across several machines.')
+    parser.add_argument('path', help='JSON file with "machines" and "jobs" (same format as /api/schedule)')
+    parser.add_argument('--objective', choices=OBJECTIVES, help='Overrides the objective in the file')
+    parser.add_argument('--time-limit', type=float, help='Seconds of local search')
+    parser.add_argument('--output', help='Write the full schedule as JSON to this file')
+    args = parser.parse_args()
+
+    with open(args.path, encoding='utf-8') as f:
+        plan = json.load(f)
+
+    # Operations without time_minutes are priced through the calculator
+    from app import app, make_operation_pricer
+    with app.app_context():
+        jobs = jobs_from_dicts(plan.get('jobs', []), make_operation_pricer())
+
+    scheduler = JobShopScheduler(
+        machines_from_dicts(plan.get('machines', [])),
+        jobs,
+        objective=args.objective or plan.get('objective', 'makespan')
+    )
+    started = time.perf_counter()
+    schedule = scheduler.solve(time_limit=args.time_limit if args.time_limit is not None
+                               else float(plan.get('time_limit', DEFAULT_TIME_LIMIT)))
+    elapsed = time.perf_counter() - started
+
+    print(f"{sum(len(job.operations) for job in jobs)} operations, {len(jobs)} jobs, "
+          f"{len(scheduler.machines)} machines scheduled in {elapsed:.2f}s ({schedule.rule}).")
+    print(f"Makespan: {schedule.makespan:.2f} min, total weighted tardiness: {schedule.total_tardiness:.2f} min")
+    for machine in scheduler.machines:
+        busy = schedule.machine_busy[machine.machine_id]
+        utilization = busy / schedule.makespan if schedule.makespan else 0.0
+        print(f"  {machine.machine_id:<12} busy {busy:>10.2f} min ({utilization:.0%})")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(schedule.to_dict(), f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
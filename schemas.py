@@ -0,0 +1,175 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models.dimensions import DIMENSION_FIELDS, Dimensions, normalize
+
+# Declarative input schemas for the operation dimensions.
+#
+# Alias resolution and type conversion happen in models.dimensions.normalize;
+# the schemas here say which canonical fields are required and which values
+# are allowed, plus any cross-field rules. compile_schema turns a schema into a
+# plain function once, at import; app.py runs it before touching the database,
+# so a bad request is rejected with field-level errors in a few microseconds
+# instead of after the material/parameter lookups.
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    Constraints on one canonical dimension.
+
+    Attributes:
+        name: Canonical name (see models.dimensions.DIMENSION_FIELDS)
+        required: Whether the field must be given
+        positive: Value must be greater than zero
+        choices: Allowed values for a text field
+    """
+    name: str
+    required: bool = True
+    positive: bool = True
+    choices: Optional[Tuple[str, ...]] = None
+
+
+# Cross-field rule: (message, field blamed, predicate over the values).
+# Rules only run when every field passed its own checks.
+Rule = Tuple[str, str, Callable[[Mapping], bool]]
+
+
+def _optional(name):
+    return Field(name, required=False)
+
+
+OPERATION_SCHEMAS: Dict[str, Tuple[Tuple[Field, ...], Tuple[Rule, ...]]] = {
+    'turning': (
+        (Field('initial_diameter'), _optional('final_diameter'), _optional('length')),
+        (
+            # Without a profile this is a single reduction and needs both
+            ('end_diameter or final_diameter is required.', 'final_diameter',
+             lambda v: 'final_diameter' in v or v.get('profile') is not None),
+            ('length is required.', 'length',
+             lambda v: 'length' in v or v.get('profile') is not None),
+            ('Initial/start diameter must be larger than final/end diameter.', 'initial_diameter',
+             lambda v: 'final_diameter' not in v or v['initial_diameter'] > v['final_diameter']),
+        ),
+    ),
+    'facing': (
+        (Field('diameter'), Field('depth_of_cut')),
+        (),
+    ),
+    'drilling': (
+        (Field('diameter'), Field('depth'), _optional('peck_depth'), _optional('retract_distance'),
+         _optional('rapid_rate')),
+        (),
+    ),
+    'boring': (
+        (Field('initial_diameter'), Field('depth'), _optional('final_diameter'), _optional('cutting_depth')),
+        (
+            ('Provide final_diameter, or hole_diameter with cutting_depth.', 'final_diameter',
+             lambda v: 'final_diameter' in v or 'cutting_depth' in v),
+            ('Final diameter must be greater than initial diameter.', 'final_diameter',
+             lambda v: 'final_diameter' not in v or v['final_diameter'] > v['initial_diameter']),
+        ),
+    ),
+    'reaming': (
+        (Field('diameter'), Field('depth')),
+        (),
+    ),
+    'threading': (
+        (
+            Field('diameter'), Field('length'), Field('pitch'),
+            _optional('threads_per_pass'),
+            Field('type', required=False, positive=False, choices=('internal', 'external')),
+        ),
+        (),
+    ),
+    'knurling': (
+        (Field('length'), Field('diameter')),
+        (),
+    ),
+    'parting': (
+        (Field('diameter'), Field('depth'), _optional('width')),
+        (),
+    ),
+    'grooving': (
+        (Field('width'), Field('depth')),
+        (),
+    ),
+}
+
+
+def compile_schema(operation, fields, rules=()):
+    """
+    Build a validator function for an operation's schema.
+
+    Returns:
+        callable: validate(dimensions) -> list of {'field', 'message'} dicts,
+        empty when the dimensions are valid; dimensions is a normalized
+        Dimensions record
+    """
+    spec = {name: (aliases, kind) for name, aliases, kind in DIMENSION_FIELDS[operation]}
+    plan = tuple(
+        (field.name, ' or '.join(spec[field.name][0]), spec[field.name][1],
+         field.required, field.positive, frozenset(field.choices) if field.choices else None)
+        for field in fields
+    )
+
+    def validate(dimensions):
+        errors = []
+        for name, aliases, kind, required, positive, choices in plan:
+            value = dimensions.get(name)
+            if value is None:
+                if required:
+                    errors.append({'field': name, 'message': f'{aliases} is required.'})
+                continue
+            if choices is not None:
+                if value not in choices:
+                    errors.append({'field': name, 'message': f"{name} must be one of {', '.join(sorted(choices))}."})
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                errors.append({'field': name, 'message': f'{name} must be a number.'})
+                continue
+            if kind is int and not isinstance(value, int):
+                errors.append({'field': name, 'message': f'{name} must be a whole number.'})
+                continue
+            if value != value or value in (float('inf'), float('-inf')):
+                errors.append({'field': name, 'message': f'{name} must be a finite number.'})
+                continue
+            if positive and value <= 0:
+                errors.append({'field': name, 'message': f'{name} must be greater than zero.'})
+
+        if errors:
+            return errors
+        for message, blamed, predicate in rules:
+            if not predicate(dimensions):
+                errors.append({'field': blamed, 'message': message})
+        return errors
+
+    return validate
+
+
+VALIDATORS: Dict[str, Callable[[Dimensions], List[dict]]] = {
+    name: compile_schema(name, fields, rules) for name, (fields, rules) in OPERATION_SCHEMAS.items()
+}
+
+
+def validate_dimensions(operation_name, dimensions):
+    """
+    Validate the dimensions for an operation.
+
+    Operations without a schema (e.g. the generic calculator path) are not
+    checked here and are left to the calculation itself.
+
+    Args:
+        operation_name (str): Operation name, case-insensitive
+        dimensions (Mapping): Request dimensions or a normalized Dimensions record
+
+    Returns:
+        list: Field errors as {'field', 'message'} dicts; empty when valid
+    """
+    validator = VALIDATORS.get((operation_name or '').lower())
+    if validator is None:
+        return []
+    if not isinstance(dimensions, Mapping):
+        return [{'field': 'dimensions', 'message': 'Dimensions must be an object.'}]
+    return validator(normalize(operation_name, dimensions))
@@ -1,6 +1,9 @@
 import os
 import sqlite3
 
+import materials_search
+import reference_data
+
 
 
 
@@ -11,6 +14,8 @@ def create_database():
     
     # Drop existing tables if they exist
     cursor.executescript('''
+        DROP TABLE IF EXISTS Materials_fts;
+        DROP TABLE IF EXISTS catalogue_version;
         DROP TABLE IF EXISTS MachiningParameters;
         DROP TABLE IF EXISTS Operations;
         DROP TABLE IF EXISTS Materials;
@@ -18,6 +23,8 @@ def create_database():
         DROP TABLE IF EXISTS setup_time_table;
         DROP TABLE IF EXISTS material_costs;
         DROP TABLE IF EXISTS cost_rates;    
+        DROP TABLE IF EXISTS tool_life;
+        DROP TABLE IF EXISTS Machines;
     ''')
     
     # Create tables
@@ -62,7 +69,32 @@ def create_database():
         CREATE TABLE cost_rates (
             id INTEGER PRIMARY KEY,
             labor_rate_per_hr REAL NOT NULL DEFAULT 0.0,
-            overhead_factor REAL NOT NULL DEFAULT 1.4
+            overhead_factor REAL NOT NULL DEFAULT 1.4,
+            machine_rate_per_hr REAL NOT NULL DEFAULT 150.0
+        );
+
+        -- Taylor tool-life constants (V * T^n = C) per material and tool material;
+        -- tool_material matches Materials.recommended_tool
+        CREATE TABLE tool_life (
+            material_id INTEGER NOT NULL,
+            tool_material VARCHAR(50) NOT NULL,
+            taylor_n REAL NOT NULL,
+            taylor_c REAL NOT NULL,
+            tool_change_minutes REAL NOT NULL DEFAULT 2.0,
+            cost_per_edge REAL NOT NULL DEFAULT 0.0,
+            PRIMARY KEY (material_id, tool_material),
+            FOREIGN KEY (material_id) REFERENCES Materials(material_id) ON DELETE CASCADE
+        );
+
+        -- Machine tools; capabilities is a comma-separated list of operation names
+        CREATE TABLE Machines (
+            machine_id INTEGER PRIMARY KEY,
+            machine_name VARCHAR(100) NOT NULL UNIQUE,
+            max_rpm REAL NOT NULL,
+            power_kw REAL NOT NULL,
+            rapid_rate REAL NOT NULL DEFAULT 5000.0,
+            hour_rate REAL NOT NULL DEFAULT 150.0,
+            capabilities TEXT NOT NULL
         );
 
 
@@ -298,16 +330,69 @@ def create_database():
 
     
     cursor.execute('''
-        INSERT INTO cost_rates (id, labor_rate_per_hr, overhead_factor) 
-        VALUES (1, 500.0, 1.4)
+        INSERT INTO cost_rates (id, labor_rate_per_hr, overhead_factor, machine_rate_per_hr) 
+        VALUES (1, 500.0, 1.4, 150.0)
     ''')
 
+    # Bar stock rate (INR/kg) and density (kg/mm^3) per material
+    material_costs = [
+        (1, 280.0, 2.70e-6),
+        (2, 560.0, 8.50e-6),
+        (3, 850.0, 8.96e-6),
+        (4, 320.0, 8.00e-6),
+        (5, 75.0, 7.85e-6)
+    ]
+    cursor.executemany(
+        'INSERT INTO material_costs (material_id, rate_per_kg, density_kg_mm3) VALUES (?, ?, ?)',
+        material_costs
+    )
+
+    # Taylor constants: n, C (m/min), tool change time (min), cost per edge (INR)
+    tool_life = [
+        (1, 'HSS', 0.125, 300, 2.0, 150.0),
+        (1, 'Solid Carbide', 0.25, 900, 1.5, 250.0),
+        (2, 'HSS', 0.125, 200, 2.0, 150.0),
+        (2, 'Solid Carbide', 0.25, 600, 1.5, 250.0),
+        (3, 'HSS', 0.125, 150, 2.0, 150.0),
+        (3, 'Solid Carbide', 0.25, 450, 1.5, 250.0),
+        (4, 'HSS', 0.1, 40, 2.0, 150.0),
+        (4, 'Solid Carbide', 0.25, 250, 1.5, 250.0),
+        (5, 'HSS', 0.125, 70, 2.0, 150.0),
+        (5, 'Solid Carbide', 0.25, 400, 1.5, 250.0),
+    ]
+
+    cursor.executemany('''
+        INSERT INTO tool_life
+        (material_id, tool_material, taylor_n, taylor_c, tool_change_minutes, cost_per_edge)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', tool_life)
+
+    # Machines: max rpm, spindle power (kW), rapid rate (mm/min), hour rate (INR/hr), capabilities
+    machines = [
+        (1, 'Manual Lathe', 250, 2.2, 2000.0, 400.0,
+         'facing,turning,drilling,boring,threading,knurling,parting,grooving'),
+        (2, 'CNC Lathe', 4000, 11.0, 15000.0, 1200.0,
+         'facing,turning,drilling,boring,reaming,threading,knurling,parting,grooving'),
+        (3, 'Bench Drill', 1500, 0.75, 1000.0, 200.0, 'drilling,reaming'),
+    ]
+    cursor.executemany('''
+        INSERT INTO Machines
+        (machine_id, machine_name, max_rpm, power_kw, rapid_rate, hour_rate, capabilities)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', machines)
+
     # Create indexes
     cursor.executescript('''
-        CREATE INDEX idx_machining_params ON MachiningParameters(material_id, operation_id, notes);
+        CREATE UNIQUE INDEX idx_machining_params ON MachiningParameters(material_id, operation_id, notes);
         CREATE INDEX idx_materials_name ON Materials(material_name);
         CREATE INDEX idx_operations_name ON Operations(operation_name);
     ''')
+
+    # Full-text index for the materials search endpoint
+    materials_search.ensure_index(conn)
+
+    # Version counter behind the cached /api/bootstrap payload
+    reference_data.ensure_version_tracking(conn)
     
     conn.commit()
     conn.close()
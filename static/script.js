@@ -6,6 +6,7 @@ import { calculateAndDisplayCosts } from './cost.js';
 // Global variables
 let operations = [];
 let materials = [];
+let availability = null; // material x operation matrix from /api/bootstrap
 let currentOperationId = 0;
 let currentOperationType = '';
 let processCount = 0;
@@ -189,11 +190,8 @@ async function initApp() {
         costSectionEl.classList.add('hidden');
     }
     
-    // Load data asynchronously
-    await Promise.all([
-        fetchAndPopulateMaterials(),
-        fetchAndPopulateOperations()
-    ]);
+    // Load materials, operations and availability in one request
+    await fetchAndPopulateReferenceData();
     
     // Set up event delegation for operation calculate buttons
     document.addEventListener('click', (e) => {
@@ -301,6 +299,69 @@ function formatNumber(num, decimals = 2) {
     return typeof num === 'number' ? num.toFixed(decimals) : num;
 }
 
+// Operations entered by hand that never need machining parameters
+const PARAMETERLESS_OPERATIONS = new Set(['idle']);
+
+// Fetch materials, operations and the availability matrix in one request
+async function fetchAndPopulateReferenceData() {
+    try {
+        const response = await fetch('/api/bootstrap');
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        const data = await response.json();
+
+        const materialSelect = document.getElementById('materialSelect');
+        materialSelect.innerHTML = '<option value="">Select Material</option>';
+        data.materials.forEach(material => {
+            materialSelect.appendChild(new Option(material.material_name, material.material_id));
+        });
+        materials = data.materials;
+
+        const operationSelect = document.getElementById('operationSelect');
+        operationSelect.innerHTML = '<option value="">Select Operation</option>';
+        data.operations.forEach(op => {
+            const option = new Option(op.operation_name, op.operation_id);
+            option.dataset.type = op.operation_name.toLowerCase().replace(/\s+/g, '');
+            operationSelect.add(option);
+            operations[op.operation_id] = op.operation_name.toLowerCase();
+        });
+
+        availability = data.availability;
+        updateOperationAvailability();
+    } catch (error) {
+        console.error('Error loading reference data, falling back to separate requests:', error);
+        await Promise.all([
+            fetchAndPopulateMaterials(),
+            fetchAndPopulateOperations()
+        ]);
+    }
+}
+
+// True when the calculator has parameters for this material and operation
+function isCombinationAvailable(materialId, operationId) {
+    if (!availability || !materialId || !operationId) return true;
+    if (PARAMETERLESS_OPERATIONS.has(operations[operationId])) return true;
+    const row = availability.material_ids.indexOf(Number(materialId));
+    const column = availability.operation_ids.indexOf(Number(operationId));
+    if (row === -1 || column === -1) return true;
+    return availability.matrix[row][column] === 1;
+}
+
+// Disable operations that have no parameters for the selected material
+function updateOperationAvailability() {
+    const materialId = document.getElementById('materialSelect')?.value;
+    const operationSelect = document.getElementById('operationSelect');
+    if (!operationSelect) return;
+
+    Array.from(operationSelect.options).forEach(option => {
+        if (!option.value) return;
+        const available = isCombinationAvailable(materialId, option.value);
+        option.disabled = !available;
+        option.title = available ? '' : 'No machining parameters for this material';
+    });
+}
+
 // Fetch and populate materials from API
 async function fetchAndPopulateMaterials() {
     try {
@@ -371,6 +432,7 @@ function loadDefaultOperations() {
 // Validate that a material is selected
 function onMaterialSelected() {
     const selectedMaterial = materialSelect?.value;
+    updateOperationAvailability();
     const errorElement = document.getElementById('materialError');
 
     if (!selectedMaterial) {
@@ -424,6 +486,12 @@ function addProcess() {
         alert('Please select an operation');
         return;
     }
+
+    if (!isCombinationAvailable(materialId, operationId)) {
+        alert('This operation has no machining parameters for the selected material');
+        operationSelect.value = '';
+        return;
+    }
     
     // Get the selected option and its data
     const selectedOption = operationSelect.options[operationSelect.selectedIndex];
@@ -0,0 +1,212 @@
+import argparse
+import os
+import sqlite3
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import DisconnectionError
+
+# Storage modes for the machining database, selected with MACHINING_DB_MODE:
+#   default  - SQLite defaults (rollback journal), as used in development
+#   wal      - write-ahead log plus mmap/cache tuning; readers never block on the writer
+#   snapshot - serve read-only from an immutable copy that `publish` swaps atomically
+STORAGE_MODES = ('default', 'wal', 'snapshot')
+
+DB_FILENAME = 'machining.db'
+SNAPSHOT_DIRNAME = 'snapshots'
+# Pointer file naming the snapshot readers should open; replaced atomically on publish
+CURRENT_POINTER = 'CURRENT'
+SNAPSHOTS_TO_KEEP = 3
+
+DEFAULT_MMAP_SIZE = 256 * 1024 * 1024  # bytes
+DEFAULT_CACHE_KIB = 64 * 1024
+DEFAULT_BUSY_TIMEOUT_MS = 5000
+
+
+def get_settings():
+    """Read storage settings from the environment."""
+    mode = os.getenv('MACHINING_DB_MODE', 'default').lower()
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"MACHINING_DB_MODE must be one of {', '.join(STORAGE_MODES)}, got '{mode}'")
+    return {
+        'mode': mode,
+        'mmap_size': int(os.getenv('MACHINING_DB_MMAP_SIZE', DEFAULT_MMAP_SIZE)),
+        'cache_kib': int(os.getenv('MACHINING_DB_CACHE_KIB', DEFAULT_CACHE_KIB)),
+        'busy_timeout_ms': int(os.getenv('MACHINING_DB_BUSY_TIMEOUT_MS', DEFAULT_BUSY_TIMEOUT_MS)),
+    }
+
+
+def read_pragmas(settings):
+    """PRAGMA statements that tune a connection for a read-heavy workload."""
+    return [
+        f"PRAGMA mmap_size = {settings['mmap_size']}",
+        # Negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size = -{settings['cache_kib']}",
+        'PRAGMA temp_store = MEMORY',
+    ]
+
+
+def current_snapshot(snapshot_dir):
+    """
+    Path of the snapshot currently published in snapshot_dir.
+
+    Raises:
+        FileNotFoundError: If nothing has been published yet
+    """
+    with open(os.path.join(snapshot_dir, CURRENT_POINTER), encoding='utf-8') as f:
+        return os.path.join(snapshot_dir, f.read().strip())
+
+
+def connect_snapshot(path, settings):
+    """Open a snapshot read-only; immutable=1 skips all file locking and change detection."""
+    conn = sqlite3.connect(f'file:{path}?mode=ro&immutable=1', uri=True, check_same_thread=False)
+    for pragma in read_pragmas(settings):
+        conn.execute(pragma)
+    conn.execute('PRAGMA query_only = 1')
+    return conn
+
+
+def configure_app(app, settings=None):
+    """
+    Set engine options on the Flask app for the configured storage mode.
+
+    Must run before SQLAlchemy(app) creates the engine.
+    """
+    settings = settings or get_settings()
+    app.config['MACHINING_DB_SETTINGS'] = settings
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+
+    if settings['mode'] == 'snapshot':
+        snapshot_dir = os.path.join(app.instance_path, SNAPSHOT_DIRNAME)
+        app.config['MACHINING_SNAPSHOT_DIR'] = snapshot_dir
+        # The creator picks the database file per connection; the URI only has to
+        # name a file so the engine gets a regular connection pool
+        app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(snapshot_dir, CURRENT_POINTER)}"
+        engine_options['creator'] = lambda: connect_snapshot(current_snapshot(snapshot_dir), settings)
+    elif settings['mode'] == 'wal':
+        engine_options.setdefault('connect_args', {})['timeout'] = settings['busy_timeout_ms'] / 1000
+
+
+def install(engine, app):
+    """
+    Attach connection hooks for the configured storage mode to the app's engine.
+
+    wal: every new connection switches the database to WAL and applies the
+    read tuning pragmas. snapshot: pooled connections remember which snapshot
+    they opened and are discarded on checkout once a newer one is published,
+    so readers move to the new snapshot without a restart.
+    """
+    settings = app.config['MACHINING_DB_SETTINGS']
+
+    if settings['mode'] == 'wal':
+        @event.listens_for(engine, 'connect')
+        def _tune_connection(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA journal_mode = WAL')
+            # NORMAL is durable across application crashes in WAL mode
+            cursor.execute('PRAGMA synchronous = NORMAL')
+            cursor.execute(f"PRAGMA busy_timeout = {settings['busy_timeout_ms']}")
+            for pragma in read_pragmas(settings):
+                cursor.execute(pragma)
+            cursor.close()
+
+    elif settings['mode'] == 'snapshot':
+        snapshot_dir = app.config['MACHINING_SNAPSHOT_DIR']
+        pointer = os.path.join(snapshot_dir, CURRENT_POINTER)
+        published = {'mtime': None, 'path': None}
+
+        def latest_snapshot():
+            # stat() per checkout; the pointer is only re-read after a publish
+            mtime = os.stat(pointer).st_mtime_ns
+            if mtime != published['mtime']:
+                published['path'] = current_snapshot(snapshot_dir)
+                published['mtime'] = mtime
+            return published['path']
+
+        @event.listens_for(engine, 'connect')
+        def _remember_snapshot(dbapi_connection, connection_record):
+            connection_record.info['snapshot'] = latest_snapshot()
+
+        @event.listens_for(engine, 'checkout')
+        def _drop_stale_snapshot(dbapi_connection, connection_record, connection_proxy):
+            if connection_record.info.get('snapshot') != latest_snapshot():
+                # The pool reconnects, which opens the newly published snapshot
+                raise DisconnectionError('A newer snapshot has been published')
+
+
+def publish_snapshot(source_path, snapshot_dir, keep=SNAPSHOTS_TO_KEEP):
+    """
+    Copy the live database into a new immutable snapshot and make it current.
+
+    The copy uses SQLite's online backup API, so it is consistent even while
+    writers are active. Readers switch over when the CURRENT pointer is
+    replaced, which os.replace does atomically.
+
+    Args:
+        source_path (str): Live database to snapshot
+        snapshot_dir (str): Directory holding snapshots and the CURRENT pointer
+        keep (int): Number of snapshots to retain, including the new one
+
+    Returns:
+        str: Path of the published snapshot
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    name = f"machining-{time.strftime('%Y%m%d-%H%M%S')}-{time.time_ns() % 1_000_000_000:09d}.db"
+    path = os.path.join(snapshot_dir, name)
+    tmp_path = path + '.tmp'
+
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(tmp_path)
+    try:
+        source.backup(target)
+        # Snapshots are opened with immutable=1, so they must not depend on a -wal file
+        target.execute('PRAGMA journal_mode = DELETE')
+        target.execute('ANALYZE')
+        target.commit()
+    finally:
+        target.close()
+        source.close()
+    with open(tmp_path, 'r+b') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    pointer_tmp = os.path.join(snapshot_dir, CURRENT_POINTER + '.tmp')
+    with open(pointer_tmp, 'w', encoding='utf-8') as f:
+        f.write(name)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(pointer_tmp, os.path.join(snapshot_dir, CURRENT_POINTER))
+
+    _prune_snapshots(snapshot_dir, keep)
+    return path
+
+
+def _prune_snapshots(snapshot_dir, keep):
+    snapshots = sorted(
+        f for f in os.listdir(snapshot_dir)
+        if f.startswith('machining-') and f.endswith('.db')
+    )
+    for name in snapshots[:-keep]:
+        try:
+            # Connections still reading an old snapshot keep their open file handle
+            os.remove(os.path.join(snapshot_dir, name))
+        except OSError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage machining database snapshots.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    publish = subparsers.add_parser('publish', help='Publish the live database as the current read-only snapshot')
+    publish.add_argument('--db', default=os.path.join('instance', DB_FILENAME), help='Live SQLite database')
+    publish.add_argument('--snapshot-dir', default=os.path.join('instance', SNAPSHOT_DIRNAME))
+    publish.add_argument('--keep', type=int, default=SNAPSHOTS_TO_KEEP, help='Snapshots to retain')
+    args = parser.parse_args()
+
+    if args.command == 'publish':
+        path = publish_snapshot(args.db, args.snapshot_dir, keep=args.keep)
+        print(f"Published snapshot {path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the tests away from the instance files a running server writes and
+# make query budget violations fail the request
+os.environ.setdefault('MACHINING_HISTORY', 'off')
+os.environ.setdefault('MACHINING_RESULT_DISK_CACHE', 'off')
+os.environ.setdefault('MACHINING_WARMUP', 'off')
+os.environ.setdefault('MACHINING_TRACE_SAMPLE_RATE', '0')
+os.environ['MACHINING_QUERY_GUARD'] = 'raise'
+
+if not os.path.exists(os.path.join(ROOT, 'instance', 'machining.db')):
+    import setup_database
+
+    cwd = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        os.makedirs('instance', exist_ok=True)
+        setup_database.create_database()
+    finally:
+        os.chdir(cwd)
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import app
+
+    app.config['TESTING'] = True
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def cold_caches(monkeypatch):
+    """Drop the per-version caches, as after a catalogue change."""
+    import cost_engine
+    import machines
+    import reference_data
+
+    for module in (reference_data, machines, cost_engine):
+        monkeypatch.setattr(module, '_cached', None)
+
+
+@pytest.fixture
+def empty_result_cache(app):
+    from app import calculation_cache
+
+    if calculation_cache is not None:
+        calculation_cache.clear()
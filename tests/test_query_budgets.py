@@ -0,0 +1,104 @@
+import pytest
+
+import query_stats
+from query_stats import QUERY_BUDGETS, RELOAD_BUDGETS
+
+TURNING = {
+    'material_id': 1,
+    'operation_id': 2,
+    'operation_name': 'Turning',
+    'dimensions': {'start_diameter': 50, 'end_diameter': 48, 'length': 100},
+}
+
+PLAN = [
+    {'operation_name': 'turning', 'dimensions': {'start_diameter': 50, 'end_diameter': 46, 'length': 120}},
+    {'operation_name': 'facing', 'dimensions': {'diameter': 50, 'depth_of_cut': 1}},
+    {'operation_name': 'drilling', 'dimensions': {'diameter': 10, 'depth': 20, 'peck_depth': 8}},
+]
+
+
+def calculate(client, **changes):
+    return client.post('/api/calculate', json=dict(TURNING, **changes))
+
+
+@pytest.fixture
+def warm(client):
+    """Load the per-version caches once, so the measured request runs in steady state."""
+    assert calculate(client).status_code == 200
+    assert client.get('/api/machines').status_code == 200
+
+
+def test_calculate_hit(client, warm):
+    with query_stats.assert_max_queries(1, reloads=0):
+        response = calculate(client)
+    assert response.status_code == 200
+
+
+def test_calculate_miss(client, warm, empty_result_cache):
+    with query_stats.assert_max_queries(QUERY_BUDGETS['calculate'], reloads=0):
+        response = calculate(client)
+    assert response.status_code == 200
+
+
+def test_calculate_cold_miss(client, cold_caches, empty_result_cache):
+    with query_stats.assert_max_queries(QUERY_BUDGETS['calculate'], reloads=RELOAD_BUDGETS['calculate']):
+        response = calculate(client, machine_id=1)
+    assert response.status_code == 200
+
+
+def test_calculate_miss_with_machine(client, warm, empty_result_cache):
+    with query_stats.assert_max_queries(QUERY_BUDGETS['calculate'], reloads=0):
+        response = calculate(client, machine_id=1)
+    assert response.status_code == 200
+
+
+def test_calculate_unavailable_pair(client, warm):
+    operations = client.get('/api/availability').get_json()['data']['operations']
+    missing = [int(op) for op, materials in operations.items() if 1 not in materials]
+    if not missing:
+        pytest.skip('every operation has parameters for material 1')
+
+    with query_stats.assert_max_queries(1, reloads=0):
+        response = calculate(client, operation_id=missing[0])
+    assert response.status_code == 404
+
+
+def test_calculate_unknown_material(client, warm):
+    with query_stats.assert_max_queries(1, reloads=0):
+        response = calculate(client, material_id=999999)
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('payload', [
+    {'material_id': 1, 'operations': PLAN, 'setup_minutes': 30},
+    {'parts': [{'material_id': m, 'operations': PLAN, 'quantity': 10} for m in (1, 2, 3, 4, 5)]},
+], ids=['part', 'batch'])
+def test_cost(client, cold_caches, payload):
+    with query_stats.assert_max_queries(QUERY_BUDGETS['part_cost'], reloads=RELOAD_BUDGETS['part_cost']):
+        response = client.post('/api/cost', json=payload)
+    assert response.status_code == 200
+
+
+def test_schedule(client):
+    machines = [
+        {'machine_id': 'L1', 'capabilities': ['turning', 'facing', 'drilling']},
+        {'machine_id': 'L2', 'capabilities': ['turning', 'facing', 'drilling']},
+    ]
+    jobs = [{'job_id': f'job-{i}', 'material_id': 1 + i % 5, 'operations': PLAN} for i in range(20)]
+    with query_stats.assert_max_queries(QUERY_BUDGETS['schedule_jobs'], reloads=RELOAD_BUDGETS['schedule_jobs']):
+        response = client.post('/api/schedule', json={'machines': machines, 'jobs': jobs})
+    assert response.status_code == 200
+
+
+def test_guard_fails_request_over_budget(client, warm, monkeypatch):
+    monkeypatch.setitem(QUERY_BUDGETS, 'calculate', 0)
+    response = calculate(client)
+    assert response.status_code == 500
+    assert response.get_json()['message'].startswith('Query guard')
+
+
+def test_assert_max_queries_reports_statements(client, warm):
+    with pytest.raises(query_stats.QueryBudgetExceeded) as raised:
+        with query_stats.assert_max_queries(0):
+            calculate(client)
+    assert 'catalogue_version' in str(raised.value)
@@ -0,0 +1,83 @@
+import math
+
+import numpy as np
+
+# Taylor tool-life model: V * T^n = C
+#   V - cutting speed (m/min)
+#   T - tool life of one cutting edge (min)
+#   n - Taylor exponent of the tool material (about 0.125 for HSS, 0.25 for carbide)
+#   C - cutting speed that gives one minute of tool life (m/min)
+
+# Guards ceil() against rounding in exact multiples of the tool life
+_EDGE_EPSILON = 1e-9
+
+
+def cutting_speed_m_min(spindle_speed_rpm, diameter_mm):
+    """Surface cutting speed in m/min for a spindle speed and workpiece/tool diameter."""
+    return math.pi * diameter_mm * spindle_speed_rpm / 1000.0
+
+
+def tool_life_minutes(cutting_speed, taylor_n, taylor_c):
+    """
+    Tool life T = (C / V)^(1/n) in minutes of cutting.
+
+    Works element-wise on numpy arrays as well as on scalars.
+    """
+    cutting_speed = np.asarray(cutting_speed, dtype=float)
+    if np.any(cutting_speed <= 0):
+        raise ValueError("Cutting speed must be positive.")
+    if taylor_n <= 0 or taylor_c <= 0:
+        raise ValueError("Taylor n and C must be positive.")
+    return (taylor_c / cutting_speed) ** (1.0 / taylor_n)
+
+
+def tool_change_curve(lot_sizes, cutting_minutes_per_piece, cutting_speed, taylor_n, taylor_c,
+                      tool_change_minutes, cost_per_edge):
+    """
+    Tool edges, tool changes and their time and cost for every lot size at once.
+
+    A lot of q pieces cuts for q * t_c minutes and wears out ceil(q * t_c / T)
+    edges. The first edge is fitted during setup, so a lot needs one change
+    less than the edges it uses.
+
+    Args:
+        lot_sizes (array-like): Lot sizes (pieces), any length
+        cutting_minutes_per_piece (float): Cutting time of one piece with this tool
+        cutting_speed (float): Cutting speed in m/min
+        taylor_n (float): Taylor exponent
+        taylor_c (float): Taylor constant in m/min
+        tool_change_minutes (float): Time to change one edge
+        cost_per_edge (float): Cost of one cutting edge
+
+    Returns:
+        dict: numpy arrays aligned with lot_sizes: edges_used, tool_changes,
+              tool_change_minutes, tool_cost, and the same per piece; plus the scalar tool_life_minutes
+    """
+    lot_sizes = np.asarray(lot_sizes, dtype=float)
+    if np.any(lot_sizes < 0):
+        raise ValueError("Lot sizes must not be negative.")
+    if cutting_minutes_per_piece < 0:
+        raise ValueError("Cutting time must not be negative.")
+
+    life = float(tool_life_minutes(cutting_speed, taylor_n, taylor_c))
+    cutting_minutes = lot_sizes * cutting_minutes_per_piece
+    edges_used = np.ceil(cutting_minutes / life - _EDGE_EPSILON)
+    edges_used = np.maximum(edges_used, (lot_sizes > 0).astype(float))
+    tool_changes = np.maximum(edges_used - 1, 0)
+    change_minutes = tool_changes * tool_change_minutes
+    tool_cost = edges_used * cost_per_edge
+
+    # Per-piece figures are undefined for an empty lot
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_piece_minutes = np.where(lot_sizes > 0, change_minutes / lot_sizes, 0.0)
+        per_piece_cost = np.where(lot_sizes > 0, tool_cost / lot_sizes, 0.0)
+
+    return {
+        'tool_life_minutes': life,
+        'edges_used': edges_used,
+        'tool_changes': tool_changes,
+        'tool_change_minutes': change_minutes,
+        'tool_cost': tool_cost,
+        'tool_change_minutes_per_piece': per_piece_minutes,
+        'tool_cost_per_piece': per_piece_cost
+    }
@@ -0,0 +1,394 @@
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+import time
+
+# Request tracing to local files.
+#
+# Spans follow the OpenTelemetry model: a trace is a tree of spans sharing a
+# 128-bit trace id, each with a 64-bit span id, its parent's id, a name, a
+# kind, start and end times in Unix nanoseconds, attributes, events and a
+# status. install() opens a SERVER span for every /api/ request (continuing a
+# W3C traceparent header when the caller sends one) and span() opens child
+# spans for the stages inside it; span() is a no-op outside a recorded trace.
+#
+# Sampling is decided when a trace starts: a fraction sample_rate of trace ids
+# is kept (the TraceIdRatioBased rule; a sampled traceparent is always kept).
+# With slow_ms set every request is recorded and traces whose root took at
+# least slow_ms are kept as well, so slow outliers are never sampled away.
+#
+# Kept traces are written by a background thread as OTLP/JSON, one
+# ExportTraceServiceRequest per line (what the OpenTelemetry Collector's
+# otlpjsonfile receiver reads), to a size-rotated file. Nothing is sent over
+# the network.
+
+logger = logging.getLogger(__name__)
+
+TRACES_FILENAME = 'traces.jsonl'
+SERVICE_NAME = 'machining-time-calculator'
+SCOPE_NAME = 'machining.tracing'
+TRACEPARENT_HEADER = 'traceparent'
+
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_BACKUPS = 5
+# Finished traces waiting for the writer; more are dropped and counted
+QUEUE_SIZE = 1000
+
+# OTLP enums
+KIND_INTERNAL = 1
+KIND_SERVER = 2
+STATUS_UNSET = 0
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_TRACE_ID_LIMIT = 1 << 64
+
+
+def get_settings(instance_path='instance'):
+    """Read tracing settings from the environment; sample_rate 0 without slow_ms disables tracing."""
+    sample_rate = float(os.getenv('MACHINING_TRACE_SAMPLE_RATE', 0.0))
+    if not 0.0 <= sample_rate <= 1.0:
+        raise ValueError('MACHINING_TRACE_SAMPLE_RATE must be between 0 and 1')
+    slow_ms = os.getenv('MACHINING_TRACE_SLOW_MS')
+    return {
+        'sample_rate': sample_rate,
+        'slow_ms': float(slow_ms) if slow_ms else None,
+        'path': os.getenv('MACHINING_TRACE_PATH', os.path.join(instance_path, TRACES_FILENAME)),
+        'max_bytes': int(os.getenv('MACHINING_TRACE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+        'backups': int(os.getenv('MACHINING_TRACE_BACKUPS', DEFAULT_BACKUPS)),
+    }
+
+
+def parse_traceparent(value):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None if it is invalid."""
+    parts = (value or '').strip().lower().split('-')
+    if len(parts) != 4 or parts[0] != '00' or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        trace_id, span_id, flags = int(parts[1], 16), int(parts[2], 16), int(parts[3], 16)
+    except ValueError:
+        return None
+    if not trace_id or not span_id:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def _attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+class Span:
+    """One timed stage of a trace."""
+
+    __slots__ = ('trace', 'span_id', 'parent_id', 'name', 'kind', 'start', 'end', 'attributes',
+                 'events', 'status', 'status_message')
+
+    def __init__(self, trace, name, parent_id, kind=KIND_INTERNAL, attributes=None):
+        self.trace = trace
+        self.span_id = f'{random.getrandbits(64) or 1:016x}'
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = dict(attributes) if attributes else {}
+        self.events = []
+        self.status = STATUS_UNSET
+        self.status_message = ''
+        self.end = None
+        self.start = time.time_ns()
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        """Add an exception event and mark the span as failed."""
+        self.events.append((time.time_ns(), 'exception', {
+            'exception.type': type(exc).__name__,
+            'exception.message': str(exc),
+        }))
+        self.set_status(STATUS_ERROR, str(exc))
+
+    def set_status(self, status, message=''):
+        self.status = status
+        self.status_message = message
+
+    def finish(self):
+        self.end = time.time_ns()
+        self.trace.spans.append(self)
+
+    def to_otlp(self):
+        span = {
+            'traceId': self.trace.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [_attribute(key, value) for key, value in self.attributes.items()],
+            'status': {'code': self.status},
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        if self.status_message:
+            span['status']['message'] = self.status_message
+        if self.events:
+            span['events'] = [
+                {'timeUnixNano': str(at), 'name': name, 'attributes': [_attribute(k, v) for k, v in attrs.items()]}
+                for at, name, attrs in self.events
+            ]
+        return span
+
+
+class Trace:
+    """The spans recorded for one request."""
+
+    __slots__ = ('trace_id', 'sampled', 'spans')
+
+    def __init__(self, trace_id, sampled):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans = []
+
+    def to_otlp(self):
+        return {'resourceSpans': [{
+            'resource': {'attributes': [_attribute('service.name', SERVICE_NAME)]},
+            'scopeSpans': [{'scope': {'name': SCOPE_NAME}, 'spans': [span.to_otlp() for span in self.spans]}],
+        }]}
+
+
+_current = contextvars.ContextVar('machining_span', default=None)
+
+
+class _NoopSpan:
+    """Stands in for a span outside a recorded trace."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def set_status(self, status, message=''):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Context manager that makes a span current while its block runs."""
+
+    __slots__ = ('span', '_token')
+
+    def __init__(self, span):
+        self.span = span
+
+    def __enter__(self):
+        self._token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.span.record_exception(exc)
+        _current.reset(self._token)
+        self.span.finish()
+        return False
+
+
+def span(name, **attributes):
+    """
+    Child span of the current span, for use as a context manager.
+
+    Returns a no-op stand-in when no trace is being recorded, so
+    instrumentation costs one context variable lookup on unrecorded requests.
+    """
+    parent = _current.get()
+    if parent is None:
+        return NOOP_SPAN
+    return _ActiveSpan(Span(parent.trace, name, parent.span_id, attributes=attributes))
+
+
+def traced(name):
+    """Decorator running a function inside span(name)."""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return function(*args, **kwargs)
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def current_span():
+    """The current span, or the no-op stand-in."""
+    return _current.get() or NOOP_SPAN
+
+
+class FileExporter:
+    """Writes kept traces as OTLP/JSON lines to a size-rotated file from a background thread."""
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, backups=DEFAULT_BACKUPS):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.path = path
+        self.dropped = 0
+        self.exported = 0
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+        )
+        self._handler.setFormatter(logging.Formatter('%(message)s'))
+        self._queue = queue.Queue(QUEUE_SIZE)
+        self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+        self._thread.start()
+
+    def export(self, trace):
+        """Queue a finished trace; drops it if the writer has fallen behind."""
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            if trace is None:
+                self._queue.task_done()
+                return
+            try:
+                line = json.dumps(trace.to_otlp(), separators=(',', ':'), default=str)
+                self._handler.emit(logging.makeLogRecord({'msg': line, 'levelno': logging.INFO}))
+                self.exported += 1
+            except Exception as e:
+                logger.warning(f"Could not export trace {trace.trace_id}: {str(e)}")
+            finally:
+                self._queue.task_done()
+
+    def flush(self):
+        """Wait until every queued trace is written."""
+        self._queue.join()
+        self._handler.flush()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+        self._handler.close()
+
+
+class Tracer:
+    """Starts, samples and exports the traces of one process."""
+
+    def __init__(self, settings, exporter=None):
+        self.sample_rate = settings['sample_rate']
+        self.slow_ns = None if settings['slow_ms'] is None else int(settings['slow_ms'] * 1_000_000)
+        self.exporter = exporter or FileExporter(settings['path'], settings['max_bytes'], settings['backups'])
+        self._bound = int(self.sample_rate * _TRACE_ID_LIMIT)
+
+    def _sampled(self, trace_id):
+        # TraceIdRatioBased: compare the low 64 bits of the trace id with the rate
+        return int(trace_id[16:], 16) < self._bound
+
+    def start(self, name, traceparent=None, attributes=None):
+        """
+        Open a root span and make it current.
+
+        Returns:
+            tuple: (span, context token) to pass to finish, or None if the
+            request is not recorded
+        """
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+            sampled = sampled or self._sampled(trace_id)
+        else:
+            trace_id, parent_id = f'{random.getrandbits(128) or 1:032x}', None
+            sampled = self._sampled(trace_id)
+        if not sampled and self.slow_ns is None:
+            return None
+        root = Span(Trace(trace_id, sampled), name, parent_id, kind=KIND_SERVER, attributes=attributes)
+        return root, _current.set(root)
+
+    def finish(self, started):
+        """Close a root span from start and export its trace if it is kept."""
+        root, token = started
+        _current.reset(token)
+        root.finish()
+        trace = root.trace
+        if trace.sampled or (self.slow_ns is not None and root.end - root.start >= self.slow_ns):
+            self.exporter.export(trace)
+
+    def close(self):
+        self.exporter.flush()
+        self.exporter.close()
+
+
+def install(app, settings=None):
+    """
+    Trace every /api/ request of the Flask app.
+
+    Returns:
+        Tracer: The tracer, or None if tracing is disabled
+    """
+    from flask import g, request
+
+    settings = settings or get_settings(app.instance_path)
+    if settings['sample_rate'] <= 0 and settings['slow_ms'] is None:
+        return None
+    tracer = Tracer(settings)
+    atexit.register(tracer.close)
+
+    @app.before_request
+    def start_trace():
+        if not request.path.startswith('/api/'):
+            return
+        started = tracer.start(
+            f'{request.method} {request.path}',
+            traceparent=request.headers.get(TRACEPARENT_HEADER),
+            attributes={'http.request.method': request.method, 'url.path': request.path}
+        )
+        if started is not None:
+            g.trace = started
+
+    @app.after_request
+    def record_status(response):
+        started = g.get('trace')
+        if started is not None:
+            root = started[0]
+            root.set_attribute('http.response.status_code', response.status_code)
+            if request.url_rule is not None:
+                root.set_attribute('http.route', request.url_rule.rule)
+            if response.status_code >= 500:
+                root.set_status(STATUS_ERROR)
+        return response
+
+    @app.teardown_request
+    def finish_trace(exc=None):
+        started = g.pop('trace', None)
+        if started is not None:
+            if exc is not None:
+                started[0].record_exception(exc)
+            tracer.finish(started)
+
+    return tracer
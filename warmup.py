@@ -0,0 +1,171 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+# Warm-up before readiness.
+#
+# After a deploy or restart the first requests would pay for SQLAlchemy mapper
+# configuration, opening pooled connections, importing the operation classes
+# and empty caches. app.py hands run() its warm-up steps:
+#   connections  configure mappers and open the connection pool
+#   reference    load the bootstrap payload, cost rates, machines and every
+#                MachiningParameters row
+#   operations   import every registered operation class and calculate
+#                SAMPLE_DIMENSIONS with it, plus one pass of the batch kernels
+#   frequent     calculate the most frequent inputs of the recent history
+#                into the result cache
+# /api/ready reports 503 until the steps have finished. A failing operation
+# class is logged as a warning and does not hold readiness back; a failing
+# step does.
+#
+# MACHINING_WARMUP selects background (default; the server starts at once
+# and readiness follows), sync (finish before the app is returned) or off.
+
+logger = logging.getLogger(__name__)
+
+MODES = ('background', 'sync', 'off')
+DEFAULT_TOP_INPUTS = 200
+DEFAULT_WINDOW_DAYS = 7
+
+# Valid dimensions per operation, used to run each class once
+SAMPLE_DIMENSIONS = {
+    'facing': [{'diameter': 50.0, 'depth_of_cut': 2.0}],
+    'turning': [
+        {'initial_diameter': 50.0, 'final_diameter': 40.0, 'length': 100.0},
+        {'initial_diameter': 50.0, 'profile': [{'diameter': 40.0, 'length': 30.0}, {'diameter': 30.0, 'length': 20.0}]},
+    ],
+    'drilling': [
+        {'diameter': 10.0, 'depth': 30.0},
+        {'diameter': 8.0, 'depth': 20.0, 'pattern': {'type': 'bolt_circle', 'center': [0, 0], 'radius': 40.0, 'count': 12}},
+    ],
+    'boring': [{'initial_diameter': 20.0, 'final_diameter': 24.0, 'depth': 30.0}],
+    'reaming': [{'diameter': 10.0, 'depth': 20.0}],
+    'threading': [{'diameter': 10.0, 'length': 20.0, 'pitch': 1.5, 'type': 'external'}],
+    'knurling': [{'length': 30.0, 'diameter': 25.0}],
+    'parting': [{'diameter': 30.0, 'depth': 15.0, 'width': 3.0}],
+    'grooving': [{'width': 5.0, 'depth': 2.0}],
+}
+
+
+def get_settings():
+    """Read warm-up settings from the environment."""
+    mode = os.getenv('MACHINING_WARMUP', 'background').lower()
+    if mode not in MODES:
+        raise ValueError(f"MACHINING_WARMUP must be one of {', '.join(MODES)}, got '{mode}'")
+    return {
+        'mode': mode,
+        'top_inputs': int(os.getenv('MACHINING_WARMUP_TOP_INPUTS', DEFAULT_TOP_INPUTS)),
+        'window_days': float(os.getenv('MACHINING_WARMUP_WINDOW_DAYS', DEFAULT_WINDOW_DAYS)),
+    }
+
+
+def frequent_inputs(history_path, window_days=DEFAULT_WINDOW_DAYS, limit=DEFAULT_TOP_INPUTS):
+    """
+    The most frequent calculation inputs of the recent history, most frequent first.
+
+    Returns:
+        list: /api/calculate payloads (material_id, operation_id, operation_name,
+        dimensions and machine_id if one was used); empty without a history
+    """
+    if limit <= 0 or not os.path.exists(history_path):
+        return []
+    since = int((time.time() - window_days * 86400) * 1_000_000)
+    conn = sqlite3.connect(history_path)
+    try:
+        rows = conn.execute(
+            'SELECT material_id, operation_id, operation, dimensions, machine_id, COUNT(*) AS uses '
+            'FROM calculations WHERE created_at >= ? '
+            'GROUP BY material_id, operation_id, operation, dimensions, machine_id '
+            'ORDER BY uses DESC LIMIT ?',
+            (since, limit)
+        ).fetchall()
+    except sqlite3.OperationalError:
+        return []
+    finally:
+        conn.close()
+
+    inputs = []
+    for material_id, operation_id, operation, dimensions, machine_id, _ in rows:
+        payload = {
+            'material_id': material_id,
+            'operation_id': operation_id,
+            'operation_name': operation,
+            'dimensions': json.loads(dimensions)
+        }
+        if machine_id is not None:
+            payload['machine_id'] = machine_id
+        inputs.append(payload)
+    return inputs
+
+
+class WarmupState:
+    """Progress of the warm-up, as reported by /api/ready."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.status = 'ready' if mode == 'off' else 'pending'
+        self.steps = {}
+        self.warnings = []
+        self.error = None
+        self.seconds = None
+
+    @property
+    def ready(self):
+        return self.status == 'ready'
+
+    def to_dict(self):
+        return {
+            'mode': self.mode,
+            'status': self.status,
+            'steps': dict(self.steps),
+            'warnings': list(self.warnings),
+            'error': self.error,
+            'seconds': self.seconds
+        }
+
+
+def run(state, steps):
+    """
+    Run warm-up steps in order, recording their time and outcome in state.
+
+    Args:
+        state (WarmupState): Updated as the steps run
+        steps (list): (name, callable) pairs; a callable may return a summary
+            dict and may append to state.warnings
+    """
+    state.status = 'running'
+    started = time.perf_counter()
+    try:
+        for name, step in steps:
+            step_started = time.perf_counter()
+            summary = step(state) or {}
+            state.steps[name] = dict(summary, seconds=round(time.perf_counter() - step_started, 4))
+    except Exception as e:
+        logger.error(f"Warm-up failed in step {name}: {str(e)}", exc_info=True)
+        state.error = f'{name}: {str(e)}'
+        state.status = 'failed'
+    else:
+        state.status = 'ready'
+    state.seconds = round(time.perf_counter() - started, 4)
+    for warning in state.warnings:
+        logger.warning(f"Warm-up: {warning}")
+    logger.info(f"Warm-up {state.status} in {state.seconds}s")
+
+
+def start(steps, settings=None):
+    """
+    Start the warm-up as configured.
+
+    Returns:
+        WarmupState: Ready at once when the mode is off
+    """
+    settings = settings or get_settings()
+    state = WarmupState(settings['mode'])
+    if settings['mode'] == 'sync':
+        run(state, steps)
+    elif settings['mode'] == 'background':
+        threading.Thread(target=run, args=(state, steps), name='warmup', daemon=True).start()
+    return state